@@ -1,4 +1,5 @@
 from pathlib import Path
+import hashlib
 import json
 
 import cv2
@@ -7,9 +8,16 @@ import pandas as pd
 import streamlit as st
 
 from perception.detector import Detector
+from robot.daemon import RemoteRobot
+from robot.jobs import PickJobRunner
+from robot.kinematics import check_drop_locations, precheck_targets
+from robot.sorting import load_bins, plan_sort
 from robot.main import DobotController
-from utilites.camera import Camera
-from utilites.map import pixel_to_robot
+from utilites.camera import Camera, LiveCamera
+from utilites.clock import now
+from utilites.map import load_table, pixel_to_robot
+from utilites.metrics import DETECTION_LATENCY
+from utilites.trace import span, tracer
 
 
 ROOT = Path(__file__).resolve().parent
@@ -22,44 +30,92 @@ CALIBRATION_CANDIDATES = [
 ]
 
 
+@st.cache_resource
+def _get_detector():
+    return Detector()
+
+
+@st.cache_data(max_entries=8)
+def _decode_image(data):
+    with span("image.decode"):
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+@st.cache_data(max_entries=2)
+def _read_default_image(path, mtime):
+    with span("image.read"):
+        return cv2.imread(path)
+
+
 def _load_image(uploaded_file, captured_image):
+    """Return (image, key) where key identifies the image content for caching"""
     if uploaded_file is not None:
-        data = np.frombuffer(uploaded_file.read(), np.uint8)
-        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+        data = uploaded_file.getvalue()
+        return _decode_image(data), "upload-" + hashlib.sha1(data).hexdigest()
 
     if captured_image is not None:
-        return captured_image
+        return captured_image, f"capture-{st.session_state.capture_count}"
 
     if DEFAULT_IMAGE.exists():
-        return cv2.imread(str(DEFAULT_IMAGE))
+        mtime = DEFAULT_IMAGE.stat().st_mtime
+        return _read_default_image(str(DEFAULT_IMAGE), mtime), f"default-{mtime}"
+
+    return None, None
+
+
+def _homography_from_data(data):
+    H = data.get("homography") or data.get("homography_matrix")
+    if H is None:
+        return None
+    return np.array(H, dtype=np.float64)
 
+
+@st.cache_data(max_entries=4)
+def _load_uploaded_homography(data):
+    try:
+        H = _homography_from_data(json.loads(data.decode("utf-8")))
+        if H is None:
+            return None, "Uploaded calibration JSON missing 'homography' or 'homography_matrix'"
+        return H, "Loaded calibration from uploaded file"
+    except Exception as e:
+        return None, f"Failed to read uploaded calibration: {e}"
+
+
+@st.cache_resource
+def _load_homography_file(path, mtime):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        H = _homography_from_data(data)
+        if H is None:
+            return None, f"Calibration file found at {Path(path).name}, but no homography key"
+        return H, f"Loaded calibration from {path}"
+    except Exception as e:
+        return None, f"Failed to load calibration from {path}: {e}"
+
+
+def _parse_table(text):
+    """'x_min, x_max, y_min, y_max' from the sidebar, else "table" from the calibration file"""
+    if text.strip():
+        values = [float(v) for v in text.replace(",", " ").split()]
+        if len(values) != 4:
+            raise ValueError("Table area needs 4 numbers: x_min, x_max, y_min, y_max")
+        return tuple(values)
+    for path in CALIBRATION_CANDIDATES:
+        if path.exists():
+            return load_table(str(path))
     return None
 
 
 def _load_homography(calibration_upload):
     if calibration_upload is not None:
-        try:
-            data = json.loads(calibration_upload.read().decode("utf-8"))
-            H = data.get("homography") or data.get("homography_matrix")
-            if H is None:
-                return None, "Uploaded calibration JSON missing 'homography' or 'homography_matrix'"
-            return np.array(H, dtype=np.float64), "Loaded calibration from uploaded file"
-        except Exception as e:
-            return None, f"Failed to read uploaded calibration: {e}"
+        return _load_uploaded_homography(calibration_upload.getvalue())
 
     for path in CALIBRATION_CANDIDATES:
         if not path.exists():
             continue
-
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            H = data.get("homography") or data.get("homography_matrix")
-            if H is None:
-                return None, f"Calibration file found at {path.name}, but no homography key"
-            return np.array(H, dtype=np.float64), f"Loaded calibration from {path}"
-        except Exception as e:
-            return None, f"Failed to load calibration from {path}: {e}"
+        # mtime is part of the cache key so an edited calibration file is picked up
+        return _load_homography_file(str(path), path.stat().st_mtime)
 
     return None, "Calibration file not found"
 
@@ -76,7 +132,8 @@ def _build_rows(detected_objects, H):
         rx, ry = None, None
         if H is not None:
             try:
-                rx, ry = pixel_to_robot(u, v, H)
+                with span("map"):
+                    rx, ry = pixel_to_robot(u, v, H)
                 rx = float(rx)
                 ry = float(ry)
             except Exception:
@@ -97,6 +154,21 @@ def _build_rows(detected_objects, H):
     return rows
 
 
+@st.cache_data(max_entries=32)
+def _detect_rows(image_key, _image, color_name, shape_type, H_key, per_color=False):
+    # The image itself is not hashed (underscore prefix), image_key identifies it
+    H = None if H_key is None else np.array(H_key, dtype=np.float64)
+    detector = _get_detector()
+    with span("detect", color=color_name, shape=shape_type):
+        if per_color and color_name == "any":
+            # sorting needs the real color of every part, so detect each color separately (as main.py does)
+            detections = [obj for color in detector.colors
+                          for obj in detector.find_objects(_image, color_name=color, shape_type=shape_type)]
+        else:
+            detections = detector.find_objects(_image, color_name=color_name, shape_type=shape_type)
+    return _build_rows(detections, H)
+
+
 def _annotate_image(image_bgr, rows):
     annotated = image_bgr.copy()
 
@@ -123,6 +195,14 @@ def _annotate_image(image_bgr, rows):
     return annotated
 
 
+@st.cache_data(max_entries=8)
+def _render_rgb(image_key, _image, rows):
+    with span("annotate", rows=len(rows)):
+        if rows:
+            return _to_rgb(_annotate_image(_image, rows))
+        return _to_rgb(_image)
+
+
 def _ensure_state():
     if "robot" not in st.session_state:
         st.session_state.robot = None
@@ -130,12 +210,25 @@ def _ensure_state():
         st.session_state.detections = []
     if "captured_image" not in st.session_state:
         st.session_state.captured_image = None
+    if "capture_count" not in st.session_state:
+        st.session_state.capture_count = 0
+    if "capture_time" not in st.session_state:
+        # shared-clock stamp of captured_image, for the detection latency metric
+        st.session_state.capture_time = None
+    if "live_camera" not in st.session_state:
+        st.session_state.live_camera = None
 
 
-def _connect_robot(ip):
+def _connect_robot(ip, use_service=False, queued_io=False):
     if st.session_state.robot is not None:
         return
-    st.session_state.robot = DobotController(ip=ip)
+    if use_service:
+        # The robot service already owns an enabled arm, connecting is instant
+        st.session_state.robot = RemoteRobot()
+        return
+    robot = DobotController(ip=ip, queued_io=queued_io)
+    robot.job_runner = PickJobRunner(robot)
+    st.session_state.robot = robot
 
 
 def _disconnect_robot():
@@ -143,12 +236,177 @@ def _disconnect_robot():
     if robot is None:
         return
 
+    # Let the current pick finish so the arm is not left holding a part
+    if not robot.job_runner.shutdown(timeout=60.0):
+        # Closing the connections now would leave the arm moving with nobody connected
+        raise RuntimeError("A pick is still running, wait for it or use EMERGENCY STOP before disconnecting")
     try:
         robot.disconnect()
     finally:
         st.session_state.robot = None
 
 
+def _format_seconds(seconds):
+    if seconds is None:
+        return "--"
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes:d}:{secs:02d}"
+
+
+def _render_jobs(runner):
+    job = runner.active_job()
+    if job is not None:
+        info = job.progress()
+        st.progress(
+            info["completed"] / max(info["total"], 1),
+            text=f"{info['label']}: {info['completed']}/{info['total']} picked "
+            f"({info['status']}, elapsed {_format_seconds(info['elapsed_s'])}, ETA {_format_seconds(info['eta_s'])})",
+        )
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            if job.paused:
+                if st.button("Resume", key=f"resume-{job.id}", use_container_width=True):
+                    job.resume()
+            elif st.button("Pause", key=f"pause-{job.id}", use_container_width=True):
+                job.pause()
+        with c2:
+            if st.button("Cancel", key=f"cancel-{job.id}", use_container_width=True):
+                job.cancel()
+        with c3:
+            if st.button("Cancel All", key="cancel-all", use_container_width=True):
+                runner.cancel_all()
+
+    pending = runner.pending_jobs()
+    if pending:
+        st.caption("Queued: " + ", ".join(f"{j.label} ({j.total})" for j in pending))
+
+    finished = [j for j in list(runner.jobs) if j.status not in ("pending", "running", "paused")]
+    for j in finished[-5:]:
+        info = j.progress()
+        message = f"{info['label']}: {info['status']} {info['completed']}/{info['total']} in {_format_seconds(info['elapsed_s'])}"
+        if info.get("missed"):
+            message += f", {info['missed']} missed grasp(s)"
+        if info["status"] == "failed":
+            st.error(f"{message} ({info['error']})")
+        elif info["status"] == "cancelled":
+            st.warning(message)
+        else:
+            st.success(message)
+
+
+def _update_live_camera(enabled, camera_index, fps, width):
+    live = st.session_state.live_camera
+    if live is not None and (not enabled or live.index != camera_index):
+        live.stop()
+        st.session_state.live_camera = live = None
+
+    if not enabled:
+        return None
+
+    if live is None:
+        live = LiveCamera(index=camera_index, preview_fps=fps, preview_width=width)
+        live.start()
+        st.session_state.live_camera = live
+
+    # Rate and size can change without reopening the device
+    live.preview_fps = fps
+    live.preview_width = width
+    return live
+
+
+def _render_live(live):
+    jpeg, frame_id = live.latest_jpeg()
+    if jpeg is None:
+        st.info("Waiting for camera frames...")
+        return
+    st.image(jpeg, caption=f"Live view (frame {frame_id})", use_container_width=True)
+
+
+def _live_panel(live):
+    st.subheader("Live View")
+    if hasattr(st, "fragment"):
+        st.fragment(run_every=1.0 / live.preview_fps)(_render_live)(live)
+    else:
+        _render_live(live)
+
+    if st.button("Use Live Frame For Detection"):
+        frame, _, frame_time = live.latest_stamped_frame()
+        if frame is None:
+            st.error("No live frame available yet")
+        else:
+            st.session_state.captured_image = frame
+            st.session_state.capture_time = frame_time
+            st.session_state.capture_count += 1
+            st.session_state.detections = []
+
+
+def _render_telemetry(hub):
+    sample = hub.latest()
+    if sample is None:
+        st.info("Waiting for feedback frames...")
+        return
+
+    x, y, z, r = sample["pose"]
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("X", f"{x:.1f}")
+    c2.metric("Y", f"{y:.1f}")
+    c3.metric("Z", f"{z:.1f}")
+    c4.metric("R", f"{r:.1f}")
+    c5.metric("TCP speed", f"{sample['tcp_speed']:.1f} mm/s")
+    st.caption(
+        f"Enabled: {sample['enable_status']}  Error: {sample['error_status']}  "
+        f"Queue running: {sample['running_queue']}"
+    )
+
+    history = hub.history()
+    t0 = history[0]["time"]
+    index = [round(s_["time"] - t0, 2) for s_ in history]
+
+    def frame(key, prefix):
+        return pd.DataFrame([s_[key] for s_ in history], index=index, columns=[f"{prefix}{i + 1}" for i in range(len(history[0][key]))])
+
+    tab_pose, tab_joints, tab_speed, tab_temp, tab_current = st.tabs(["Pose", "Joints", "Speed", "Temperature", "Current"])
+    with tab_pose:
+        st.line_chart(pd.DataFrame([s_["pose"] for s_ in history], index=index, columns=["x", "y", "z", "r"]))
+    with tab_joints:
+        st.line_chart(frame("q_actual", "J"))
+    with tab_speed:
+        st.line_chart(pd.DataFrame({"tcp_speed": [s_["tcp_speed"] for s_ in history]}, index=index))
+    with tab_temp:
+        st.line_chart(frame("motor_temperatures", "J"))
+    with tab_current:
+        st.line_chart(frame("i_actual", "J"))
+
+
+def _telemetry_panel():
+    robot = st.session_state.robot
+    if robot is None or robot.telemetry is None:
+        return
+
+    with st.expander("Robot Telemetry", expanded=False):
+        # Fed by the feedback thread, no GetPose/GetAngle round trips on the dashboard socket
+        if hasattr(st, "fragment"):
+            st.fragment(run_every=0.5)(_render_telemetry)(robot.telemetry)
+        else:
+            _render_telemetry(robot.telemetry)
+
+
+def _job_panel():
+    robot = st.session_state.robot
+    if robot is None:
+        return
+
+    st.subheader("Pick Jobs")
+    runner = robot.job_runner
+    # Re-run only this panel while jobs are active so progress updates without blocking the page
+    if hasattr(st, "fragment"):
+        st.fragment(run_every=1.0)(_render_jobs)(runner)
+    else:
+        _render_jobs(runner)
+        if runner.busy():
+            st.button("Refresh progress")
+
+
 def main():
     st.set_page_config(page_title="Dobot MG400 Pick-and-Place", layout="wide")
     _ensure_state()
@@ -166,17 +424,25 @@ def main():
             with st.spinner("Capturing frame from camera..."):
                 try:
                     camera = Camera(index=int(camera_index))
-                    camera.get_frame()
-                    captured = cv2.imread(str(DEFAULT_IMAGE)) if DEFAULT_IMAGE.exists() else None
+                    captured = camera.capture_image()
                     if captured is None:
                         st.error("Camera capture failed. No image was saved.")
                     else:
                         st.session_state.captured_image = captured
+                        st.session_state.capture_time = camera.last_capture_time
+                        st.session_state.capture_count += 1
                         st.session_state.detections = []
                         st.success("Captured image from camera")
                 except Exception as e:
                     st.error(f"Camera capture failed: {e}")
 
+        live_enabled = st.checkbox("Live view", value=False)
+        live_fps = st.slider("Live view FPS", min_value=1, max_value=15, value=5)
+        live_width = st.select_slider("Live view width", options=[320, 480, 640, 960], value=640)
+
+        if tracer.enabled and st.button("Save trace"):
+            st.caption(f"Trace written to {tracer.save()}")
+
         color_name = st.selectbox("Color", ["any", "red", "green", "blue"])
         shape_type = st.selectbox("Shape", ["any", "circle", "square"])
 
@@ -185,6 +451,10 @@ def main():
         drop_x = st.number_input("Drop X", value=275.0, step=1.0)
         drop_y = st.number_input("Drop Y", value=-125.0, step=1.0)
         drop_z = st.number_input("Drop Z", value=-75.0, step=1.0)
+        table_text = st.text_input("Table area (optional)", value="", help="x_min, x_max, y_min, y_max in robot coordinates; objects outside it are not picked. Empty: \"table\" from the calibration file")
+        bins_path = st.text_input("Sorting bins JSON (optional)", value="", help="Pick All sorts each part into its nearest matching bin instead of the drop point")
+        use_service = st.checkbox("Use robot service", value=False, help="Send jobs to a running `python -m robot.daemon`")
+        queued_io = st.checkbox("Queued gripper I/O", value=False, help="Switch suction/blow-off with queued MovLIO triggers instead of DO + 1 s sleeps")
 
         col1, col2 = st.columns(2)
         with col1:
@@ -195,11 +465,32 @@ def main():
         if connect_clicked:
             with st.spinner("Connecting to robot..."):
                 try:
-                    _connect_robot(robot_ip)
+                    _connect_robot(robot_ip, use_service=use_service, queued_io=queued_io)
                     st.success("Robot connected")
                 except Exception as e:
                     st.error(f"Connection failed: {e}")
 
+        if st.session_state.robot is not None:
+            if st.button("EMERGENCY STOP", type="primary", use_container_width=True):
+                robot = st.session_state.robot
+                # Stop first: cancelling is a round trip to the service for a RemoteRobot
+                latency = robot.emergency_stop()
+                robot.job_runner.cancel_all()
+                if latency is None and robot.stop_was_idle:
+                    st.error("Emergency stop sent, the arm was already idle")
+                elif latency is None:
+                    st.error("Emergency stop sent, halt not confirmed")
+                else:
+                    st.error(f"Emergency stop: halted after {latency * 1000:.0f} ms")
+            if st.button("Reset after stop", use_container_width=True,
+                         help="Clear the alarm and re-enable the robot once the cell is safe"):
+                with st.spinner("Resetting robot..."):
+                    try:
+                        st.session_state.robot.reset()
+                        st.success("Robot reset")
+                    except Exception as e:
+                        st.error(f"Reset failed: {e}")
+
         if disconnect_clicked:
             with st.spinner("Disconnecting robot..."):
                 try:
@@ -208,7 +499,20 @@ def main():
                 except Exception as e:
                     st.error(f"Disconnect failed: {e}")
 
-    image = _load_image(uploaded_file, st.session_state.captured_image)
+    _job_panel()
+    _telemetry_panel()
+
+    live = None
+    try:
+        live = _update_live_camera(live_enabled, int(camera_index), float(live_fps), int(live_width))
+    except Exception as e:
+        st.error(f"Live view failed: {e}")
+    if live is not None:
+        # Overlay the last detection results; detection is not re-run per displayed frame
+        live.set_overlay(st.session_state.detections)
+        _live_panel(live)
+
+    image, image_key = _load_image(uploaded_file, st.session_state.captured_image)
     if image is None:
         st.warning(
             "Upload an image, click Capture From Camera, or place `outputs/camera_detection.png` in the project root output folder."
@@ -221,22 +525,21 @@ def main():
     else:
         st.success(calibration_message)
 
-    detector = Detector()
-
     if st.button("Detect Objects", type="primary"):
-        detections = detector.find_objects(image, color_name=color_name, shape_type=shape_type)
-        st.session_state.detections = _build_rows(detections, H)
+        H_key = None if H is None else tuple(map(tuple, H.tolist()))
+        st.session_state.detections = _detect_rows(image_key, image, color_name, shape_type, H_key,
+                                                   per_color=bool(bins_path))
+        if image_key.startswith("capture-") and st.session_state.capture_time is not None:
+            # includes the time until Detect was pressed, uploaded images have no capture time
+            DETECTION_LATENCY.observe(now() - st.session_state.capture_time)
 
     detections = st.session_state.detections
 
     left, right = st.columns([3, 2])
 
     with left:
-        if detections:
-            annotated = _annotate_image(image, detections)
-            st.image(_to_rgb(annotated), caption="Detections", use_container_width=True)
-        else:
-            st.image(_to_rgb(image), caption="Input Image", use_container_width=True)
+        caption = "Detections" if detections else "Input Image"
+        st.image(_render_rgb(image_key, image, detections), caption=caption, use_container_width=True)
 
     with right:
         st.subheader("Detected Objects")
@@ -258,6 +561,16 @@ def main():
         robot = st.session_state.robot
         if robot is not None:
             robot.drop_location = [drop_x, drop_y, drop_z]
+            unreachable = check_drop_locations([robot.drop_location], (robot.place_z, robot.safe_z))
+            if unreachable:
+                st.error(f"Drop location is out of reach: {', '.join(unreachable[0][2])}")
+                return
+
+        try:
+            table = _parse_table(table_text)
+        except Exception as e:
+            st.error(f"Invalid table area: {e}")
+            return
 
         pick_col1, pick_col2 = st.columns(2)
 
@@ -272,29 +585,51 @@ def main():
                     elif row["robot_x"] is None or row["robot_y"] is None:
                         st.error("Selected object has no robot coordinates")
                     else:
-                        with st.spinner("Executing pick and place..."):
-                            try:
-                                robot.pick_and_place(row["robot_x"], row["robot_y"])
-                                st.success(f"Picked object #{selected_id}")
-                            except Exception as e:
-                                st.error(f"Pick failed: {e}")
+                        targets, rejected = precheck_targets([(row["robot_x"], row["robot_y"])], (robot.pick_z, robot.safe_z),
+                                                             table=table)
+                        if rejected:
+                            st.error(f"Object #{selected_id} is out of reach: {', '.join(rejected[0][2])}")
+                        else:
+                            robot.job_runner.submit(targets, label=f"Object #{selected_id}",
+                                                    kinds=[f"{row['color']} {row['shape']}"])
+                            st.info(f"Queued pick of object #{selected_id}")
 
         with pick_col2:
             if st.button("Pick All", use_container_width=True):
                 if robot is None:
                     st.error("Connect robot first")
                 else:
-                    with st.spinner("Executing pick and place for all objects..."):
+                    rows = [row for row in detections if row["robot_x"] is not None and row["robot_y"] is not None]
+                    targets, rejected = precheck_targets([(row["robot_x"], row["robot_y"]) for row in rows],
+                                                         (robot.pick_z, robot.safe_z), table=table)
+                    if rejected:
+                        st.warning(f"Skipping {len(rejected)} object(s) outside the robot envelope")
+                    skipped = {index for index, _, _ in rejected}
+                    rows = [row for i, row in enumerate(rows) if i not in skipped]
+                    kinds = [f"{row['color']} {row['shape']}" for row in rows]
+                    drop_locations = None
+                    if bins_path:
                         try:
-                            count = 0
-                            for row in detections:
-                                if row["robot_x"] is None or row["robot_y"] is None:
-                                    continue
-                                robot.pick_and_place(row["robot_x"], row["robot_y"])
-                                count += 1
-                            st.success(f"Completed pick-and-place for {count} object(s)")
+                            bins = load_bins(bins_path)
+                            plan = plan_sort([(x, y, row["color"], row["shape"]) for (x, y), row in zip(targets, rows)],
+                                             bins)
                         except Exception as e:
-                            st.error(f"Pick-all failed: {e}")
+                            st.error(f"Sorting failed: {e}")
+                            return
+                        unreachable = check_drop_locations([b.location for b in bins], (robot.place_z, robot.safe_z))
+                        if unreachable:
+                            st.error("Bins out of reach: " + "; ".join(
+                                f"{bins[index].name} ({', '.join(reasons)})" for index, _, reasons in unreachable))
+                            return
+                        targets, kinds, drop_locations = plan.targets, plan.kinds, plan.drop_locations
+                        if plan.unsorted:
+                            st.warning(f"{len(plan.unsorted)} object(s) have no matching bin")
+                    if not targets:
+                        st.warning("Nothing left to pick")
+                        return
+                    robot.job_runner.submit(targets, label=f"Pick All ({len(targets)})", kinds=kinds,
+                                            drop_locations=drop_locations)
+                    st.info(f"Queued pick-and-place for {len(targets)} object(s)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,243 @@
+"""
+Calibration accuracy and mapping-throughput benchmark
+
+Takes a held-out set of pixel/robot point pairs (points that were NOT used to
+compute the homography), maps every pixel through the current calibration and
+reports the error in mm across the workspace. Also times the scalar
+pixel_to_robot path against the batched pixels_to_robot path.
+
+Held-out points file (JSON):
+    {"pixel_points": [[u, v], ...], "robot_points": [[x, y], ...]}
+
+Run from the project root:
+    python -m calibration.benchmark --points calibration/held_out_points.json
+
+Results are written to outputs/calibration_benchmark.json together with an
+error heatmap image. Pass --baseline with an older results file to flag
+regressions when the calibration code or matrix changes.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from utilites.map import load_calibration, pixel_to_robot, pixels_to_robot
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, "outputs")
+
+
+def load_point_pairs(filename):
+    """
+    Load held-out pixel/robot point pairs
+
+    Args:
+        filename: JSON file with "pixel_points" and "robot_points" lists
+
+    Returns:
+        tuple: (pixel_points, robot_points) as (N, 2) float arrays
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    pixel_pts = np.asarray(data["pixel_points"], dtype=np.float64).reshape(-1, 2)
+    robot_pts = np.asarray(data["robot_points"], dtype=np.float64).reshape(-1, 2)
+    if len(pixel_pts) != len(robot_pts):
+        raise ValueError(f"{len(pixel_pts)} pixel points but {len(robot_pts)} robot points")
+    if len(pixel_pts) == 0:
+        raise ValueError("Held-out point file contains no points")
+    return pixel_pts, robot_pts
+
+
+def accuracy_report(pixel_pts, robot_pts, H):
+    """
+    Compute mapping error statistics for the held-out points
+
+    Args:
+        pixel_pts: (N, 2) pixel coordinates
+        robot_pts: (N, 2) measured robot coordinates in mm
+        H: 3x3 homography matrix
+
+    Returns:
+        tuple: (stats dict, per-point error array in mm)
+    """
+    predicted = pixels_to_robot(pixel_pts, H)
+    errors = np.linalg.norm(predicted - robot_pts, axis=1)
+
+    stats = {
+        "points": int(len(errors)),
+        "mean_error_mm": float(np.mean(errors)),
+        "p95_error_mm": float(np.percentile(errors, 95)),
+        "max_error_mm": float(np.max(errors)),
+        "worst_point_pixel": [float(c) for c in pixel_pts[int(np.argmax(errors))]],
+    }
+    return stats, errors
+
+
+def throughput_report(H, n_points=100000, repeats=5, image_size=(1920, 1080)):
+    """
+    Measure mapping throughput of the scalar and batched paths
+
+    Args:
+        H: 3x3 homography matrix
+        n_points: number of random pixel points to map per run
+        repeats: number of runs, the best run is reported
+        image_size: (width, height) used to draw random pixels
+
+    Returns:
+        dict: points/sec for each path
+    """
+    rng = np.random.default_rng(0)
+    pts = rng.uniform((0, 0), image_size, size=(n_points, 2))
+
+    # The scalar path is slow, time it on a subset
+    n_scalar = min(n_points, 10000)
+    scalar_best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for u, v in pts[:n_scalar]:
+            pixel_to_robot(u, v, H)
+        scalar_best = min(scalar_best, time.perf_counter() - start)
+
+    batched_best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        pixels_to_robot(pts, H)
+        batched_best = min(batched_best, time.perf_counter() - start)
+
+    return {
+        "scalar_points_per_sec": n_scalar / scalar_best,
+        "batched_points_per_sec": n_points / batched_best,
+    }
+
+
+def save_heatmap(pixel_pts, errors, image_size, filename, background=None, cell=20):
+    """
+    Save an error heatmap over the image plane
+
+    The error at each grid cell is interpolated from the held-out points by
+    inverse distance weighting, so the whole workspace is coloured.
+
+    Args:
+        pixel_pts: (N, 2) pixel coordinates
+        errors: (N,) error per point in mm
+        image_size: (width, height) of the camera image
+        filename: output image path
+        background: optional BGR image to blend the heatmap onto
+        cell: grid cell size in pixels
+    """
+    width, height = image_size
+    gx, gy = np.meshgrid(np.arange(0, width, cell) + cell / 2, np.arange(0, height, cell) + cell / 2)
+    grid = np.stack([gx.ravel(), gy.ravel()], axis=1)
+
+    d2 = ((grid[:, None, :] - pixel_pts[None, :, :]) ** 2).sum(axis=2)
+    weights = 1.0 / np.maximum(d2, 1e-6)
+    field = (weights @ errors) / weights.sum(axis=1)
+    field = field.reshape(gx.shape)
+
+    max_err = max(float(np.max(errors)), 1e-6)
+    scaled = np.uint8(np.clip(field / max_err, 0, 1) * 255)
+    heat = cv2.applyColorMap(cv2.resize(scaled, (width, height), interpolation=cv2.INTER_LINEAR), cv2.COLORMAP_JET)
+
+    if background is not None and background.shape[:2] == (height, width):
+        heat = cv2.addWeighted(background, 0.4, heat, 0.6, 0)
+
+    for (u, v), err in zip(pixel_pts, errors):
+        cv2.circle(heat, (int(u), int(v)), 6, (255, 255, 255), 2)
+        cv2.putText(heat, f"{err:.1f}", (int(u) + 8, int(v) - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    cv2.putText(heat, f"max {max_err:.2f} mm", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+
+    cv2.imwrite(filename, heat)
+
+
+def compare_to_baseline(results, baseline_file, tolerance=0.05):
+    """
+    Compare results with a previous run
+
+    Args:
+        results: current results dict
+        baseline_file: JSON file written by an earlier run
+        tolerance: allowed relative change before a metric counts as a regression
+
+    Returns:
+        list: human readable regression messages (empty if none)
+    """
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for key in ("mean_error_mm", "p95_error_mm", "max_error_mm"):
+        old = baseline.get("accuracy", {}).get(key)
+        new = results["accuracy"][key]
+        if old is not None and new > old * (1 + tolerance):
+            regressions.append(f"{key}: {old:.3f} -> {new:.3f}")
+    for key in ("scalar_points_per_sec", "batched_points_per_sec"):
+        old = baseline.get("throughput", {}).get(key)
+        new = results["throughput"][key]
+        if old is not None and new < old * (1 - tolerance):
+            regressions.append(f"{key}: {old:.0f} -> {new:.0f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark calibration accuracy and mapping throughput")
+    parser.add_argument("--points", required=True, help="JSON file with held-out pixel_points and robot_points")
+    parser.add_argument("--calibration", default=os.path.join(BASE_DIR, "callibration.json"), help="Calibration JSON with the homography")
+    parser.add_argument("--image", default=os.path.join(OUTPUT_DIR, "calib.jpg"), help="Optional background image for the heatmap")
+    parser.add_argument("--output", default=os.path.join(OUTPUT_DIR, "calibration_benchmark.json"), help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to check for regressions")
+    parser.add_argument("--n-points", type=int, default=100000, help="Number of points for the throughput test")
+    args = parser.parse_args()
+
+    H = load_calibration(args.calibration)
+    with open(args.calibration, "r", encoding="utf-8") as f:
+        image_size = tuple(json.load(f).get("image_size", (1920, 1080)))
+
+    pixel_pts, robot_pts = load_point_pairs(args.points)
+    accuracy, errors = accuracy_report(pixel_pts, robot_pts, H)
+    throughput = throughput_report(H, n_points=args.n_points, image_size=image_size)
+
+    print(f"Held-out points: {accuracy['points']}")
+    print(f"Mean error: {accuracy['mean_error_mm']:.2f} mm")
+    print(f"P95 error:  {accuracy['p95_error_mm']:.2f} mm")
+    print(f"Max error:  {accuracy['max_error_mm']:.2f} mm at pixel {accuracy['worst_point_pixel']}")
+    print(f"Scalar throughput:  {throughput['scalar_points_per_sec']:.0f} points/sec")
+    print(f"Batched throughput: {throughput['batched_points_per_sec']:.0f} points/sec")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    heatmap_path = os.path.splitext(args.output)[0] + "_heatmap.jpg"
+    background = cv2.imread(args.image) if os.path.exists(args.image) else None
+    save_heatmap(pixel_pts, errors, image_size, heatmap_path, background=background)
+    print(f"Heatmap saved to {heatmap_path}")
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "calibration": os.path.abspath(args.calibration),
+        "homography": np.asarray(H).tolist(),
+        "accuracy": accuracy,
+        "throughput": throughput,
+        "per_point_error_mm": [float(e) for e in errors],
+        "heatmap": heatmap_path,
+    }
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline)
+        results["regressions"] = regressions
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+        else:
+            print("No regressions against baseline")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,58 +2,115 @@ import cv2
 import argparse
 import numpy as np
 import os
+import signal
+import threading
+import time
 from perception.detector import Detector
 from utilites.camera import Camera
-from utilites.map import load_calibration, pixel_to_robot
+from utilites.map import load_calibration, load_table, pixel_to_robot
 from robot.main import DobotController
+from robot.daemon import RobotClient, SERVICE_PORT
+from robot.speed_profiles import PRESETS
+from robot.kinematics import check_drop_locations, precheck_targets
+from robot.sorting import load_bins, plan_sort
+from utilites.history import FrameStore, HistoryWriter
+from utilites.clock import now
+from utilites.metrics import DETECTION_LATENCY, write_file as write_metrics
+from utilites.trace import enable as enable_tracing, span
 from utilites.camera import Camera
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(BASE_DIR, "outputs")
+FRAMES_DIR = os.path.join(OUTPUT_DIR, "frames")
+# Heights visited at every target (DobotController pick_z and safe_z)
+TARGET_HEIGHTS = (-165.0, -75.0)
+# Heights visited at every drop point (DobotController place_z and safe_z)
+DROP_HEIGHTS = (-125.0, -75.0)
 
 def main():
     #CLI argument parsing
     parser = argparse.ArgumentParser(description="Dobot MG400 Object Detection and Pick-and-Place")
-    parser.add_argument("--mode", choices=["plan", "execute"], required=True, help="Mode to run: 'plan' to detect and plan, 'execute' to run the robot")
+    parser.add_argument("--mode", choices=["plan", "execute", "run"], required=True, help="Mode to run: 'plan' to detect and plan, 'execute' to run the robot, 'run' to capture/pick in a loop until the workspace is empty")
     parser.add_argument("--color", type=str, default="any", help="Color to detect: 'red', 'green', 'blue', or 'any'")
     parser.add_argument("--shape", type=str, default="any", help="Shape to detect: 'circle', 'square', or 'any'")
     parser.add_argument("--input", type=str, default=None, help="Path to an input image file to process instead of using the camera")
+    parser.add_argument("--camera", type=int, default=1, help="Camera index (run mode)")
+    parser.add_argument("--empty-frames", type=int, default=2, help="Run mode stops after this many consecutive frames without targets")
+    parser.add_argument("--show-mask", action="store_true", help="Show the threshold mask for --color any and wait for a key (plan/execute only)")
+    parser.add_argument("--speed-preset", choices=sorted(PRESETS), default=None, help="Per-phase speed/acceleration preset (default: global 50%% for every move)")
+    parser.add_argument("--unreachable", choices=["reject", "clamp"], default="reject", help="What to do with targets outside the MG400 envelope: skip them, or clamp ones within 20 mm onto the envelope")
+    parser.add_argument("--queued-io", action="store_true", help="Switch suction/blow-off with queued MovLIO triggers instead of DO + 1 s sleeps (blow-off then lasts for the first 40%% of the retract move)")
+    parser.add_argument("--table", type=float, nargs=4, default=None, metavar=("X_MIN", "X_MAX", "Y_MIN", "Y_MAX"), help="Table area in robot coordinates; detections outside it are not picked (default: \"table\" from the calibration file)")
+    parser.add_argument("--grasp-sensor-di", type=int, default=None, help="DI wired to the vacuum switch; checks each grasp after the lift and re-picks or skips misses (needs --queued-io)")
+    parser.add_argument("--bins", type=str, default=None, help="JSON file with sorting bins per color/shape (see robot/sorting.py); each part goes to its nearest matching bin")
+    parser.add_argument("--trace", type=str, default=None, help="Write a Chrome/Perfetto trace of the pipeline stages to this JSON file (or set DOBOT_TRACE)")
+    parser.add_argument("--history", type=str, default=None, help="Record detections and pick outcomes in this SQLite database (e.g. outputs/history.db); frames are kept in outputs/frames")
+    parser.add_argument("--max-frames", type=int, default=2000, help="Frames kept in outputs/frames for --history; the oldest are deleted")
+    parser.add_argument("--metrics-file", type=str, default=None, help="Write Prometheus text-format metrics to this file when done")
+    parser.add_argument("--service", action="store_true", help="Send picks to the running robot service (python -m robot.daemon) instead of connecting directly")
+    parser.add_argument("--service-port", type=int, default=SERVICE_PORT, help="Port of the robot service")
     args = parser.parse_args()
+    if args.service:
+        # the service's DobotController was configured when the daemon started
+        robot_options = [flag for flag, value in (("--speed-preset", args.speed_preset), ("--queued-io", args.queued_io),
+                                                  ("--grasp-sensor-di", args.grasp_sensor_di)) if value not in (None, False)]
+        if robot_options:
+            parser.error(f"{', '.join(robot_options)} cannot be used with --service, pass them to python -m robot.daemon")
+    if args.trace:
+        enable_tracing(args.trace)
 
 
     try:
         H = load_calibration("callibration.json")
         print(f"Loaded homography matrix H:\n{H}")
+        table = tuple(args.table) if args.table else load_table("callibration.json")
+        if table is not None:
+            print(f"Table area: X {table[0]:.0f}..{table[1]:.0f}, Y {table[2]:.0f}..{table[3]:.0f}")
     except Exception as e:
         print(f"Error loading calibration: {e}")
         return
-    
-    
-    
-    if args.input:
-        if not os.path.exists(args.input):
-            print(f"Input image not found: {args.input}")
-            return None
-        image = cv2.imread(args.input)
-        if image is None:
-            print(f"Failed to read input image: {args.input}")
-            return None
-    else:
-        image_path = os.path.join(OUTPUT_DIR, "last_capture_image.jpg")
-        if not os.path.exists(image_path):
-            print(f"Fallback image not found: {image_path}")
-            return None
-        image = cv2.imread(image_path)
-        if image is None:
-            print(f"Failed to read fallback image: {image_path}")
+
+    bins = None
+    if args.bins:
+        try:
+            bins = load_bins(args.bins)
+            print(f"Sorting into {len(bins)} bins: {', '.join(b.name for b in bins)}")
+        except Exception as e:
+            print(f"Error loading bins: {e}")
+            return
+        unreachable = check_drop_locations([b.location for b in bins], DROP_HEIGHTS)
+        for index, (x, y), reasons in unreachable:
+            print(f"Bin {bins[index].name} at ({x:.1f}, {y:.1f}) is out of reach: {', '.join(reasons)}")
+        if unreachable:
+            return
+
+    history = HistoryWriter(args.history) if args.history else None
+    frames = FrameStore(FRAMES_DIR, max_frames=args.max_frames) if history is not None else None
+
+    def save_frame(img):
+        # every recorded detection and pick points at the frame it came from
+        if frames is None:
             return None
+        frame_path = frames.new_path()
+        with span("image.write"):
+            cv2.imwrite(frame_path, img)
+        return frame_path
 
-    def detection_and_process(img):
+    detector = Detector(show_mask=args.show_mask and args.mode != "run")
+
+    def plan_targets(img, show=True):
         display_img = img.copy()
-        detector = Detector()
-        detected_objects = detector.find_objects(display_img, args.color, args.shape)
+        with span("detect"):
+            if bins is not None and args.color == "any":
+                # sorting needs the real color of every part, so detect each color separately
+                detected_objects = [obj for color in detector.colors for obj in detector.find_objects(display_img, color, args.shape)]
+            else:
+                detected_objects = detector.find_objects(display_img, args.color, args.shape)
+        # frames without detections (e.g. the empty-workspace checks) are not kept
+        frame_path = save_frame(img) if detected_objects else None
 
         target_positions = []
+        target_classes = []
         print(f"\n({args.mode.upper()} MODE)")
 
         if not detected_objects:
@@ -64,45 +121,225 @@ def main():
             shape_type = obj["Shape"]
 
             #coordinates transformation
-            rx, ry = pixel_to_robot(u, v, H)
+            with span("map"):
+                rx, ry = pixel_to_robot(u, v, H)
             target_positions.append((rx, ry))
+            target_classes.append((obj.get("color", "unknown"), shape_type))
 
             #annotation
-            cv2.circle(display_img, (u, v), 6, (0, 0, 255), 2)
-            text = f"{shape_type} (X:{rx:.1f}, Y:{ry:.1f})"
-            cv2.putText(display_img, text, (u + 10, v - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+            with span("annotate"):
+                cv2.circle(display_img, (u, v), 6, (0, 0, 255), 2)
+                text = f"{shape_type} (X:{rx:.1f}, Y:{ry:.1f})"
+                cv2.putText(display_img, text, (u + 10, v - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
 
 
             print(f"Detected {shape_type} at pixel coordinates ({u}, {v}) -> Robot ccordinates (X: {rx:.1f}, Y: {ry:.1f})")
 
 
+        detected_positions = list(target_positions)
+
+        # check the whole batch against the MG400 envelope before anything is sent
+        with span("precheck", targets=len(target_positions)):
+            target_positions, rejected = precheck_targets(target_positions, TARGET_HEIGHTS, mode=args.unreachable, table=table)
+        skipped = {index: ", ".join(reasons) for index, _, reasons in rejected}
+        kept = [i for i in range(len(target_classes)) if i not in skipped]
+        if rejected:
+            print(f"{len(rejected)} target(s) outside the robot envelope will not be picked.")
+            target_classes = [c for i, c in enumerate(target_classes) if i not in skipped]
+        target_kinds = [f"{color} {shape}" for color, shape in target_classes]
+        precheck_positions = list(target_positions)
+        drop_locations = None
+
+        # sorting: plan pick order and bin per part together to keep the arm travel short
+        if bins is not None:
+            plan = plan_sort([(x, y, color, shape) for (x, y), (color, shape) in zip(target_positions, target_classes)], bins)
+            target_positions, target_kinds, drop_locations = plan.targets, plan.kinds, plan.drop_locations
+            for x, y, kind, b in plan.picks:
+                print(f"  {kind} at ({x:.1f}, {y:.1f}) -> {b.name}")
+            print(f"Planned travel: {plan.travel_mm:.0f} mm, {len(plan.unsorted)} part(s) without a bin")
+            for x, y, _ in plan.unsorted:
+                index = next((i for i, p in zip(kept, precheck_positions) if tuple(p) == (x, y)), None)
+                if index is not None:
+                    skipped[index] = "no matching bin"
+
+        if history is not None:
+            for i, obj in enumerate(detected_objects):
+                history.record_detection(obj.get("color"), obj["Shape"], obj["pixel_center"], detected_positions[i],
+                                         target=i not in skipped, reason=skipped.get(i), frame=frame_path)
+
         #save annotated image
         os.makedirs(OUTPUT_DIR, exist_ok=True)
         annotated_path = os.path.join(OUTPUT_DIR, "final_annotated_image.jpg")
-        cv2.imwrite(annotated_path, display_img)
+        with span("image.write"):
+            cv2.imwrite(annotated_path, display_img)
         print(f"Annotated image saved to {annotated_path}")
 
         # display annotated image to the user
-        try:
-            cv2.imshow("Annotated Detections", display_img)
-            print("Press any key in the image window to continue...")
-            cv2.waitKey(0)
-            cv2.destroyAllWindows()
-        except Exception as e:
-            print(f"Unable to display image window: {e}")
-            pass
+        if show:
+            try:
+                cv2.imshow("Annotated Detections", display_img)
+                print("Press any key in the image window to continue...")
+                cv2.waitKey(0)
+                cv2.destroyAllWindows()
+            except Exception as e:
+                print(f"Unable to display image window: {e}")
+                pass
+
+        return detected_objects, display_img, target_positions, target_kinds, drop_locations, frame_path
+
+    def detection_and_process(img):
+        detected_objects, display_img, target_positions, target_kinds, drop_locations, frame_path = plan_targets(img)
 
         #Execute robot commands if in execute mode
-        if args.mode == "execute" and target_positions:
-            robot = DobotController()
-            for x, y in target_positions:
-                robot.pick_and_place(x, y)
+        if args.mode == "execute" and target_positions and args.service:
+            client = RobotClient(port=args.service_port)
+            job = client.pick(target_positions, label="main.py", kinds=target_kinds, drop_locations=drop_locations)
+            print(f"Queued job {job['id']} on robot service, waiting...")
+            try:
+                job = client.wait(job["id"])
+            except KeyboardInterrupt:
+                # don't leave the batch running on the service
+                print("Interrupted, cancelling the job after its current pick...")
+                job = client.wait(client.cancel(job["id"])["id"])
+            print(f"Job {job['id']} {job['status']}: {job['completed']}/{job['total']} picked in {job['elapsed_s']:.1f}s")
+            client.close()
+        elif args.mode == "execute" and target_positions:
+            robot = DobotController(speed_preset=args.speed_preset, queued_io=args.queued_io, grasp_sensor_di=args.grasp_sensor_di, history=history)
+            drops = drop_locations or [None] * len(target_positions)
+            for (x, y), kind, drop in zip(target_positions, target_kinds, drops):
+                with span("pick_and_place", cat="robot", kind=kind):
+                    robot.pick_and_place(x, y, kind=kind, drop_location=drop, frame=frame_path)
+            for kind, stats in robot.grasp_stats.rates().items():
+                print(f"Grasp {kind}: {stats['picked']}/{stats['parts']} picked ({stats['success_rate']:.0%}), "
+                      f"{stats['first_try_rate']:.0%} on the first try")
             robot.disconnect()
         elif args.mode == "execute":
             print("No target.")
 
         return detected_objects, display_img
 
+
+    def run_loop():
+        # Ctrl+C / SIGTERM finish the current pick, then the loop stops and everything is closed
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            print("Stop requested, finishing the current pick...")
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        # camera and robot stay connected for the whole run
+        camera = Camera(index=args.camera, persistent=True)
+        client = robot = None
+
+        vision_s = 0.0  # capture + detection: the arm waits on vision
+        motion_s = 0.0  # pick cycles: vision waits on the arm
+        cycles = placed = attempted = empty = fruitless = 0
+        started = time.monotonic()
+        try:
+            if args.service:
+                client = RobotClient(port=args.service_port)
+            else:
+                robot = DobotController(speed_preset=args.speed_preset, queued_io=args.queued_io, grasp_sensor_di=args.grasp_sensor_di, history=history)
+            # throughput counts from the first capture, not from connecting
+            started = time.monotonic()
+            while not stop.is_set():
+                t = time.monotonic()
+                frame = camera.capture_image()
+                if frame is None:
+                    break
+                _, _, target_positions, target_kinds, drop_locations, frame_path = plan_targets(frame, show=False)
+                vision_s += time.monotonic() - t
+                if camera.last_capture_time is not None:
+                    DETECTION_LATENCY.observe(now() - camera.last_capture_time)
+                cycles += 1
+
+                # every batch is followed by a fresh capture, so the workspace is re-verified before stopping
+                if not target_positions:
+                    empty += 1
+                    if empty >= args.empty_frames:
+                        print("Workspace empty.")
+                        break
+                    continue
+                empty = 0
+
+                t = time.monotonic()
+                if client is not None:
+                    job = client.pick(target_positions, label="main.py run", kinds=target_kinds, drop_locations=drop_locations)
+                    # Ctrl+C cancels the remote job after its current pick instead of waiting for the batch
+                    job = client.wait(job["id"], stop=stop)
+                    done, tried = job["completed"] - job["missed"], job["completed"]
+                else:
+                    done = tried = 0
+                    drops = drop_locations or [None] * len(target_positions)
+                    for (x, y), kind, drop in zip(target_positions, target_kinds, drops):
+                        if stop.is_set():
+                            break
+                        with span("pick_and_place", cat="robot", kind=kind):
+                            held = robot.pick_and_place(x, y, kind=kind, drop_location=drop, frame=frame_path)
+                        tried += 1
+                        done += 1 if held else 0
+                motion_s += time.monotonic() - t
+                placed += done
+                attempted += tried
+
+                elapsed = time.monotonic() - started
+                print(f"Cycle {cycles}: {done}/{len(target_positions)} placed, {placed} total, {placed * 60.0 / elapsed:.1f} picks/min")
+                # parts that keep failing would otherwise be retried forever
+                fruitless = 0 if done else fruitless + 1
+                if fruitless >= 3:
+                    print("Nothing placed in the last 3 cycles, stopping.")
+                    break
+        finally:
+            elapsed = time.monotonic() - started
+            print(f"\nRun finished after {elapsed:.1f}s and {cycles} cycle(s): {placed}/{attempted} placed, "
+                  f"{placed * 60.0 / max(elapsed, 1e-9):.1f} picks/min")
+            print(f"Waiting on vision: {vision_s:.1f}s ({vision_s / max(elapsed, 1e-9):.0%}, capture + detection, "
+                  f"including the captures that confirmed an empty workspace)")
+            print(f"Waiting on motion: {motion_s:.1f}s ({motion_s / max(elapsed, 1e-9):.0%})")
+            camera.close()
+            if client is not None:
+                client.close()
+            if robot is not None:
+                for kind, stats in robot.grasp_stats.rates().items():
+                    print(f"Grasp {kind}: {stats['picked']}/{stats['parts']} picked ({stats['success_rate']:.0%}), "
+                          f"{stats['first_try_rate']:.0%} on the first try")
+                robot.disconnect()
+
+    def finish():
+        if history is not None:
+            history.close()
+            print(f"History: {history.written} row(s) written to {args.history}")
+        if args.metrics_file:
+            print(f"Metrics written to {write_metrics(args.metrics_file)}")
+
+    if args.mode == "run":
+        run_loop()
+        finish()
+        return None
+
+    if args.input:
+        if not os.path.exists(args.input):
+            print(f"Input image not found: {args.input}")
+            return None
+        with span("image.read"):
+            image = cv2.imread(args.input)
+        if image is None:
+            print(f"Failed to read input image: {args.input}")
+            return None
+    else:
+        image_path = os.path.join(OUTPUT_DIR, "last_capture_image.jpg")
+        if not os.path.exists(image_path):
+            print(f"Fallback image not found: {image_path}")
+            return None
+        with span("image.read"):
+            image = cv2.imread(image_path)
+        if image is None:
+            print(f"Failed to read fallback image: {image_path}")
+            return None
+
     # if camera failed entirely, exit (do not use fallback image)
     if image is None:
         print("Failed to capture image from camera. Exiting.")
@@ -110,6 +347,7 @@ def main():
 
     # run detection on camera image and return (do not fallback on empty detections)
     detected_objects, annotated = detection_and_process(image)
+    finish()
     return annotated
 
 if __name__ == "__main__":
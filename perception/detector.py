@@ -1,9 +1,16 @@
+import time
+
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
 
+from utilites.metrics import DETECTION, OBJECTS_PER_FRAME
+from utilites.trace import span
+
 class Detector:
-    def __init__(self):
+    def __init__(self, show_mask=False):
+        # show_mask: block on a window with the threshold mask for color "any" (interactive debugging only)
+        self.show_mask = show_mask
 
         self.colors = {
             #make red color brighter by increasing the lower bound of saturation and value
@@ -14,59 +21,68 @@ class Detector:
         }
 
     def find_objects(self, image, color_name="any", shape_type="any"):
+        started = time.perf_counter()
         #convert the image to HSV
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        with span("detect.hsv"):
+            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
         
 
         #create a mask for the specified color
-        if color_name in self.colors:
-            lower, upper = self.colors[color_name]
-            mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
-        else:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            _, mask = cv2.threshold(gray, 125, 255, cv2.THRESH_BINARY_INV)
+        with span("detect.mask", color=color_name):
+            if color_name in self.colors:
+                lower, upper = self.colors[color_name]
+                mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
+            else:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                _, mask = cv2.threshold(gray, 125, 255, cv2.THRESH_BINARY_INV)
+        if self.show_mask and color_name not in self.colors:
             cv2.imshow("Initial Mask", mask)
             cv2.waitKey(0)
 
 
         #morphology using 3 X 3 kernel
 
-        kernel = np.ones((3, 3), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        with span("detect.morphology"):
+            kernel = np.ones((3, 3), np.uint8)
+            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
 
         #find contours
-        contours , _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        with span("detect.contours"):
+            contours , _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
         detected_objects = []
-        for count in contours:
-            area = cv2.contourArea(count)
-            if area < 500:
-                continue
-
-            # circularity
-            perimeter = cv2.arcLength(count, True)
-            if perimeter > 0:
-                circularity = (4 * np.pi * area ) / (perimeter ** 2)
-            else:
-                circularity = 0
-            detected_shape = "circle" if circularity > 0.8 else "square"
-            print(f"circularity: {circularity:.3f}")
+        with span("detect.shapes", contours=len(contours)):
+            for count in contours:
+                area = cv2.contourArea(count)
+                if area < 500:
+                    continue
+
+                # circularity
+                perimeter = cv2.arcLength(count, True)
+                if perimeter > 0:
+                    circularity = (4 * np.pi * area ) / (perimeter ** 2)
+                else:
+                    circularity = 0
+                detected_shape = "circle" if circularity > 0.8 else "square"
+                print(f"circularity: {circularity:.3f}")
 
             
 
-            if shape_type != "any" and detected_shape != shape_type:
-                continue
+                if shape_type != "any" and detected_shape != shape_type:
+                    continue
             
             
             
-            #
-            M = cv2.moments(count)
-            if M["m00"] != 0:
-                u = int(M["m10"] / M["m00"])
-                v = int(M["m01"] / M["m00"])
-                detected_objects.append({"pixel_center": (u, v), "Shape": detected_shape,  "color": color_name})
+                #
+                M = cv2.moments(count)
+                if M["m00"] != 0:
+                    u = int(M["m10"] / M["m00"])
+                    v = int(M["m01"] / M["m00"])
+                    detected_objects.append({"pixel_center": (u, v), "Shape": detected_shape,  "color": color_name})
 
 
+        DETECTION.observe(time.perf_counter() - started)
+        OBJECTS_PER_FRAME.observe(len(detected_objects))
         return detected_objects
 
 
@@ -0,0 +1,149 @@
+"""
+Object tracking on a moving belt
+
+Detections from consecutive frames (already converted to robot coordinates)
+are associated with persistent tracks. Every track is predicted forward with
+the belt velocity before matching, so a part that moved 30 mm between frames
+keeps its ID. The belt velocity is estimated from all matched tracks
+together (median, then smoothed), since every part on the belt moves the
+same way.
+"""
+
+import itertools
+import threading
+
+import numpy as np
+
+
+class Track:
+    """One part followed across frames; positions are (time, x, y) in robot coordinates"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, t, x, y, kind=None):
+        self.id = next(Track._ids)
+        self.kind = kind
+        self.history = [(t, x, y)]
+        self.hits = 1
+        self.picked = False
+
+    @property
+    def last_seen(self):
+        return self.history[-1][0]
+
+    @property
+    def position(self):
+        return self.history[-1][1], self.history[-1][2]
+
+    def velocity(self):
+        """Own velocity from the first and last observation, None with a single observation"""
+        if len(self.history) < 2:
+            return None
+        t0, x0, y0 = self.history[0]
+        t1, x1, y1 = self.history[-1]
+        if t1 - t0 <= 0:
+            return None
+        return (x1 - x0) / (t1 - t0), (y1 - y0) / (t1 - t0)
+
+    def predict(self, t, belt_velocity):
+        """Position at time t, moving with the belt from the last observation"""
+        t0, x0, y0 = self.history[-1]
+        vx, vy = belt_velocity
+        return x0 + vx * (t - t0), y0 + vy * (t - t0)
+
+    def __repr__(self):
+        return f"Track(#{self.id}, {self.kind!r}, pos={self.position}, hits={self.hits})"
+
+
+class ObjectTracker:
+    """
+    Args:
+        max_match_mm: largest distance between prediction and detection that is still the same part
+        max_age_s: tracks not seen for this long are dropped
+        min_hits: observations before a track is reported as confirmed
+        velocity_smoothing: weight of the newest belt velocity estimate (0..1)
+        history: observations kept per track
+    """
+
+    def __init__(self, max_match_mm=30.0, max_age_s=1.0, min_hits=2, velocity_smoothing=0.3, history=20):
+        self.max_match_mm = max_match_mm
+        self.max_age_s = max_age_s
+        self.min_hits = min_hits
+        self.velocity_smoothing = velocity_smoothing
+        self.history = history
+        self.tracks = []
+        self.belt_velocity = (0.0, 0.0)
+        self.belt_velocity_known = False
+        # update() runs on the camera loop while the picker reads tracks from its own thread
+        self._lock = threading.Lock()
+
+    def update(self, t, detections):
+        """
+        Associate one frame of detections with the tracks
+
+        Args:
+            t: capture time of the frame (monotonic seconds)
+            detections: list of (x, y, kind) in robot coordinates
+
+        Returns:
+            list: confirmed tracks after the update
+        """
+        with self._lock:
+            self._update(t, detections)
+        return self.confirmed()
+
+    def _update(self, t, detections):
+        live = [track for track in self.tracks if t - track.last_seen <= self.max_age_s]
+        matched = set()
+        velocities = []
+
+        if live and detections:
+            predicted = np.array([track.predict(t, self.belt_velocity) for track in live])
+            observed = np.array([(x, y) for x, y, _ in detections], dtype=np.float64)
+            distance = np.linalg.norm(predicted[:, None, :] - observed[None, :, :], axis=2)
+            # Different kinds never match
+            for i, track in enumerate(live):
+                for j, (_, _, kind) in enumerate(detections):
+                    if track.kind is not None and kind is not None and track.kind != kind:
+                        distance[i, j] = np.inf
+
+            # Greedy assignment, closest pairs first
+            used_tracks = set()
+            for flat in np.argsort(distance, axis=None):
+                i, j = np.unravel_index(flat, distance.shape)
+                if distance[i, j] > self.max_match_mm:
+                    break
+                if i in used_tracks or j in matched:
+                    continue
+                used_tracks.add(i)
+                matched.add(j)
+                track = live[i]
+                t0, x0, y0 = track.history[-1]
+                x, y, _ = detections[j]
+                if t > t0:
+                    velocities.append(((x - x0) / (t - t0), (y - y0) / (t - t0)))
+                track.history.append((t, float(x), float(y)))
+                del track.history[:-self.history]
+                track.hits += 1
+
+        for j, (x, y, kind) in enumerate(detections):
+            if j not in matched:
+                live.append(Track(t, float(x), float(y), kind))
+
+        if velocities:
+            estimate = np.median(np.array(velocities), axis=0)
+            if self.belt_velocity_known:
+                a = self.velocity_smoothing
+                estimate = (1 - a) * np.array(self.belt_velocity) + a * estimate
+            self.belt_velocity = (float(estimate[0]), float(estimate[1]))
+            self.belt_velocity_known = True
+
+        self.tracks = live
+
+    def confirmed(self):
+        with self._lock:
+            return [track for track in self.tracks if track.hits >= self.min_hits and not track.picked]
+
+    def belt_speed(self):
+        """Belt speed in mm/s"""
+        return float(np.hypot(*self.belt_velocity))
@@ -0,0 +1,229 @@
+"""
+asyncio clients for the Dobot dashboard, move and feed channels
+
+AsyncDashboard and AsyncMove expose the same command surface as
+DobotApiDashboard and DobotApiMove: every command method returns a coroutine
+resolving to the reply string. AsyncFeed is an async iterator of decoded
+MyType frames. Vision, UI and several robots can then share one event loop
+without a thread per socket.
+
+    dashboard = await AsyncDashboard.connect("192.168.1.6")
+    await dashboard.EnableRobot()
+    move = await AsyncMove.connect("192.168.1.6")
+    await move.MovJ(300, 0, -75, 0)
+    async with await AsyncFeed.connect("192.168.1.6") as feed:
+        async for frame in feed:
+            print(frame["tool_vector_actual"][0])
+"""
+
+import asyncio
+
+import numpy as np
+
+from robot.dobot_api import DobotApiDashboard, DobotApiMove, MyType
+
+DASHBOARD_PORT = 29999
+MOVE_PORT = 30003
+FEED_PORT = 30004
+FEED_TEST_VALUE = 0x123456789abcdef
+
+
+class _AsyncChannel:
+    """
+    asyncio transport replacing the blocking socket of DobotApi
+
+    The command methods of DobotApiDashboard/DobotApiMove all end with
+    `return self.sendRecvMsg(string)`; here sendRecvMsg is a coroutine, so the
+    inherited methods return awaitables without being rewritten.
+    """
+
+    def __init__(self, ip, port, reader, writer):
+        self.ip = ip
+        self.port = port
+        self.text_log = None
+        self.socket_dobot = 0
+        self._reader = reader
+        self._writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, ip, port=None, timeout_s=5.0):
+        port = port or cls.DEFAULT_PORT
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout_s)
+        except asyncio.TimeoutError as e:
+            raise TimeoutError(f"Timeout connecting to {ip}:{port} after {timeout_s}s") from e
+        return cls(ip, port, reader, writer)
+
+    def log(self, text):
+        print(text)
+
+    async def send_data(self, string):
+        self.log(f"Send to {self.ip}:{self.port}: {string}")
+        self._writer.write(string.encode("utf-8"))
+        await self._writer.drain()
+
+    async def wait_reply(self):
+        """Read one ';'-terminated reply"""
+        data = await self._reader.readuntil(b";")
+        data_str = data.decode("utf-8")
+        self.log(f"Receive from {self.ip}:{self.port}: {data_str}")
+        return data_str
+
+    async def sendRecvMsg(self, string):
+        async with self._lock:
+            await self.send_data(string)
+            return await self.wait_reply()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def aclose(self):
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close()
+            await writer.wait_closed()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def __del__(self):
+        pass
+
+
+class AsyncDashboard(_AsyncChannel, DobotApiDashboard):
+    """Dashboard commands (port 29999) as coroutines"""
+
+    DEFAULT_PORT = DASHBOARD_PORT
+
+    async def DOGroup(self, *dynParams):
+        string = "DOGroup(" + ",".join(str(p) for p in dynParams) + ")"
+        return await self.sendRecvMsg(string)
+
+
+class AsyncMove(_AsyncChannel, DobotApiMove):
+    """Motion commands (port 30003) as coroutines"""
+
+    DEFAULT_PORT = MOVE_PORT
+
+
+class AsyncFeed:
+    """
+    Async iterator over decoded feedback frames (port 30004)
+
+    Each item is a length-1 MyType structured array; frames failing the
+    test_value check are skipped.
+    """
+
+    DEFAULT_PORT = FEED_PORT
+
+    def __init__(self, ip, port, reader, writer):
+        self.ip = ip
+        self.port = port
+        self._reader = reader
+        self._writer = writer
+
+    connect = classmethod(_AsyncChannel.connect.__func__)
+
+    async def read_frame(self):
+        while True:
+            data = await self._reader.readexactly(MyType.itemsize)
+            feedInfo = np.frombuffer(data, dtype=MyType)
+            if int(feedInfo["test_value"][0]) == FEED_TEST_VALUE:
+                return feedInfo
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.read_frame()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            raise StopAsyncIteration
+
+    close = _AsyncChannel.close
+    aclose = _AsyncChannel.aclose
+    __aenter__ = _AsyncChannel.__aenter__
+    __aexit__ = _AsyncChannel.__aexit__
+
+
+class AsyncDobotController:
+    """
+    Coroutine counterpart of robot.main.DobotController
+
+    Use `await AsyncDobotController.create(ip)`; the feed is consumed by a
+    task on the same event loop.
+    """
+
+    def __init__(self, ip):
+        self.ip = ip
+        self.safe_z = -75.0
+        self.pick_z = -165.0
+        self.place_z = -125.0
+        self.safe_r = 0
+        self.drop_location = [400, -125, -75]
+        self.dashboard = None
+        self.move = None
+        self.feed = None
+        self.current_actual = None
+        self.queue_running = None
+        self._feed_task = None
+
+    @classmethod
+    async def create(cls, ip="192.168.1.6", speed_ratio=50, acc_ratio=50, payload_weight=50):
+        self = cls(ip)
+        self.dashboard, self.move, self.feed = await asyncio.gather(
+            AsyncDashboard.connect(ip), AsyncMove.connect(ip), AsyncFeed.connect(ip)
+        )
+        self._feed_task = asyncio.ensure_future(self._consume_feed())
+
+        await self.dashboard.ClearError()
+        await self.dashboard.EnableRobot()
+        await asyncio.sleep(2)
+        await self.dashboard.SpeedJ(speed_ratio)
+        await self.dashboard.SpeedL(speed_ratio)
+        await self.dashboard.AccJ(acc_ratio)
+        await self.dashboard.AccL(acc_ratio)
+        await self.dashboard.PayLoad(payload_weight, 0)
+        return self
+
+    async def _consume_feed(self):
+        async for frame in self.feed:
+            self.current_actual = frame["tool_vector_actual"][0]
+            self.queue_running = int(frame["isRunQueuedCmd"][0][0])
+
+    async def pick_and_place(self, target_x, target_y):
+        print(f"Starting pick and place at ({target_x:.1f}, {target_y:.1f})")
+        px, py, pz = self.drop_location
+
+        await self.move.MovJ(target_x, target_y, self.safe_z, self.safe_r)
+        await self.move.MovL(target_x, target_y, self.pick_z, self.safe_r)
+        await self.move.Sync()
+        await self.dashboard.DO(1, 1)
+        await asyncio.sleep(1)
+
+        await self.move.MovL(target_x, target_y, self.safe_z, self.safe_r)
+        await self.move.MovJ(px, py, self.safe_z, self.safe_r)
+        await self.move.MovL(px, py, self.place_z, self.safe_r)
+        await self.move.Sync()
+
+        await self.dashboard.DO(1, 0)
+        await self.dashboard.DO(2, 1)
+        await asyncio.sleep(1)
+        await self.dashboard.DO(2, 0)
+        await asyncio.sleep(1)
+        print("Pick and place operation completed.....")
+
+    async def disconnect(self):
+        if self._feed_task is not None:
+            self._feed_task.cancel()
+        try:
+            await self.dashboard.DisableRobot()
+        except Exception:
+            pass
+        await asyncio.gather(self.dashboard.aclose(), self.move.aclose(), self.feed.aclose(), return_exceptions=True)
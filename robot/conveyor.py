@@ -0,0 +1,283 @@
+"""
+Conveyor tracking pick mode
+
+Parts on a moving belt are followed by perception/tracker.py; ConveyorPicker
+sends the arm to where a part will be when the gripper arrives instead of
+where it was seen. The arrival time adds up:
+
+    capture time of the last observation
+    + time already spent until now (detection, queueing)
+    + motion start delay (command sent -> arm moving, measured)
+    + transfer and descent time (from robot/motion_model.py)
+
+and is solved by fixed-point iteration, since the transfer time depends on
+the intercept point. The pick window is the time range during which the
+predicted position stays inside the reachable envelope (and the optional
+belt section); parts whose window closes before the gripper can arrive are
+left.
+
+Run from the project root:
+    python -m robot.conveyor --ip 192.168.1.6 --camera 1 --color red
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from robot.dobot_controller import GetCurrentPosition, GetRunningStatus
+from robot.kinematics import check_targets
+from robot.motion_model import MotionModel
+from utilites.metrics import DETECTION_LATENCY, start_http_server
+
+
+class ConveyorPicker:
+    """
+    Picks tracked parts from a moving belt
+
+    Args:
+        robot: DobotController
+        tracker: ObjectTracker fed with robot-coordinate detections
+        model: MotionModel used for the arrival time (default: MotionModel.for_robot(robot))
+        motion_delay_s: command-to-motion delay, see measure_motion_delay()
+        table: optional (x_min, x_max, y_min, y_max) belt section the arm may pick from
+        margin_s: required slack between arrival and the end of the pick window
+    """
+
+    def __init__(self, robot, tracker, model=None, motion_delay_s=0.05, table=None, margin_s=0.2):
+        self.robot = robot
+        self.tracker = tracker
+        self.model = model or MotionModel.for_robot(robot)
+        self.motion_delay_s = motion_delay_s
+        self.table = table
+        self.margin_s = margin_s
+        self.detection_latency_s = None
+        self.picked = 0
+        self.missed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record_detection_latency(self, frame_time, now=None):
+        """Smoothed capture-to-tracker latency, reported in status and logs"""
+        latency = (now if now is not None else time.monotonic()) - frame_time
+        DETECTION_LATENCY.observe(latency)
+        if self.detection_latency_s is None:
+            self.detection_latency_s = latency
+        else:
+            self.detection_latency_s = 0.8 * self.detection_latency_s + 0.2 * latency
+        return latency
+
+    def pick_window(self, track, now, horizon_s=10.0, step_s=0.02):
+        """
+        Time range in which the part is reachable
+
+        Returns:
+            tuple or None: (opens, closes) in monotonic seconds, None if never reachable within horizon_s
+        """
+        times = now + np.arange(0.0, horizon_s, step_s)
+        x0, y0 = track.predict(now, self.tracker.belt_velocity)
+        vx, vy = self.tracker.belt_velocity
+        points = np.stack([x0 + vx * (times - now), y0 + vy * (times - now)], axis=1)
+        ok, _ = check_targets(points, (self.robot.pick_z, self.robot.safe_z), table=self.table)
+        if not ok.any():
+            return None
+        first = int(np.argmax(ok))
+        # End of the first contiguous reachable run
+        after = np.flatnonzero(~ok[first:])
+        last = first + (after[0] - 1 if after.size else len(ok) - first - 1)
+        return float(times[first]), float(times[last])
+
+    def plan_intercept(self, track, pose, now=None, iterations=5):
+        """
+        Where and when the gripper meets the part
+
+        Args:
+            track: Track to pick
+            pose: current [x, y, z, r] of the tool
+
+        Returns:
+            tuple or None: (x, y, arrival time, time to send the move) or None if the part
+            is out of its window by then
+        """
+        now = now if now is not None else time.monotonic()
+        window = self.pick_window(track, now)
+        if window is None:
+            return None
+        opens, closes = window
+
+        robot = self.robot
+        profiles = robot.speed_profiles
+        transfer = self.model.phase_ratios(profiles, "transfer", "J")
+        approach = self.model.phase_ratios(profiles, "approach", "L")
+        start = now + self.motion_delay_s
+
+        arrival = max(start, opens)
+        travel = 0.0
+        for _ in range(iterations):
+            x, y = track.predict(arrival, self.tracker.belt_velocity)
+            hover = [x, y, robot.safe_z, robot.safe_r]
+            # the legacy blocking sequence settles at the hover point before descending
+            travel = self.model.segment_time(pose, hover, "J", *transfer) + self.model.settle_time()
+            travel += self.model.segment_time(hover, [x, y, robot.pick_z, robot.safe_r], "L", *approach)
+            # A part that is not reachable yet is met when its window opens
+            arrival = max(start + travel, opens)
+
+        if arrival + self.margin_s > closes:
+            return None
+        x, y = track.predict(arrival, self.tracker.belt_velocity)
+        return x, y, arrival, arrival - travel - self.motion_delay_s
+
+    def pick_next(self):
+        """
+        Pick the most urgent reachable part (the one whose window closes first)
+
+        Returns:
+            bool: True if a pick was made
+        """
+        pose = GetCurrentPosition()
+        if pose is None:
+            return False
+        pose = [float(v) for v in np.ravel(pose)[:4]]
+        now = time.monotonic()
+
+        best = None
+        for track in self.tracker.confirmed():
+            plan = self.plan_intercept(track, pose, now)
+            if plan is None:
+                continue
+            closes = self.pick_window(track, now)[1]
+            if best is None or closes < best[0]:
+                best = (closes, track, plan)
+        if best is None:
+            return False
+
+        _, track, (x, y, arrival, send_at) = best
+        track.picked = True
+        # Hold the move back so the gripper does not descend before the part is there
+        wait = send_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        print(f"Conveyor pick #{track.id} {track.kind or ''} at ({x:.1f}, {y:.1f}), "
+              f"arrival in {arrival - now:.2f}s, belt {self.tracker.belt_speed():.0f} mm/s")
+        held = self.robot.pick_and_place(x, y, kind=track.kind)
+        if held is False:
+            self.missed += 1
+        else:
+            self.picked += 1
+        return True
+
+    def start(self):
+        """Run pick_next() on a worker thread while the caller keeps updating the tracker"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=60.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.pick_next():
+                self._stop.wait(0.01)
+
+
+def measure_motion_delay(robot, runs=5, distance_mm=20.0, timeout=2.0):
+    """
+    Measure the delay between sending a MovJ and the feed reporting motion
+
+    Small back-and-forth moves at the current pose; the median is a good
+    motion_delay_s for ConveyorPicker.
+
+    Returns:
+        float or None: median delay in seconds, None if no run was confirmed
+    """
+    pose = [float(v) for v in np.ravel(GetCurrentPosition())[:4]]
+    delays = []
+    for i in range(runs):
+        target = list(pose)
+        target[1] += distance_mm if i % 2 == 0 else 0.0
+        sent = time.monotonic()
+        robot._move_j(target)
+        deadline = sent + timeout
+        while time.monotonic() < deadline:
+            running, frame_time = GetRunningStatus()
+            if running == 1 and frame_time is not None and frame_time >= sent:
+                delays.append(frame_time - sent)
+                break
+            time.sleep(0.001)
+        robot._wait_queue()
+    if not delays:
+        return None
+    return float(np.median(delays))
+
+
+def main():
+    import cv2
+
+    from perception.detector import Detector
+    from perception.tracker import ObjectTracker
+    from robot.main import DobotController
+    from utilites.camera import LiveCamera
+    from utilites.map import load_calibration, pixels_to_robot
+
+    parser = argparse.ArgumentParser(description="Pick parts from a moving conveyor")
+    parser.add_argument("--ip", default="192.168.1.6", help="Robot IP address")
+    parser.add_argument("--camera", type=int, default=1, help="Camera index")
+    parser.add_argument("--calibration", default="callibration.json", help="Homography calibration file")
+    parser.add_argument("--color", default="red", help="Color to pick: 'red', 'green' or 'blue'")
+    parser.add_argument("--shape", default="any", help="Shape to pick: 'circle', 'square' or 'any'")
+    parser.add_argument("--speed-preset", default=None, help="Per-phase speed/acceleration preset")
+    parser.add_argument("--queued-io", action="store_true", help="Switch suction/blow-off with queued MovLIO triggers instead of DO + 1 s sleeps")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Address the metrics server binds (0.0.0.0: all interfaces)")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        start_http_server(args.metrics_port, args.metrics_host)
+
+    H = load_calibration(args.calibration)
+    detector = Detector()
+    tracker = ObjectTracker()
+    camera = LiveCamera(index=args.camera)
+    robot = DobotController(ip=args.ip, speed_preset=args.speed_preset, queued_io=args.queued_io)
+    picker = ConveyorPicker(robot, tracker)
+
+    delay = measure_motion_delay(robot)
+    if delay is not None:
+        picker.motion_delay_s = delay
+        print(f"Motion start delay: {delay * 1000:.0f} ms")
+
+    camera.start()
+    picker.start()
+    last_id = 0
+    try:
+        while True:
+            frame, frame_id, frame_time = camera.latest_stamped_frame()
+            if frame is None or frame_id == last_id:
+                time.sleep(0.005)
+                continue
+            last_id = frame_id
+            objects = detector.find_objects(frame, args.color, args.shape)
+            detections = []
+            if objects:
+                points = pixels_to_robot([obj["pixel_center"] for obj in objects], H)
+                detections = [(x, y, f"{obj['color']} {obj['Shape']}") for (x, y), obj in zip(points, objects)]
+            tracker.update(frame_time, detections)
+            picker.record_detection_latency(frame_time)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        picker.stop()
+        camera.stop()
+        cv2.destroyAllWindows()
+        print(f"Picked {picker.picked}, missed {picker.missed}, "
+              f"detection latency {(picker.detection_latency_s or 0) * 1000:.0f} ms")
+        robot.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Persistent robot service
+
+Creating a DobotController opens three TCP connections, waits for the
+feedback thread and runs ClearError/EnableRobot with ~2.5 s of sleeps, then
+the robot is disabled again on exit. The daemon keeps one DobotController
+(and its PickJobRunner) alive; main.py and app.py send pick jobs to it over a
+local socket, so a job starts in milliseconds.
+
+Protocol: one JSON object per line in each direction.
+    {"cmd": "pick", "targets": [[x, y], ...], "drop_location": [x, y, z], "label": "...",
+     "kinds": ["red circle", ...], "drop_locations": [[x, y, z], ...]}
+    {"cmd": "job", "id": 3}           {"cmd": "jobs"}
+    {"cmd": "pause" | "resume" | "cancel", "id": 3}      {"cmd": "cancel_all"}
+    {"cmd": "status"}                 {"cmd": "shutdown"}
+    {"cmd": "estop"}                  {"cmd": "reset"}
+Every reply has "ok": true/false and "error" when false.
+
+Run from the project root:
+    python -m robot.daemon --ip 192.168.1.6
+"""
+
+import argparse
+import json
+import signal
+import socket
+import socketserver
+import threading
+import time
+
+from robot.jobs import PickJobRunner, PENDING, RUNNING, PAUSED, DONE, CANCELLED, FAILED
+from robot.kinematics import check_drop_locations
+from utilites.history import HistoryWriter
+from utilites.metrics import start_http_server
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+
+
+class RobotDaemon:
+    """
+    Owns the robot connection and executes jobs sent by clients
+
+    Args:
+        ip: robot IP address
+        host: address the service listens on (keep it local)
+        port: service port
+        pipelined: passed to DobotController
+        supervised: passed to DobotController (automatic alarm/connection recovery)
+        speed_preset: passed to DobotController
+        queued_io: passed to DobotController (suction/blow-off as queued MovLIO triggers)
+        grasp_sensor_di: passed to DobotController (vacuum switch input for grasp checks, needs queued_io)
+        record_feed: passed to DobotController (ring file for raw feed frames)
+        history: SQLite file for the pick history (utilites/history.py), None: off
+    """
+
+    def __init__(self, ip, host=SERVICE_HOST, port=SERVICE_PORT, pipelined=False, supervised=True, speed_preset=None,
+                 queued_io=False, grasp_sensor_di=None, record_feed=None, history=None):
+        # Imported here so clients do not need the robot stack to talk to the service
+        from robot.main import DobotController
+
+        self.history = HistoryWriter(history) if history else None
+        self.robot = DobotController(ip=ip, pipelined=pipelined, supervised=supervised, speed_preset=speed_preset,
+                                     queued_io=queued_io, grasp_sensor_di=grasp_sensor_di, record_feed=record_feed, history=self.history)
+        self.runner = PickJobRunner(self.robot)
+        self.started_at = time.time()
+        self._shutdown_lock = threading.Lock()
+        self._closed = False
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        reply = daemon.handle_request(json.loads(line))
+                    except Exception as e:
+                        reply = {"ok": False, "error": str(e)}
+                    self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    def handle_request(self, request):
+        cmd = request.get("cmd")
+
+        if cmd == "estop":
+            # Handled on the client's own handler thread, never queued behind a job
+            self.runner.cancel_all()
+            latency = self.robot.emergency_stop()
+            return {"ok": True, "latency_s": latency, "idle": self.robot.estop.last_was_idle}
+
+        if cmd == "reset":
+            # Operator reset after an emergency stop: clear the alarm, re-enable, clear the supervisor fault
+            self.robot.reset()
+            return {"ok": True}
+
+        if cmd == "pick":
+            # a bin out of reach would only alarm after the part is already on the gripper
+            drops = request.get("drop_locations") or [request.get("drop_location") or self.robot.drop_location]
+            unreachable = check_drop_locations(drops, (self.robot.place_z, self.robot.safe_z))
+            if unreachable:
+                return {"ok": False, "error": "Drop location out of reach: " + "; ".join(
+                    f"({x:.0f}, {y:.0f}) {', '.join(reasons)}" for _, (x, y), reasons in unreachable)}
+            job = self.runner.submit(request["targets"], label=request.get("label"),
+                                     drop_location=request.get("drop_location"), kinds=request.get("kinds"),
+                                     drop_locations=request.get("drop_locations"))
+            return {"ok": True, "job": job.progress()}
+
+        if cmd == "jobs":
+            return {"ok": True, "jobs": [job.progress() for job in list(self.runner.jobs)]}
+
+        if cmd in ("job", "pause", "resume", "cancel"):
+            job = self.runner.get(request.get("id"))
+            if job is None:
+                return {"ok": False, "error": f"Unknown job {request.get('id')}"}
+            if cmd == "pause":
+                job.pause()
+            elif cmd == "resume":
+                job.resume()
+            elif cmd == "cancel":
+                job.cancel()
+            return {"ok": True, "job": job.progress()}
+
+        if cmd == "cancel_all":
+            self.runner.cancel_all()
+            return {"ok": True}
+
+        if cmd == "status":
+            pose = self.robot.telemetry.latest()
+            return {
+                "ok": True,
+                "ip": self.robot.ip,
+                "uptime_s": time.time() - self.started_at,
+                "busy": self.runner.busy(),
+                "drop_location": list(self.robot.drop_location),
+                "telemetry": pose,
+                "fault": self.robot.supervisor.fault if self.robot.supervisor else None,
+                "grasp_stats": self.robot.grasp_stats.rates(),
+            }
+
+        if cmd == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+
+        return {"ok": False, "error": f"Unknown command {cmd!r}"}
+
+    def serve_forever(self):
+        print(f"Robot service listening on {self.server.server_address[0]}:{self.server.server_address[1]}")
+        self.server.serve_forever(poll_interval=0.2)
+
+    def shutdown(self):
+        # A second caller waits here until the first one has disconnected the robot
+        with self._shutdown_lock:
+            if self._closed:
+                return
+            print("Shutting down robot service...")
+            self.server.shutdown()
+            if not self.runner.shutdown(timeout=60.0):
+                # The service is going away regardless, do not leave the arm moving unattended
+                print("Pick still running after 60 s, stopping the arm")
+                self.robot.emergency_stop()
+            self.robot.disconnect()
+            if self.history is not None:
+                self.history.close()
+            self.server.server_close()
+            self._closed = True
+
+
+class RobotClient:
+    """
+    Client for the robot service
+
+    Args:
+        host: service address
+        port: service port
+        timeout_s: socket timeout in seconds
+    """
+
+    def __init__(self, host=SERVICE_HOST, port=SERVICE_PORT, timeout_s=5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout_s)
+        self.rfile = self.sock.makefile("rb")
+        self._lock = threading.Lock()
+        # the service found the arm already idle on the last emergency_stop()
+        self.last_stop_was_idle = False
+
+    @staticmethod
+    def available(host=SERVICE_HOST, port=SERVICE_PORT, timeout_s=0.2):
+        """True if a robot service is listening"""
+        try:
+            socket.create_connection((host, port), timeout=timeout_s).close()
+            return True
+        except OSError:
+            return False
+
+    def request(self, **request):
+        with self._lock:
+            self.sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("Robot service closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error", "Robot service request failed"))
+        return reply
+
+    def pick(self, targets, drop_location=None, label=None, kinds=None, drop_locations=None):
+        """Queue a pick job, returns its progress dict (with "id")"""
+        return self.request(cmd="pick", targets=[[float(x), float(y)] for x, y in targets],
+                            drop_location=drop_location, label=label, kinds=kinds,
+                            drop_locations=drop_locations)["job"]
+
+    def job(self, job_id):
+        return self.request(cmd="job", id=job_id)["job"]
+
+    def jobs(self):
+        return self.request(cmd="jobs")["jobs"]
+
+    def pause(self, job_id):
+        return self.request(cmd="pause", id=job_id)["job"]
+
+    def resume(self, job_id):
+        return self.request(cmd="resume", id=job_id)["job"]
+
+    def cancel(self, job_id):
+        return self.request(cmd="cancel", id=job_id)["job"]
+
+    def cancel_all(self):
+        self.request(cmd="cancel_all")
+
+    def status(self):
+        return self.request(cmd="status")
+
+    def emergency_stop(self):
+        reply = self.request(cmd="estop")
+        self.last_stop_was_idle = reply.get("idle", False)
+        return reply["latency_s"]
+
+    def reset(self):
+        return self.request(cmd="reset")
+
+    def wait(self, job_id, poll_s=0.2, stop=None):
+        """
+        Block until the job has finished, returns its final progress dict
+
+        Args:
+            stop: optional threading.Event; once set the job is cancelled (the current pick is finished)
+        """
+        cancelled = False
+        while True:
+            if stop is not None and stop.is_set() and not cancelled:
+                self.cancel(job_id)
+                cancelled = True
+            job = self.job(job_id)
+            if job["status"] in (DONE, CANCELLED, FAILED):
+                return job
+            time.sleep(poll_s)
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+class RemoteJob:
+    """Read-only view of a service job with the PickJob control methods"""
+
+    def __init__(self, client, info):
+        self.client = client
+        self.info = info
+        self.id = info["id"]
+        self.label = info["label"]
+        self.status = info["status"]
+        self.total = info["total"]
+        self.completed = info["completed"]
+        self.missed = info.get("missed", 0)
+        self.paused = info.get("paused", False)
+
+    def progress(self):
+        return self.info
+
+    def pause(self):
+        self.client.pause(self.id)
+
+    def resume(self):
+        self.client.resume(self.id)
+
+    def cancel(self):
+        self.client.cancel(self.id)
+
+
+class RemoteJobRunner:
+    """PickJobRunner interface backed by the robot service, so app.py can use either"""
+
+    def __init__(self, robot):
+        self.robot = robot
+
+    @property
+    def jobs(self):
+        return [RemoteJob(self.robot.client, info) for info in self.robot.client.jobs()]
+
+    def submit(self, targets, label=None, drop_location=None, kinds=None, drop_locations=None):
+        info = self.robot.client.pick(targets, drop_location=drop_location or self.robot.drop_location, label=label,
+                                      kinds=kinds, drop_locations=drop_locations)
+        return RemoteJob(self.robot.client, info)
+
+    def active_job(self):
+        return next((job for job in self.jobs if job.status in (RUNNING, PAUSED)), None)
+
+    def pending_jobs(self):
+        return [job for job in self.jobs if job.status == PENDING]
+
+    def busy(self):
+        return any(job.status in (PENDING, RUNNING, PAUSED) for job in self.jobs)
+
+    def cancel_all(self):
+        self.robot.client.cancel_all()
+
+    def shutdown(self, timeout=None):
+        # Jobs belong to the service and keep running after this client goes away
+        return True
+
+
+class RemoteRobot:
+    """Stand-in for DobotController in app.py when the robot service owns the arm"""
+
+    telemetry = None
+    # Heights used by the service's DobotController, for local reachability checks
+    safe_z = -75.0
+    pick_z = -165.0
+    place_z = -125.0
+
+    def __init__(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        self.client = RobotClient(host=host, port=port)
+        self.ip = self.client.status()["ip"]
+        self.drop_location = None
+        self.job_runner = RemoteJobRunner(self)
+
+    def emergency_stop(self):
+        return self.client.emergency_stop()
+
+    @property
+    def stop_was_idle(self):
+        return self.client.last_stop_was_idle
+
+    def reset(self):
+        self.client.reset()
+
+    def disconnect(self):
+        self.client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent Dobot MG400 robot service")
+    parser.add_argument("--ip", default="192.168.1.6", help="Robot IP address")
+    parser.add_argument("--host", default=SERVICE_HOST, help="Address the service listens on")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="Service port")
+    parser.add_argument("--pipelined", action="store_true", help="Stream motion commands without per-command round trips")
+    parser.add_argument("--speed-preset", default=None, help="Per-phase speed/acceleration preset from robot/speed_profiles.py")
+    parser.add_argument("--unsupervised", action="store_true", help="Disable automatic alarm and reconnect recovery")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics (cycle time, RTT, feed rate, ...) on this port")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Address the metrics server binds (0.0.0.0: all interfaces)")
+    parser.add_argument("--record-feed", default=None, help="Record raw feed frames to this ring file (e.g. outputs/feed.ring)")
+    parser.add_argument("--queued-io", action="store_true", help="Switch suction/blow-off with queued MovLIO triggers instead of DO + 1 s sleeps")
+    parser.add_argument("--grasp-sensor-di", type=int, default=None, help="DI wired to the vacuum switch; enables grasp checks after each lift (needs --queued-io)")
+    parser.add_argument("--history", default=None, help="Write every pick cycle to this SQLite database (e.g. outputs/history.db)")
+    args = parser.parse_args()
+
+    daemon = RobotDaemon(args.ip, host=args.host, port=args.port, pipelined=args.pipelined, supervised=not args.unsupervised,
+                         speed_preset=args.speed_preset, queued_io=args.queued_io, grasp_sensor_di=args.grasp_sensor_di,
+                         record_feed=args.record_feed, history=args.history)
+    if args.metrics_port:
+        start_http_server(args.metrics_port, args.metrics_host)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.shutdown()
+
+
+if __name__ == "__main__":
+    main()
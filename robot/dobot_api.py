@@ -6,6 +6,9 @@ import datetime
 import numpy as np
 import os
 import json
+import re
+import time
+from collections import namedtuple, deque
 
 alarmControllerFile = "files/alarm_controller.json"
 alarmServoFile = "files/alarm_servo.json"
@@ -103,6 +106,64 @@ def alarmAlarmJsonFile():
     return dataController, dataServo
 
 
+# Controller replies look like "ErrorID,{values},Command(args);"
+REPLY_TERMINATOR = ";"
+_REPLY_PATTERN = re.compile(r"^\s*(-?\d+)\s*,\s*\{(.*?)\}\s*,\s*(.*?)\s*;?\s*$", re.S)
+
+DobotReply = namedtuple("DobotReply", ["error_id", "values", "command", "raw", "latency"])
+
+# Called as hook(port, command name, seconds) after every send-recv round trip, e.g. to export
+# metrics (robot/dobot_controller.py registers the Prometheus one); keep them cheap, they run under the send lock
+latency_hooks = []
+
+
+def parse_reply(reply, latency=None):
+    """
+    Parse a controller reply into a DobotReply
+
+    values is a tuple of floats when the payload is a plain number list
+    (GetPose, GetAngle, DI, ...) and the raw payload string otherwise
+    (e.g. GetErrorID's nested lists). Unparseable replies get error_id None.
+    """
+    match = _REPLY_PATTERN.match(reply)
+    if match is None:
+        return DobotReply(None, reply, "", reply, latency)
+    error_id, payload, command = match.groups()
+    values = ()
+    if payload.strip():
+        try:
+            values = tuple(float(v) for v in payload.split(","))
+        except ValueError:
+            values = payload
+    return DobotReply(int(error_id), values, command, reply, latency)
+
+
+class ReplyFramer:
+    """
+    Splits a byte stream into complete ';'-terminated replies
+
+    recv() may return half a reply or several replies at once; bytes after
+    the last terminator are kept for the next call.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, data):
+        self._buffer += data.decode("utf-8", errors="replace") if isinstance(data, bytes) else data
+        replies = []
+        while REPLY_TERMINATOR in self._buffer:
+            reply, self._buffer = self._buffer.split(REPLY_TERMINATOR, 1)
+            replies.append(reply.strip() + REPLY_TERMINATOR)
+        return replies
+
+    def pending(self):
+        return self._buffer
+
+    def clear(self):
+        self._buffer = ""
+
+
 class DobotApi:
     def __init__(self, ip, port, *args, timeout_s=5.0):
         self.ip = ip
@@ -110,6 +171,10 @@ class DobotApi:
         self.socket_dobot = 0
         self.__globalLock = threading.Lock()
         self.text_log: Text = None
+        self._framer = ReplyFramer()
+        self._replies = deque()
+        self.last_latency = None
+        self.latencies = {}
         if args:
             self.text_log = args[0]
 
@@ -142,20 +207,20 @@ class DobotApi:
 
     def wait_reply(self):
         """
-    Read the return value
+    Read the return value (one complete ';'-terminated reply)
     """
-        data = ""
+        data_str = ""
         try:
-            data = self.socket_dobot.recv(1024)
+            while not self._replies:
+                data = self.socket_dobot.recv(1024)
+                if len(data) == 0:
+                    break
+                self._replies.extend(self._framer.feed(data))
+            if self._replies:
+                data_str = self._replies.popleft()
+                self.log(f'Receive from {self.ip}:{self.port}: {data_str}')
         except Exception as e:
             print(e)
-
-        finally:
-            if len(data) == 0:
-                data_str = data
-            else:
-                data_str = str(data, encoding="utf-8")
-                self.log(f'Receive from {self.ip}:{self.port}: {data_str}')
         return data_str
 
     def close(self):
@@ -170,10 +235,39 @@ class DobotApi:
     send-recv Sync
     """
         with self.__globalLock:
+            start = time.perf_counter()
             self.send_data(string)
             recvData = self.wait_reply()
+            self._record_latency(string, time.perf_counter() - start)
             return recvData
 
+    def sendRecvParsed(self, string):
+        """
+    send-recv Sync, returning a parsed DobotReply (with latency in seconds)
+    """
+        reply = self.sendRecvMsg(string)
+        return parse_reply(reply, self.last_latency)
+
+    def _record_latency(self, string, latency):
+        name = string.split("(", 1)[0].strip()
+        self.last_latency = latency
+        if name not in self.latencies:
+            self.latencies[name] = deque(maxlen=200)
+        self.latencies[name].append(latency)
+        for hook in latency_hooks:
+            hook(self.port, name, latency)
+
+    def latency_stats(self):
+        """
+    Round trip latency per command name: {name: (count, mean_s, max_s)} over the last 200 calls
+    """
+        stats = {}
+        for name, values in list(self.latencies.items()):
+            values = list(values)
+            if values:
+                stats[name] = (len(values), sum(values) / len(values), max(values))
+        return stats
+
     def __del__(self):
         self.close()
 
@@ -7,8 +7,12 @@ Uses Dobot Python API from https://github.com/Dobot-Arm/TCP-IP-4Axis-Python
 
 import socket
 import threading
-from robot.dobot_api import DobotApiDashboard, DobotApi, DobotApiMove, MyType, alarmAlarmJsonFile
-from time import sleep
+from robot.dobot_api import DobotApiDashboard, DobotApi, DobotApiMove, MyType, alarmAlarmJsonFile, latency_hooks
+from robot.recorder import FeedRecorder
+from robot.telemetry import PoseHistory, TelemetryHub, telemetry_sample
+from utilites.clock import ControllerClock
+from utilites.metrics import COMMAND_RTT, FEED_FRAMES
+from time import sleep, monotonic
 import numpy as np
 
 # Global variables for robot feedback
@@ -16,9 +20,28 @@ current_actual = None
 algorithm_queue = None
 enableStatus_robot = None
 robotErrorState = False
+runningStatus_robot = None
+digitalInputs_robot = None
+last_feed_time = None
 globalLockValue = threading.Lock()
 stop_threads = False
 
+# Decimated pose/joint/speed/temperature/current samples from the feed
+telemetry = TelemetryHub(rate_hz=10.0)
+# Every feed frame stamped on the shared clock, for the pose at a camera frame's capture time
+controller_clock = ControllerClock()
+pose_history = PoseHistory()
+# Raw frame recorder (None: off), see StartFeedRecorder
+feed_recorder = None
+
+
+def _observe_command_rtt(port, command, seconds):
+    COMMAND_RTT.labels(port=port, command=command).observe(seconds)
+
+
+# dobot_api only keeps its own latency deques, the Prometheus histogram is fed from here
+latency_hooks.append(_observe_command_rtt)
+
 
 def ConnectRobot(ip="192.168.1.6", timeout_s=5.0):
     """
@@ -46,25 +69,30 @@ def ConnectRobot(ip="192.168.1.6", timeout_s=5.0):
         raise e
 
 
-def GetFeed(feed: DobotApi):
+def GetFeed(feed: DobotApi, stop_event=None):
     """
     Continuously read feedback from the robot
     This function should run in a separate thread
 
     Args:
         feed: DobotApi object for feedback port
+        stop_event: threading.Event ending this thread only (set by StopFeedbackThread)
     """
-    global current_actual, algorithm_queue, enableStatus_robot, robotErrorState, stop_threads
+    global current_actual, algorithm_queue, enableStatus_robot, robotErrorState, runningStatus_robot, digitalInputs_robot, last_feed_time, stop_threads
     hasRead = 0
 
     # Set a timeout on the socket so recv() doesn't block forever
     # This allows the loop to check the 'stop_threads' flag
     feed.socket_dobot.settimeout(1.0)
 
-    while not stop_threads:  # Check the flag here
+    def stopped():
+        # The global flag is cleared again by the next StartFeedbackThread, the event stays set for this thread
+        return stop_threads or (stop_event is not None and stop_event.is_set())
+
+    while not stopped():  # Check the flag here
         try:
             data = bytes()
-            while hasRead < 1440 and not stop_threads:
+            while hasRead < 1440 and not stopped():
                 try:
                     temp = feed.socket_dobot.recv(1440 - hasRead)
                     if len(temp) > 0:
@@ -74,10 +102,11 @@ def GetFeed(feed: DobotApi):
                     # Timeout reached, loop back to check stop_threads
                     continue
 
-            if stop_threads:
+            if stopped():
                 break
 
             hasRead = 0
+            received_at = monotonic()
             feedInfo = np.frombuffer(data, dtype=MyType)
 
             if hex((feedInfo['test_value'][0])) == '0x123456789abcdef':
@@ -86,11 +115,22 @@ def GetFeed(feed: DobotApi):
                 algorithm_queue = feedInfo['isRunQueuedCmd'][0]
                 enableStatus_robot = feedInfo['EnableStatus'][0]
                 robotErrorState = feedInfo['ErrorStatus'][0]
+                runningStatus_robot = feedInfo['RunningStatus'][0]
+                digitalInputs_robot = feedInfo['digital_input_bits'][0]
+                last_feed_time = received_at
                 globalLockValue.release()
+                stamp = controller_clock.observe(feedInfo["controller_timer"][0], received_at)
+                pose_history.append(stamp, feedInfo["tool_vector_actual"][0])
+                recorder = feed_recorder
+                if recorder is not None:
+                    recorder.write(data, stamp)
+                FEED_FRAMES.inc()
+                if telemetry.due():
+                    telemetry.publish(telemetry_sample(feedInfo, stamp))
             sleep(0.001)
 
         except Exception as e:
-            if not stop_threads:
+            if not stopped():
                 print(f"Feed Error: {e}")
             sleep(0.1)
 
@@ -105,7 +145,14 @@ def StartFeedbackThread(feed: DobotApi):
     Returns:
         threading.Thread: The started thread object
     """
-    feed_thread = threading.Thread(target=GetFeed, args=(feed,))
+    global stop_threads
+    # Reset the flag so the feed can be restarted after DisconnectRobot/StopFeedbackThread
+    stop_threads = False
+    # A new connection has its own network delay, estimate the controller clock offset again
+    controller_clock.reset()
+    stop_event = threading.Event()
+    feed_thread = threading.Thread(target=GetFeed, args=(feed, stop_event))
+    feed_thread.stop_event = stop_event
     feed_thread.daemon = True
     feed_thread.start()
     print("Feedback thread started")
@@ -113,6 +160,112 @@ def StartFeedbackThread(feed: DobotApi):
     return feed_thread
 
 
+def StopFeedbackThread(feed_thread=None):
+    """
+    Stop the feedback monitoring thread
+
+    Args:
+        feed_thread: thread returned by StartFeedbackThread, None to stop every feed thread
+
+    Returns:
+        bool: True if the thread has exited
+    """
+    global stop_threads
+    if feed_thread is None:
+        stop_threads = True
+        return True
+    # Only this thread: a later StartFeedbackThread must not revive it if the join times out
+    feed_thread.stop_event.set()
+    feed_thread.join(timeout=2.0)
+    if feed_thread.is_alive():
+        print("Feedback thread did not stop within 2 s, it will exit on its next socket timeout")
+        return False
+    return True
+
+
+def StartFeedRecorder(path, capacity=None):
+    """
+    Record every raw feed frame to a memory-mapped ring file
+
+    Args:
+        path: ring file (see robot/recorder.py)
+        capacity: frames kept, None for the recorder default (10 minutes)
+
+    Returns:
+        FeedRecorder: the active recorder
+    """
+    global feed_recorder
+    StopFeedRecorder()
+    feed_recorder = FeedRecorder(path) if capacity is None else FeedRecorder(path, capacity=capacity)
+    print(f"Recording feed to {path}")
+    return feed_recorder
+
+
+def StopFeedRecorder():
+    """Stop recording and flush the ring file"""
+    global feed_recorder
+    recorder, feed_recorder = feed_recorder, None
+    if recorder is not None:
+        recorder.close()
+
+
+def GetRobotState():
+    """
+    Get the latest status flags from feedback
+
+    Returns:
+        tuple: (enable_status, error_status, seconds since the last valid feed frame or None)
+    """
+    globalLockValue.acquire()
+    enabled, error, last = enableStatus_robot, robotErrorState, last_feed_time
+    globalLockValue.release()
+    age = None if last is None else monotonic() - last
+    enabled = None if enabled is None else int(np.ravel(enabled)[0])
+    error = bool(np.ravel(error)[0]) if error is not None else False
+    return enabled, error, age
+
+
+def GetRunningStatus():
+    """
+    Get the RunningStatus flag from feedback
+
+    Returns:
+        tuple: (running flag or None, monotonic time of the frame it came from)
+    """
+    globalLockValue.acquire()
+    running, last = runningStatus_robot, last_feed_time
+    globalLockValue.release()
+    running = None if running is None else int(np.ravel(running)[0])
+    return running, last
+
+
+def GetDigitalInputs():
+    """
+    Get the digital input bits from feedback (no extra round trip to the controller)
+
+    Returns:
+        tuple: (bit mask with DI1 as bit 0, or None, monotonic time of the frame it came from)
+    """
+    globalLockValue.acquire()
+    bits, last = digitalInputs_robot, last_feed_time
+    globalLockValue.release()
+    bits = None if bits is None else int(np.ravel(bits)[0])
+    return bits, last
+
+
+def GetPoseAt(t):
+    """
+    Get the robot pose at a time on the shared clock (e.g. a camera frame's capture time)
+
+    Args:
+        t: monotonic seconds, see utilites/clock.py
+
+    Returns:
+        list or None: [x, y, z, r] interpolated between feed frames, None if t is not covered
+    """
+    return pose_history.pose_at(t)
+
+
 def WaitArrive(target_point, tolerance=1.0, timeout=30.0):
     """
     Wait until the robot reaches the target point
@@ -151,28 +304,30 @@ def WaitArrive(target_point, tolerance=1.0, timeout=30.0):
     return False
 
 
-def MoveJ(move: DobotApiMove, point):
+def MoveJ(move: DobotApiMove, point, *dynParams):
     """
     Move robot to specified point using Joint movement
 
     Args:
         move: DobotApiMove object
         point: [x, y, z, r] coordinates
+        dynParams: optional SpeedJ=/AccJ= parameters for this move only
     """
     print(f"Moving to point: {point}")
-    move.MovJ(point[0], point[1], point[2], point[3])
+    return move.MovJ(point[0], point[1], point[2], point[3], *dynParams)
 
 
-def MoveL(move: DobotApiMove, point):
+def MoveL(move: DobotApiMove, point, *dynParams):
     """
     Move robot to specified point using Linear movement
 
     Args:
         move: DobotApiMove object
         point: [x, y, z, r] coordinates
+        dynParams: optional SpeedL=/AccL= parameters for this move only
     """
     print(f"Moving to point: {point}")
-    move.MovL(point[0], point[1], point[2], point[3])
+    return move.MovL(point[0], point[1], point[2], point[3], *dynParams)
 
 
 def SetupRobot(dashboard: DobotApiDashboard, speed_ratio=50, acc_ratio=50, payload_weight=50):
@@ -246,12 +401,9 @@ def DisconnectRobot(dashboard, move, feed, feed_thread=None):
         move: DobotApiMove object
         feed: DobotApi object
     """
-    global stop_threads
     print("Stopping feedback thread...")
-    stop_threads = True  # Signal the thread to stop
-
-    if feed_thread:
-        feed_thread.join(timeout=2.0)  # Wait for thread to finish
+    StopFeedbackThread(feed_thread)
+    StopFeedRecorder()
 
     print("Disconnecting from robot...")
     try:
@@ -0,0 +1,201 @@
+"""
+Low-latency emergency stop channel
+
+DobotApiDashboard.EmergencyStop goes through sendRecvMsg and therefore waits
+behind any dashboard command holding the same lock (a DO or PayLoad waiting
+on a slow reply). EmergencyStopChannel keeps its own dashboard connection
+that carries nothing but the stop command: trigger() writes the preformatted
+command immediately from any thread, and the halt is confirmed from the
+feed's RunningStatus rather than from the reply. Only a running -> stopped
+transition counts as a halt; stopping an arm that was already idle reports
+no latency (last_was_idle is set instead).
+
+Measure stop latency against the simulator from the project root:
+    python -m robot.estop --benchmark
+"""
+
+import argparse
+import socket
+import threading
+import time
+
+from robot.dobot_controller import GetRunningStatus
+
+DASHBOARD_PORT = 29999
+STOP_COMMAND = b"EmergencyStop()"
+
+
+class EmergencyStopChannel:
+    """
+    Dedicated dashboard connection used only for EmergencyStop
+
+    Args:
+        ip: robot IP address
+        port: dashboard port
+        timeout_s: connect timeout in seconds
+    """
+
+    def __init__(self, ip, port=DASHBOARD_PORT, timeout_s=5.0):
+        self.ip = ip
+        self.port = port
+        self.sock = socket.create_connection((ip, port), timeout=timeout_s)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(0.5)
+        self.last_triggered = None
+        self.last_reply = None
+        # True when the last stop() found the arm already idle, so there was no halt to time
+        self.last_was_idle = False
+        # Only guards concurrent writes on this socket, nothing else ever holds it
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reader = threading.Thread(target=self._drain_replies, daemon=True)
+        self._reader.start()
+
+    def trigger(self):
+        """
+        Send EmergencyStop immediately, without waiting for the reply
+
+        Returns:
+            float: monotonic time the command was written
+        """
+        with self._send_lock:
+            self.sock.sendall(STOP_COMMAND)
+            self.last_triggered = time.monotonic()
+        print(f"Emergency stop sent to {self.ip}:{self.port}")
+        return self.last_triggered
+
+    def wait_halted(self, sent_at=None, timeout=1.0, poll=0.0005, was_running=True):
+        """
+        Wait for the feed to report the arm going from running to stopped after the stop command
+
+        Args:
+            sent_at: monotonic time the stop was written (default: the last trigger())
+            was_running: the feed reported RunningStatus == 1 when the stop was sent; if False a
+                stopped frame only counts after a running one has been seen
+
+        Returns:
+            float or None: stop latency in seconds, None if not confirmed within timeout
+        """
+        sent_at = sent_at if sent_at is not None else self.last_triggered
+        seen_running = was_running
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            running, frame_time = GetRunningStatus()
+            if running == 1:
+                seen_running = True
+            elif running == 0 and seen_running and frame_time is not None and frame_time >= sent_at:
+                return frame_time - sent_at
+            time.sleep(poll)
+        return None
+
+    def stop(self, timeout=1.0):
+        """
+        Trigger the stop and return the confirmed latency in seconds
+
+        Returns:
+            float or None: None if unconfirmed, or if the arm was already idle (last_was_idle)
+        """
+        running, _ = GetRunningStatus()
+        sent_at = self.trigger()
+        # Always sent, but an idle arm has no halt to time
+        self.last_was_idle = running == 0
+        if self.last_was_idle:
+            return None
+        return self.wait_halted(sent_at, timeout=timeout)
+
+    def _drain_replies(self):
+        # Replies are not needed for the stop itself, but must be read so the socket never backs up
+        while not self._stop.is_set():
+            try:
+                data = self.sock.recv(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if not data:
+                break
+            self.last_reply = data.decode("utf-8", errors="replace")
+
+    def close(self):
+        self._stop.set()
+        try:
+            self.sock.close()
+        finally:
+            self._reader.join(timeout=1.0)
+
+
+def benchmark(runs=10, busy_dashboard=True):
+    """
+    Measure stop-command-to-halt latency against the local simulator
+
+    Each run starts a long MovL, optionally keeps the normal dashboard busy
+    with slow commands from another thread, then triggers the stop.
+
+    Returns:
+        list: latencies in seconds (None for unconfirmed runs)
+    """
+    from robot.simulator import MG400Simulator
+    from robot.main import DobotController
+
+    latencies = []
+    with MG400Simulator(reply_delay=0.05 if busy_dashboard else 0.0):
+        robot = DobotController(ip="127.0.0.1")
+        try:
+            for i in range(runs):
+                robot.dashboard.ClearError()
+                robot.dashboard.EnableRobot()
+                start = [300, -150, -75, 0] if i % 2 == 0 else [300, 150, -75, 0]
+                end = [300, 150, -75, 0] if i % 2 == 0 else [300, -150, -75, 0]
+                robot.move.MovJ(*start)
+                robot.move.Sync()
+                robot.move.MovL(*end)
+                time.sleep(0.1)
+
+                busy = None
+                if busy_dashboard:
+                    busy = threading.Thread(target=lambda: [robot.dashboard.DO(3, k % 2) for k in range(5)])
+                    busy.start()
+                    time.sleep(0.01)
+
+                latency = robot.estop.stop()
+                latencies.append(latency)
+                if latency is not None:
+                    label = f"{latency * 1000:.1f} ms"
+                else:
+                    label = "arm already idle" if robot.estop.last_was_idle else "unconfirmed"
+                print(f"Run {i + 1}: {label}")
+                if busy is not None:
+                    busy.join()
+        finally:
+            robot.disconnect()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emergency stop channel")
+    parser.add_argument("--ip", default="192.168.1.6", help="Robot IP address")
+    parser.add_argument("--benchmark", action="store_true", help="Measure stop latency against the local simulator")
+    parser.add_argument("--runs", type=int, default=10, help="Benchmark runs")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        confirmed = [l for l in benchmark(runs=args.runs) if l is not None]
+        if confirmed:
+            confirmed.sort()
+            print(f"Stop latency: mean {sum(confirmed) / len(confirmed) * 1000:.1f} ms, "
+                  f"max {confirmed[-1] * 1000:.1f} ms over {len(confirmed)} confirmed runs")
+        return
+
+    channel = EmergencyStopChannel(args.ip)
+    try:
+        latency = channel.stop()
+        if latency is not None:
+            print(f"Halted after {latency * 1000:.1f} ms")
+        else:
+            print("Stop sent, arm was already idle" if channel.last_was_idle else "Stop sent")
+    finally:
+        channel.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Vacuum gripper with queued I/O
+
+The original pick_and_place switches suction with synchronous DO calls, each
+followed by sleep(1), so the arm sits still for seconds at the pick and place
+points. VacuumGripper instead attaches the I/O to the motion itself:
+
+- suction is switched on by MovLIO a few mm before the pick point is reached,
+  followed by a short queued wait for the vacuum to build;
+- suction is switched off by MovLIO when the place point is reached;
+- the blow-off pulse on DO2 is triggered at the start of the retract move
+  and switched off part way up, so nothing waits for it.
+
+All of these are queue instructions, so they execute in order with the
+motion on the controller and the Python side never sleeps.
+
+DobotController only uses it with queued_io=True (--queued-io on the CLIs).
+Note the blow-off then lasts blow_off_percent of the retract move (tens of
+ms at full speed) instead of the legacy 1 s pulse; raise blow_off_percent
+or slow the "retract" phase if parts stick to the cup.
+
+With a vacuum sensor wired to a DI, grasp_ok() checks the grasp after the
+lift, by default from the feed's digital_input_bits (no extra round trip),
+so a missed part is retried on the spot instead of carried to the drop box.
+GraspStats counts the outcome per object type.
+"""
+
+import threading
+import time
+
+from robot.dobot_api import parse_reply
+from robot.dobot_controller import GetDigitalInputs
+from robot.speed_profiles import motion_params
+
+SENSOR_SOURCES = ("feed", "DI", "ToolDI")
+
+
+class VacuumGripper:
+    """
+    Args:
+        robot: DobotController the gripper is mounted on
+        suction_do: digital output driving the vacuum
+        blow_do: digital output driving the blow-off valve
+        suction_lead_mm: switch suction on this many mm before reaching the pick point
+        vacuum_settle_ms: queued wait after reaching the pick point before lifting
+        blow_off_percent: blow-off is switched off after this % of the retract move
+        sensor_di: input the vacuum switch is wired to (1 based), None to skip grasp checks
+        sensor_source: "feed" (digital_input_bits), "DI" or "ToolDI" (dashboard query)
+        grasp_retries: local re-picks after a failed grasp check before the part is skipped
+    """
+
+    def __init__(self, robot, suction_do=1, blow_do=2, suction_lead_mm=10.0, vacuum_settle_ms=150, blow_off_percent=40,
+                 sensor_di=None, sensor_source="feed", grasp_retries=1):
+        if sensor_source not in SENSOR_SOURCES:
+            raise ValueError(f"Unknown sensor source {sensor_source!r}, choose from {', '.join(SENSOR_SOURCES)}")
+        self.robot = robot
+        self.suction_do = suction_do
+        self.blow_do = blow_do
+        self.suction_lead_mm = suction_lead_mm
+        self.vacuum_settle_ms = vacuum_settle_ms
+        self.blow_off_percent = blow_off_percent
+        self.sensor_di = sensor_di
+        self.sensor_source = sensor_source
+        self.grasp_retries = grasp_retries
+
+    @staticmethod
+    def io_trigger(mode, distance, index, status):
+        """Format one (Mode,Distance,Index,Status) parameter for MovLIO/MovJIO"""
+        return "({:d},{:g},{:d},{:d})".format(mode, distance, index, status)
+
+    def _move_l_io(self, point, phase, *triggers):
+        robot = self.robot
+        params = list(triggers) + motion_params(robot.speed_profiles, phase, linear=True)
+        if robot.pipeline is not None:
+            return robot.pipeline.MovLIO(*point, *params)
+        print(f"Moving to point: {point} with I/O {triggers}")
+        return robot._check(robot.move.MovLIO(*point, *params), "MovLIO")
+
+    def descend_and_grip(self, x, y, z, r):
+        """Linear descent to the pick point, suction on just before arrival"""
+        # Mode 1 with a negative distance counts from the target point
+        self._move_l_io([x, y, z, r], "approach", self.io_trigger(1, -self.suction_lead_mm, self.suction_do, 1))
+        if self.vacuum_settle_ms > 0:
+            self.robot._check(self.robot.dashboard.wait(int(self.vacuum_settle_ms)), "wait")
+
+    def place_and_release(self, x, y, z, r):
+        """Linear descent to the place point, suction off on arrival"""
+        self._move_l_io([x, y, z, r], "place", self.io_trigger(0, 100, self.suction_do, 0))
+
+    def retract_with_blow_off(self, x, y, z, r):
+        """Retract after placing, pulsing the blow-off valve during the first part of the move"""
+        self._move_l_io(
+            [x, y, z, r],
+            "retract",
+            self.io_trigger(0, 0, self.blow_do, 1),
+            self.io_trigger(0, self.blow_off_percent, self.blow_do, 0),
+        )
+
+    @property
+    def verifies_grasp(self):
+        return self.sensor_di is not None
+
+    def grasp_ok(self, timeout=0.5):
+        """
+        Read the vacuum sensor once the queued lift has finished
+
+        Returns:
+            bool: True if the sensor reports vacuum (or no sensor is configured)
+        """
+        if self.sensor_di is None:
+            return True
+        self.robot._wait_queue()
+        if self.sensor_source == "feed":
+            # Use the first feed frame produced after the lift completed
+            synced_at = time.monotonic()
+            deadline = synced_at + timeout
+            while time.monotonic() < deadline:
+                bits, frame_time = GetDigitalInputs()
+                if bits is not None and frame_time is not None and frame_time >= synced_at:
+                    return bool((bits >> (self.sensor_di - 1)) & 1)
+                time.sleep(0.002)
+            print("No feed frame for the grasp check, treating the grasp as failed")
+            return False
+        dashboard = self.robot.dashboard
+        reply = dashboard.DI(self.sensor_di) if self.sensor_source == "DI" else dashboard.ToolDI(self.sensor_di)
+        parsed = parse_reply(reply or "")
+        # values is a float tuple for a plain reply like "0,{1},DI(1);", the raw string otherwise
+        if parsed.error_id != 0 or not isinstance(parsed.values, tuple) or not parsed.values:
+            print(f"{self.sensor_source} read failed: {reply!r}")
+            return False
+        return int(parsed.values[0]) == 1
+
+    def release_all(self):
+        """Immediately switch off suction and blow-off (e.g. after a stop)"""
+        dashboard = self.robot.dashboard
+        dashboard.DOExecute(self.suction_do, 0)
+        dashboard.DOExecute(self.blow_do, 0)
+
+
+class GraspStats:
+    """Grasp outcomes per object type (e.g. "red circle")"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, kind, success, attempts=1):
+        """
+        Args:
+            kind: object type label, None for unknown
+            success: part was held after the last attempt
+            attempts: grasp attempts made for this part
+        """
+        kind = kind or "unknown"
+        with self._lock:
+            counts = self._counts.setdefault(kind, {"parts": 0, "picked": 0, "first_try": 0, "attempts": 0})
+            counts["parts"] += 1
+            counts["picked"] += int(bool(success))
+            counts["first_try"] += int(bool(success) and attempts == 1)
+            counts["attempts"] += attempts
+
+    def rates(self):
+        """
+        Returns:
+            dict: kind -> {"parts", "picked", "first_try", "attempts", "success_rate", "first_try_rate"}
+        """
+        with self._lock:
+            result = {}
+            for kind, counts in self._counts.items():
+                row = dict(counts)
+                row["success_rate"] = counts["picked"] / counts["parts"]
+                row["first_try_rate"] = counts["first_try"] / counts["parts"]
+                result[kind] = row
+            return result
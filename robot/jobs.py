@@ -0,0 +1,224 @@
+"""
+Background pick job runner
+
+Runs pick_and_place jobs on a worker thread so the caller (the Streamlit
+script thread) is never blocked by robot motion. Jobs are executed in the
+order they were submitted. Each job reports per-object progress with elapsed
+time and ETA, and can be paused or cancelled between picks.
+"""
+
+import itertools
+import queue
+import threading
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class PickJob:
+    """A list of (x, y) targets picked one after another"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, targets, label=None, drop_location=None, kinds=None, drop_locations=None):
+        self.id = next(PickJob._ids)
+        self.label = label or f"Job {self.id}"
+        self.targets = [(float(x), float(y)) for x, y in targets]
+        # Object type per target (e.g. "red circle"), used for the grasp statistics
+        self.kinds = list(kinds) if kinds is not None else [None] * len(self.targets)
+        # Drop point per target (sorting bins), None entries use the job/robot drop location
+        self.drop_locations = list(drop_locations) if drop_locations is not None else [None] * len(self.targets)
+        self.drop_location = list(drop_location) if drop_location is not None else None
+        self.status = PENDING
+        self.completed = 0
+        self.missed = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+
+    @property
+    def total(self):
+        return len(self.targets)
+
+    def cancel(self):
+        """Request cancellation, takes effect before the next pick"""
+        self._cancel.set()
+        self._resume.set()
+
+    def pause(self):
+        """Pause before the next pick (the current pick is finished first)"""
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def eta(self):
+        """Estimated seconds remaining, based on the average time per completed pick"""
+        if self.completed == 0 or self.status not in (RUNNING, PAUSED):
+            return None
+        per_pick = self.elapsed() / self.completed
+        return per_pick * (self.total - self.completed)
+
+    def progress(self):
+        return {
+            "id": self.id,
+            "label": self.label,
+            "status": self.status,
+            "paused": self.paused,
+            "completed": self.completed,
+            "missed": self.missed,
+            "total": self.total,
+            "elapsed_s": self.elapsed(),
+            "eta_s": self.eta(),
+            "error": self.error,
+        }
+
+
+class PickJobRunner:
+    """
+    Executes PickJobs for one DobotController on a single worker thread
+
+    Args:
+        robot: DobotController (anything with pick_and_place(x, y, kind=None, drop_location=None))
+    """
+
+    def __init__(self, robot):
+        self.robot = robot
+        self.jobs = []
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, targets, label=None, drop_location=None, kinds=None, drop_locations=None):
+        """
+        Queue a job
+
+        Args:
+            targets: iterable of (x, y) robot coordinates
+            label: optional name shown in progress reports
+            drop_location: optional [x, y, z] used for this job instead of robot.drop_location
+            kinds: optional object type per target, for the grasp statistics
+            drop_locations: optional [x, y, z] per target (sorting bins)
+
+        Returns:
+            PickJob: the queued job
+        """
+        job = PickJob(targets, label=label, drop_location=drop_location, kinds=kinds, drop_locations=drop_locations)
+        with self._lock:
+            self.jobs.append(job)
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            for job in self.jobs:
+                if job.id == job_id:
+                    return job
+        return None
+
+    def active_job(self):
+        with self._lock:
+            for job in self.jobs:
+                if job.status in (RUNNING, PAUSED):
+                    return job
+        return None
+
+    def pending_jobs(self):
+        with self._lock:
+            return [job for job in self.jobs if job.status == PENDING]
+
+    def busy(self):
+        with self._lock:
+            return any(job.status in (PENDING, RUNNING, PAUSED) for job in self.jobs)
+
+    def cancel_all(self):
+        with self._lock:
+            jobs = list(self.jobs)
+        for job in jobs:
+            if job.status in (PENDING, RUNNING, PAUSED):
+                job.cancel()
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.status in (PENDING, RUNNING, PAUSED)]
+
+    def shutdown(self, timeout=None):
+        """
+        Cancel outstanding jobs and stop the worker thread
+
+        Returns:
+            bool: False if the worker is still busy with a pick after timeout
+        """
+        self.cancel_all()
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+        # The worker never takes another job once stopped, so queued ones end here
+        with self._lock:
+            for job in self.jobs:
+                if job.status == PENDING:
+                    job.status = CANCELLED
+        return not self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            job = self._queue.get()
+            if job is None:
+                break
+            self._execute(job)
+
+    def _execute(self, job):
+        if job.cancelled:
+            job.status = CANCELLED
+            return
+
+        job.status = RUNNING
+        job.started_at = time.monotonic()
+        try:
+            for (x, y), kind, drop in zip(job.targets, job.kinds, job.drop_locations):
+                # Pause and cancel are only honoured between picks, never mid-motion
+                if job.paused:
+                    job.status = PAUSED
+                    job._resume.wait()
+                    job.status = RUNNING
+                if job.cancelled:
+                    job.status = CANCELLED
+                    break
+                # Counted as completed either way; a failed grasp check only skipped the place leg
+                # Per-pick drop point, then the job's, then the robot's own (None); the robot is never changed
+                drop = drop if drop is not None else job.drop_location
+                if self.robot.pick_and_place(x, y, kind=kind, drop_location=drop) is False:
+                    job.missed += 1
+                job.completed += 1
+            else:
+                job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            print(f"Pick job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.monotonic()
@@ -0,0 +1,178 @@
+"""
+MG400 reachability model
+
+Vectorized envelope checks and a simplified inverse kinematics for the
+MG400, so every candidate target from pixel_to_robot can be checked in one
+batch before anything is sent. Targets the controller would reject (out of
+reach, Z outside the working range, J1 past its joint limit) are rejected or
+clamped locally, instead of triggering an alarm that needs ClearError and a
+re-enable.
+"""
+
+import numpy as np
+
+# Working envelope (mm, degrees)
+MAX_REACH = 440.0
+MIN_REACH = 150.0
+Z_MIN = -170.0
+Z_MAX = 160.0
+J1_LIMIT = 160.0
+
+# Simplified arm geometry: two 175 mm links, shoulder 43 mm out from the J1 axis
+LINK_1 = 175.0
+LINK_2 = 175.0
+SHOULDER_OFFSET = 43.0
+
+REASON_TOO_CLOSE = "inside minimum reach"
+REASON_TOO_FAR = "beyond maximum reach"
+REASON_Z_LOW = "below Z limit"
+REASON_Z_HIGH = "above Z limit"
+REASON_J1 = "J1 outside joint limit"
+REASON_TABLE = "outside table area"
+
+
+def joint_angles(points):
+    """
+    Simplified inverse kinematics
+
+    J1 from the base angle, J2/J3 from a planar two link solution (distance
+    clipped to the fully stretched arm), J4 closes R.
+
+    Args:
+        points: (N, 4) array of [x, y, z, r], or a single pose
+
+    Returns:
+        np.ndarray: (N, 4) joint angles in degrees, or (4,) for a single pose
+    """
+    p = np.asarray(points, dtype=np.float64)
+    single = p.ndim == 1
+    p = np.atleast_2d(p)
+    x, y, z, r = p[:, 0], p[:, 1], p[:, 2], p[:, 3]
+
+    j1 = np.degrees(np.arctan2(y, x))
+    reach = np.hypot(x, y) - SHOULDER_OFFSET
+    d = np.minimum(np.hypot(reach, z), LINK_1 + LINK_2 - 1e-6)
+    cos_j3 = (d * d - LINK_1 * LINK_1 - LINK_2 * LINK_2) / (2 * LINK_1 * LINK_2)
+    j3 = np.degrees(np.arccos(np.clip(cos_j3, -1.0, 1.0)))
+    j2 = 90.0 - np.degrees(np.arctan2(z, reach)) - j3 / 2.0
+    joints = np.stack([j1, j2, j3, r - j1], axis=1)
+    return joints[0] if single else joints
+
+
+def check_targets(points, z_values=None, table=None):
+    """
+    Check a batch of XY targets against the envelope
+
+    Args:
+        points: (N, 2) array of robot X, Y (mm)
+        z_values: heights the move will visit at each XY, either shared by all targets
+            (e.g. (pick_z, safe_z)) or one row per target (N, k); None to skip
+        table: optional (x_min, x_max, y_min, y_max) table area in robot coordinates
+
+    Returns:
+        tuple: (boolean mask of reachable targets, list of reason lists per target)
+    """
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    x, y = p[:, 0], p[:, 1]
+    radius = np.hypot(x, y)
+    # J1 from the same IK the simulator uses, so both agree on the base angle convention
+    j1 = joint_angles(np.column_stack([x, y, np.zeros_like(x), np.zeros_like(x)]))[:, 0]
+
+    checks = [
+        (radius < MIN_REACH, REASON_TOO_CLOSE),
+        (radius > MAX_REACH, REASON_TOO_FAR),
+        (np.abs(j1) > J1_LIMIT, REASON_J1),
+    ]
+    if z_values is not None and np.size(z_values):
+        z = np.asarray(z_values, dtype=np.float64)
+        z = np.broadcast_to(z if z.ndim == 2 else z.reshape(1, -1), (len(p), z.shape[-1]))
+        checks.append(((z < Z_MIN).any(axis=1), REASON_Z_LOW))
+        checks.append(((z > Z_MAX).any(axis=1), REASON_Z_HIGH))
+    if table is not None:
+        x_min, x_max, y_min, y_max = table
+        checks.append(((x < x_min) | (x > x_max) | (y < y_min) | (y > y_max), REASON_TABLE))
+
+    failed = np.stack([mask for mask, _ in checks], axis=1)
+    reasons = [[checks[k][1] for k in np.flatnonzero(row)] for row in failed]
+    return ~failed.any(axis=1), reasons
+
+
+def clamp_targets(points, table=None):
+    """
+    Move XY targets onto the nearest point of the reachable envelope
+
+    Radius is clipped to [MIN_REACH, MAX_REACH] and the base angle to
+    +-J1_LIMIT, then the optional table area is applied.
+
+    Returns:
+        np.ndarray: (N, 2) clamped targets
+    """
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    radius = np.clip(np.hypot(p[:, 0], p[:, 1]), MIN_REACH + 1e-6, MAX_REACH - 1e-6)
+    angle = np.clip(np.arctan2(p[:, 1], p[:, 0]), -np.radians(J1_LIMIT), np.radians(J1_LIMIT))
+    clamped = np.stack([radius * np.cos(angle), radius * np.sin(angle)], axis=1)
+    if table is not None:
+        x_min, x_max, y_min, y_max = table
+        clamped[:, 0] = np.clip(clamped[:, 0], x_min, x_max)
+        clamped[:, 1] = np.clip(clamped[:, 1], y_min, y_max)
+    return clamped
+
+
+def precheck_targets(targets, z_values=None, mode="reject", table=None, max_clamp_mm=20.0):
+    """
+    Filter targets before sending them to the robot, logging every rejection
+
+    Args:
+        targets: list of (x, y)
+        z_values: heights visited at the targets, shared or one row per target (see check_targets)
+        mode: "reject" drops unreachable targets, "clamp" pulls them onto the envelope
+            when they are within max_clamp_mm of it (further ones are still rejected)
+        table: optional (x_min, x_max, y_min, y_max)
+
+    Returns:
+        tuple: (list of (x, y) to send, list of (index, (x, y), reasons) rejected)
+    """
+    if not targets:
+        return [], []
+    points = np.asarray(targets, dtype=np.float64).reshape(-1, 2)
+    ok, reasons = check_targets(points, z_values, table)
+
+    if mode == "clamp" and not ok.all():
+        clamped = clamp_targets(points, table)
+        shift = np.hypot(*(clamped - points).T)
+        clamp_ok, _ = check_targets(clamped, z_values, table)
+        use = ~ok & clamp_ok & (shift <= max_clamp_mm)
+        for i in np.flatnonzero(use):
+            print(f"Target {i} ({points[i, 0]:.1f}, {points[i, 1]:.1f}) {', '.join(reasons[i])}: "
+                  f"clamped by {shift[i]:.1f} mm to ({clamped[i, 0]:.1f}, {clamped[i, 1]:.1f})")
+        points = np.where(use[:, None], clamped, points)
+        ok = ok | use
+
+    accepted = [(float(x), float(y)) for x, y in points[ok]]
+    rejected = []
+    for i in np.flatnonzero(~ok):
+        target = (float(points[i, 0]), float(points[i, 1]))
+        rejected.append((int(i), target, reasons[i]))
+        print(f"Skipping target {i} ({target[0]:.1f}, {target[1]:.1f}): {', '.join(reasons[i])}")
+    return accepted, rejected
+
+
+def check_drop_locations(locations, z_values=None):
+    """
+    Check drop points (drop box, sorting bins) against the envelope
+
+    The table area does not apply, bins usually stand next to it. Only X/Y of
+    a location are visited, at the heights in z_values.
+
+    Args:
+        locations: list of [x, y, z]
+        z_values: heights visited at every drop point (e.g. (place_z, safe_z))
+
+    Returns:
+        list: (index, (x, y), reasons) for every unreachable drop point, empty if all are fine
+    """
+    if not locations:
+        return []
+    points = np.array([location[:2] for location in locations], dtype=np.float64)
+    ok, reasons = check_targets(points, z_values)
+    return [(int(i), (float(points[i, 0]), float(points[i, 1])), reasons[i]) for i in np.flatnonzero(~ok)]
@@ -7,13 +7,27 @@ from robot.dobot_controller import (
     WaitArrive,
     ControlDigitalOutput,
     GetCurrentPosition,
-    DisconnectRobot
+    DisconnectRobot,
+    StopFeedbackThread,
+    StartFeedRecorder,
+    telemetry
 )
-from time import sleep
+from robot.dobot_api import parse_reply
+from robot.supervisor import RobotSupervisor, RobotFault
+from robot.pipeline import PipelinedMove
+from robot.estop import EmergencyStopChannel
+from robot.gripper import GraspStats, VacuumGripper
+from robot.speed_profiles import get_preset, motion_params
+from utilites.metrics import SEGMENT, record_pick
+from utilites.trace import span
+from time import sleep, monotonic
 ROBOT_IP = "192.168.1.6"
 
 class DobotController:
-    def __init__(self, ip=ROBOT_IP):
+    def __init__(self, ip=ROBOT_IP, pipelined=False, supervised=False, queued_io=False, speed_preset=None,
+                 grasp_sensor_di=None, grasp_sensor_source="feed", record_feed=None, history=None):
+        if grasp_sensor_di is not None and not queued_io:
+            raise ValueError("Grasp checks need queued I/O (queued_io=True)")
         self.ip = ip
         self.safe_z = -75.0
         self.pick_z = -165.0
@@ -22,74 +36,304 @@ class DobotController:
 
         # drop box location (Coordinates)
         self.drop_location = [400, -125, -75]
-        self.dashboard, self.move, self.feed = ConnectRobot(ip=ROBOT_IP, timeout_s=5.0)
+        self.dashboard, self.move, self.feed = ConnectRobot(ip=self.ip, timeout_s=5.0)
         self.feed_thread = StartFeedbackThread(self.feed)
+        self.telemetry = telemetry
+        # raw feed frames to a ring file, so a failed pick's trajectory can be replayed (robot/recorder.py)
+        if record_feed:
+            StartFeedRecorder(record_feed)
+        # separate dashboard connection so a stop never waits behind another command
+        self.estop = EmergencyStopChannel(self.ip)
 
         #setup and enable robot (define the speed and acceleration ratio)
 
         SetupRobot(self.dashboard, speed_ratio=50, acc_ratio=50)
         print(f"Connecting the Dobot MG400 from Table 1 {self.ip}")
 
-    def pick_and_place(self, target_x, target_y):
+        # stream motion commands back-to-back instead of one round trip per command
+        self.pipeline = PipelinedMove(self.move) if pipelined else None
+
+        # per-phase speed/acc ratios (None: every move uses the global SpeedJ/SpeedL from SetupRobot)
+        self.speed_profiles = get_preset(speed_preset) if speed_preset else None
+
+        # queued_io: suction and blow-off attached to the motion as queue instructions (robot/gripper.py);
+        # off by default, the legacy sequence switches DOs from the dashboard with a 1 s sleep after each
+        # grasp_sensor_di: vacuum switch input checked after the lift (queued I/O only, None: no check)
+        self.gripper = VacuumGripper(self, sensor_di=grasp_sensor_di, sensor_source=grasp_sensor_source) if queued_io else None
+        self.grasp_stats = GraspStats()
+        self._grasp_attempts = None
+
+        # every pick cycle written to the SQLite history (utilites/history.py HistoryWriter, None: off)
+        self.history = history
+
+        # watch the feed for alarms / lost connections and recover automatically
+        self.last_completed_segment = None
+        self.supervisor = RobotSupervisor(self) if supervised else None
+
+    def pick_and_place(self, target_x, target_y, kind=None, drop_location=None, frame=None):
+        """
+        Pick the part at (target_x, target_y) and drop it at drop_location
+
+        Args:
+            kind: object type label used for the grasp statistics
+            drop_location: [x, y, z] for this part (e.g. its sorting bin), None for self.drop_location
+            frame: path of the camera frame the target came from, stored in the history
+
+        Returns:
+            bool: False if the grasp check failed and the place leg was skipped
+        """
+        started = monotonic()
+        self._grasp_attempts = None
+        try:
+            held = self._pick_and_place(target_x, target_y, kind, drop_location)
+        except Exception:
+            self._record_pick("failed", monotonic() - started, target_x, target_y, kind, drop_location, frame)
+            raise
+        self._record_pick("placed" if held else "missed", monotonic() - started,
+                          target_x, target_y, kind, drop_location, frame)
+        return held
+
+    def _record_pick(self, outcome, seconds, target_x, target_y, kind, drop_location, frame):
+        record_pick(outcome, seconds)
+        if self.history is not None:
+            self.history.record_pick(kind, (target_x, target_y), outcome, attempts=self._grasp_attempts,
+                                     duration_s=seconds, drop_location=drop_location or self.drop_location,
+                                     frame=frame)
+
+    def _pick_and_place(self, target_x, target_y, kind, drop_location):
         print(f"Starting pick and place at ({target_x:.1f}, {target_y:.1f})")
+        px, py, pz = drop_location if drop_location is not None else self.drop_location
 
-        print(f"Moving to Hover: {target_x, target_y, self.safe_z}")
-        MoveJ(self.move, [target_x, target_y, self.safe_z, self.safe_r])
-        sleep(1)
+        if self.gripper is not None:
+            pick = [
+                ("hover", lambda: self._move_j([target_x, target_y, self.safe_z, self.safe_r], "transfer")),
+                ("descend", lambda: self.gripper.descend_and_grip(target_x, target_y, self.pick_z, self.safe_r)),
+                ("lift", lambda: self._move_l([target_x, target_y, self.safe_z, self.safe_r], "retract")),
+            ]
+            place = [
+                ("transfer", lambda: self._move_j([px, py, self.safe_z, self.safe_r], "transfer")),
+                ("place", lambda: self.gripper.place_and_release(px, py, self.place_z, self.safe_r)),
+                ("retract", lambda: self.gripper.retract_with_blow_off(px, py, self.safe_z, self.safe_r)),
+                ("finish", self._wait_queue),
+            ]
+            self._run_segments(pick)
+            if self.gripper.verifies_grasp:
+                with span("segment.verify", cat="robot"):
+                    attempts, held = self._verify_grasp(target_x, target_y)
+                self._grasp_attempts = attempts
+                self.grasp_stats.record(kind, held, attempts)
+                if not held:
+                    # Nothing to carry, drop the suction and go straight to the next part
+                    self.gripper.release_all()
+                    print(f"Grasp failed after {attempts} attempt(s), skipping the place leg")
+                    return False
+            self._run_segments(place, first_index=len(pick))
+            print("Pick and place operation completed.....")
+            return True
 
-        print(f"Moving to Pick the object: {target_x, target_y, self.pick_z}")
-        MoveL(self.move, [target_x, target_y, self.pick_z, self.safe_r])
+        segments = [
+            ("hover", lambda: self._hover(target_x, target_y)),
+            ("descend", lambda: self._descend(target_x, target_y)),
+            ("grip", self._grip),
+            ("lift", lambda: self._lift(target_x, target_y)),
+            ("transfer", lambda: self._transfer(px, py)),
+            ("place", lambda: self._place(px, py)),
+            ("release", self._release),
+        ]
+        self._run_segments(segments)
+        print("Pick and place operation completed.....")
+        return True
 
-        arrived = True
-        if arrived:
-            print(f"Arrived at the pick location")
-            ControlDigitalOutput(self.dashboard, output_index=1, status=1)
-            sleep(1)
+    def _verify_grasp(self, target_x, target_y):
+        """
+        Check the vacuum sensor after the lift and re-pick on the spot if it reports no part
+
+        Returns:
+            tuple: (attempts made, part held)
+        """
+        attempts = 1
+        while not self.gripper.grasp_ok():
+            if attempts > self.gripper.grasp_retries:
+                return attempts, False
+            print(f"Grasp check failed, re-picking ({attempts}/{self.gripper.grasp_retries})")
+            attempts += 1
+            self.gripper.descend_and_grip(target_x, target_y, self.pick_z, self.safe_r)
+            self._move_l([target_x, target_y, self.safe_z, self.safe_r], "retract")
+        return attempts, True
+
+    def _run_segments(self, segments, max_retries=3, first_index=0):
+        """
+        Run pick/place segments in order. With a supervisor attached, a failed
+        segment waits for recovery and is retried, so the job resumes from the
+        last completed segment.
+        """
+        # Queued/pipelined segments return once the moves are sent, their duration says nothing about
+        # the motion, so only blocking segments go into the segment histogram
+        timed = self.gripper is None and self.pipeline is None
+        for index, (name, step) in enumerate(segments, start=first_index):
+            attempt = 0
+            while True:
+                if self.supervisor is not None:
+                    self.supervisor.wait_ready(timeout=120.0)
+                try:
+                    started = monotonic()
+                    with span(f"segment.{name}", cat="robot", attempt=attempt):
+                        step()
+                    if timed:
+                        SEGMENT.labels(segment=name).observe(monotonic() - started)
+                    self.last_completed_segment = (index, name)
+                    break
+                except (RobotFault, OSError) as e:
+                    if self.supervisor is None or attempt >= max_retries:
+                        raise
+                    attempt += 1
+                    self.supervisor.report_failure(f"{name}: {e}")
+                    print(f"Segment '{name}' failed, retrying after recovery ({attempt}/{max_retries})")
+
+    def _check(self, reply, name):
+        # Replies are only checked when supervised, unsupervised runs keep the old fire-and-forget behaviour
+        if self.supervisor is None or self.pipeline is not None:
+            return reply
+        parsed = parse_reply(reply or "")
+        if parsed.error_id != 0:
+            raise RobotFault(f"{name} rejected: {reply!r}")
+        return reply
+
+    def set_speed_preset(self, name):
+        """Switch the per-phase speed profiles to a named preset (see robot/speed_profiles.py)"""
+        self.speed_profiles = get_preset(name)
+
+    def _move_j(self, point, phase=None):
+        params = motion_params(self.speed_profiles, phase, linear=False)
+        if self.pipeline is not None:
+            return self.pipeline.MovJ(*point, *params)
+        return self._check(MoveJ(self.move, point, *params), "MovJ")
+
+    def _move_l(self, point, phase=None):
+        params = motion_params(self.speed_profiles, phase, linear=True)
+        if self.pipeline is not None:
+            return self.pipeline.MovL(*point, *params)
+        return self._check(MoveL(self.move, point, *params), "MovL")
 
-            current_pos = GetCurrentPosition()
+    def _settle(self):
+        # Blocking mode waits a fixed time after a move; pipelined mode keeps the queue full instead
+        if self.pipeline is None:
+            sleep(1)
 
-            print(f"Robot is at {current_pos}")
+    def _sync(self):
+        # Pipelined moves return immediately, wait for the queue before switching I/O
+        if self.pipeline is not None:
+            self.pipeline.Sync().result()
 
+    def _wait_queue(self):
+        # Everything above was queued; return once the controller has executed it
+        if self.pipeline is not None:
+            self.pipeline.Sync().result()
         else:
-            print("Failed to arrive")
+            self._check(self.move.Sync(), "Sync")
 
-        #lifting back to safe height
-        print("Lifting")
-        MoveL(self.move, [target_x, target_y, self.safe_z, self.safe_r])
+    def _digital_output(self, index, status):
+        with span("io.DO", cat="robot", index=index, status=status):
+            return self._check(ControlDigitalOutput(self.dashboard, output_index=index, status=status), "DO")
 
-        sleep(1)
+    def _hover(self, target_x, target_y):
+        print(f"Moving to Hover: {target_x, target_y, self.safe_z}")
+        self._move_j([target_x, target_y, self.safe_z, self.safe_r], "transfer")
+        self._settle()
 
-        #move to drop location
-        px, py, pz = self.drop_location
-        print(f"Moving to drop location: {self.drop_location}")
-        MoveJ(self.move, [px, py, self.safe_z, self.safe_r])
-        sleep(1)
+    def _descend(self, target_x, target_y):
+        print(f"Moving to Pick the object: {target_x, target_y, self.pick_z}")
+        self._move_l([target_x, target_y, self.pick_z, self.safe_r], "approach")
 
-        #descend to place the object
-        px, py, pz = self.drop_location
-        print(f"Moving to box {px, py, self.place_z}")
-        MoveL(self.move, [px, py, self.place_z, self.safe_r])
+    def _grip(self):
+        self._sync()
+        print(f"Arrived at the pick location")
+        self._digital_output(1, 1)
         sleep(1)
+        print(f"Robot is at {GetCurrentPosition()}")
 
+    def _lift(self, target_x, target_y):
+        print("Lifting")
+        self._move_l([target_x, target_y, self.safe_z, self.safe_r], "retract")
+        self._settle()
 
-        arrived = True
-        if arrived:
-            print(f"Move to drop location")
-
-        else:
-            print("Failed to arrive at the drop Location")
+    def _transfer(self, px, py):
+        print(f"Moving to drop location: {px, py}")
+        self._move_j([px, py, self.safe_z, self.safe_r], "transfer")
+        self._settle()
 
-        #turn off digital output to release the object
+    def _place(self, px, py):
+        print(f"Moving to box {px, py, self.place_z}")
+        self._move_l([px, py, self.place_z, self.safe_r], "place")
+        self._settle()
 
+    def _release(self):
+        self._sync()
         print("Releasing the object")
-        ControlDigitalOutput(self.dashboard, output_index=1, status=0)
-        ControlDigitalOutput(self.dashboard, output_index=2, status=1)
+        self._digital_output(1, 0)
+        self._digital_output(2, 1)
         sleep(1)
-        ControlDigitalOutput(self.dashboard, output_index=2, status=0)
+        self._digital_output(2, 0)
         sleep(1)
-        print("Pick and place operation completed.....")
 
+    def emergency_stop(self):
+        """
+        Stop the arm immediately from any thread
+
+        Returns:
+            float or None: stop-to-halt latency in seconds confirmed from the feed,
+            None if unconfirmed or the arm was already idle (estop.last_was_idle)
+        """
+        latency = self.estop.stop()
+        if latency is None and self.estop.last_was_idle:
+            print("Emergency stop sent, arm was already idle")
+        elif latency is None:
+            print("Emergency stop sent, halt not confirmed by feed")
+        else:
+            print(f"Emergency stop confirmed after {latency * 1000:.1f} ms")
+        return latency
+
+    @property
+    def stop_was_idle(self):
+        """True if the last emergency_stop() found the arm already idle (no latency measured)"""
+        return self.estop.last_was_idle
+
+    def reset(self):
+        """
+        Operator reset after an emergency stop or an alarm that needs an operator
+
+        Clears the alarm, re-enables the arm and lets the supervisor resume.
+        """
+        print("Resetting: clearing alarms and re-enabling the robot")
+        self.dashboard.ClearError()
+        sleep(0.5)
+        self.dashboard.EnableRobot()
+        sleep(1.0)
+        if self.supervisor is not None:
+            self.supervisor.acknowledge()
+
+    def reconnect(self):
+        """Drop and re-open all three connections, restart the feed and re-enable the robot"""
+        if self.pipeline is not None:
+            self.pipeline.close()
+        StopFeedbackThread(self.feed_thread)
+        for api in (self.dashboard, self.move, self.feed, self.estop):
+            try:
+                api.close()
+            except Exception:
+                pass
+        self.dashboard, self.move, self.feed = ConnectRobot(ip=self.ip, timeout_s=5.0)
+        self.estop = EmergencyStopChannel(self.ip)
+        self.feed_thread = StartFeedbackThread(self.feed)
+        SetupRobot(self.dashboard, speed_ratio=50, acc_ratio=50)
+        if self.pipeline is not None:
+            self.pipeline = PipelinedMove(self.move)
 
     def disconnect(self):
         print("Disconnecting")
+        if self.supervisor is not None:
+            self.supervisor.stop()
+        self.estop.close()
+        if self.pipeline is not None:
+            self.pipeline.close()
         DisconnectRobot(self.dashboard, self.move, self.feed, self.feed_thread)
@@ -0,0 +1,326 @@
+"""
+Cycle-time model for MG400 moves
+
+Estimates how long MovJ/MovL segments take from start pose, end pose and the
+speed/acceleration ratios, using a trapezoidal velocity profile. The default
+limits are the simulator's, NOT measured on an arm: absolute times are only
+as good as those guesses until fit_limits() retunes them from recorded feed
+data (e.g. TelemetryHub history). Relative comparisons (pick orderings,
+speed presets) are less sensitive to them.
+
+pick_and_place_time() models the gripper I/O of the sequence the controller
+actually runs: queued MovLIO switching (queued_io=True) costs one short
+vacuum dwell, the legacy dashboard DO sequence (the default) adds the fixed
+sleeps in robot/main.py, several seconds per pick. for_robot() builds a model
+matching a DobotController.
+
+Each estimate is a few arithmetic operations (microseconds); durations()
+scores whole arrays of segments at once with NumPy.
+
+Compare the speed presets on a random batch from the project root:
+    python -m robot.motion_model --parts 10
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from robot.speed_profiles import PRESETS, motion_params
+
+
+def trapezoid_duration(distance, v_max, a_max):
+    """Time to cover distance with a trapezoidal (or triangular) velocity profile"""
+    if distance <= 0:
+        return 0.0
+    if distance <= v_max * v_max / a_max:
+        return 2.0 * math.sqrt(distance / a_max)
+    return distance / v_max + v_max / a_max
+
+
+def trapezoid_fraction(t, distance, v_max, a_max):
+    """Fraction (0..1) of distance covered after t seconds"""
+    total = trapezoid_duration(distance, v_max, a_max)
+    if distance <= 0 or t >= total:
+        return 1.0
+    if t <= 0:
+        return 0.0
+    if distance <= v_max * v_max / a_max:
+        # Triangular profile, peak speed sqrt(d * a)
+        half = total / 2.0
+        if t <= half:
+            s = 0.5 * a_max * t * t
+        else:
+            td = total - t
+            s = distance - 0.5 * a_max * td * td
+    else:
+        t_acc = v_max / a_max
+        if t <= t_acc:
+            s = 0.5 * a_max * t * t
+        elif t <= total - t_acc:
+            s = 0.5 * v_max * t_acc + v_max * (t - t_acc)
+        else:
+            td = total - t
+            s = distance - 0.5 * a_max * td * td
+    return min(max(s / distance, 0.0), 1.0)
+
+
+def trapezoid_durations(distances, v_max, a_max):
+    """Vectorized trapezoid_duration over an array of distances"""
+    d = np.asarray(distances, dtype=np.float64)
+    v = np.asarray(v_max, dtype=np.float64)
+    a = np.asarray(a_max, dtype=np.float64)
+    triangular = d <= v * v / a
+    t = np.where(triangular, 2.0 * np.sqrt(np.maximum(d, 0) / a), d / v + v / a)
+    return np.where(d > 0, t, 0.0)
+
+
+def segment_distance(start, end):
+    """Path length used by the model: Cartesian distance, or the R change for pure rotations"""
+    dx, dy, dz = end[0] - start[0], end[1] - start[1], end[2] - start[2]
+    return max(math.sqrt(dx * dx + dy * dy + dz * dz), abs(end[3] - start[3]))
+
+
+class MotionModel:
+    """
+    Trapezoidal motion-time model
+
+    Args:
+        speed_j, speed_l, acc_j, acc_l: global ratios set by SetupRobot (1-100)
+        speed_factor: global SpeedFactor (1-100)
+        command_overhead: seconds added per motion command (network round trip, queueing)
+        queued_io: gripper I/O queued with the motion (DobotController queued_io=True)
+        pipelined: moves streamed through PipelinedMove (no fixed settle after each move)
+    """
+
+    # Limits at 100 %; MovJ is approximated in Cartesian space like the simulator.
+    # Untuned placeholders (the simulator's values), replace with fit_limits() results from the real arm.
+    V_MAX_L = 1000.0
+    A_MAX_L = 4000.0
+    V_MAX_J = 1500.0
+    A_MAX_J = 6000.0
+
+    # Fixed waits of the legacy DO sequence in robot/main.py
+    LEGACY_GRIP_S = 1.0  # _grip: after suction on
+    LEGACY_RELEASE_S = 2.0  # _release: blow-off pulse, then the wait after switching it off
+    LEGACY_SETTLE_S = 1.0  # _settle after hover, lift, transfer and place (blocking moves only)
+
+    def __init__(self, speed_j=50, speed_l=50, acc_j=50, acc_l=50, speed_factor=100, command_overhead=0.0,
+                 queued_io=False, pipelined=False):
+        self.speed_j = speed_j
+        self.speed_l = speed_l
+        self.acc_j = acc_j
+        self.acc_l = acc_l
+        self.speed_factor = speed_factor
+        self.command_overhead = command_overhead
+        self.queued_io = queued_io
+        self.pipelined = pipelined
+
+    @classmethod
+    def for_robot(cls, robot, **kwargs):
+        """Model matching a DobotController's I/O mode and motion pipelining"""
+        return cls(queued_io=robot.gripper is not None, pipelined=robot.pipeline is not None, **kwargs)
+
+    def settle_time(self):
+        """Fixed wait after a move before the next one starts (legacy blocking sequence only)"""
+        if self.queued_io or self.pipelined:
+            return 0.0
+        return self.LEGACY_SETTLE_S
+
+    def io_time(self, io_dwell=0.15):
+        """
+        Time per pick spent on gripper I/O outside the moves
+
+        Args:
+            io_dwell: queued wait for the vacuum after reaching the part (queued I/O)
+        """
+        if self.queued_io:
+            return io_dwell
+        # hover, lift, transfer and place each settle; descend does not
+        return self.LEGACY_GRIP_S + self.LEGACY_RELEASE_S + 4 * self.settle_time()
+
+    def limits(self, kind, speed=None, acc=None):
+        """(v_max, a_max) for kind "J" or "L" at the given ratios (defaults: global ratios)"""
+        factor = self.speed_factor / 100.0
+        if kind == "L":
+            v = self.V_MAX_L * (speed or self.speed_l) / 100.0 * factor
+            a = self.A_MAX_L * (acc or self.acc_l) / 100.0 * factor
+        else:
+            v = self.V_MAX_J * (speed or self.speed_j) / 100.0 * factor
+            a = self.A_MAX_J * (acc or self.acc_j) / 100.0 * factor
+        return max(v, 1e-3), max(a, 1e-3)
+
+    def segment_time(self, start, end, kind="J", speed=None, acc=None):
+        """
+        Estimated duration of one MovJ ("J") or MovL ("L") segment
+
+        Args:
+            start, end: [x, y, z, r] poses
+            kind: "J" or "L"
+            speed, acc: per-move ratios, None to use the global ratios
+        """
+        v, a = self.limits(kind, speed, acc)
+        return trapezoid_duration(segment_distance(start, end), v, a) + self.command_overhead
+
+    def durations(self, starts, ends, kind="J", speed=None, acc=None):
+        """Vectorized segment_time for (N, 4) arrays of start and end poses"""
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        linear = np.linalg.norm(ends[:, :3] - starts[:, :3], axis=1)
+        distances = np.maximum(linear, np.abs(ends[:, 3] - starts[:, 3]))
+        v, a = self.limits(kind, speed, acc)
+        return trapezoid_durations(distances, v, a) + self.command_overhead
+
+    def phase_ratios(self, profiles, phase, kind):
+        """(speed, acc) ratios of a phase in profiles, (None, None) to use the global ratios"""
+        params = motion_params(profiles, phase, linear=kind == "L")
+        if not params:
+            return None, None
+        return int(params[0].split("=")[1]), int(params[1].split("=")[1])
+
+    def pick_and_place_time(self, start_pose, target, drop_location, safe_z=-75.0, pick_z=-165.0,
+                            place_z=-125.0, r=0.0, profiles=None, io_dwell=0.15):
+        """
+        Estimated duration of one DobotController.pick_and_place
+
+        Args:
+            start_pose: [x, y, z, r] where the arm starts
+            target: (x, y) of the part
+            drop_location: [x, y, z] of the drop box
+            profiles: per-phase speed profiles (see robot/speed_profiles.py), None for global ratios
+            io_dwell: queued wait for the vacuum after reaching the part (queued I/O only, see io_time())
+
+        Returns:
+            tuple: (seconds, end pose)
+        """
+        tx, ty = target
+        px, py = drop_location[0], drop_location[1]
+        legs = [
+            ("J", "transfer", [tx, ty, safe_z, r]),
+            ("L", "approach", [tx, ty, pick_z, r]),
+            ("L", "retract", [tx, ty, safe_z, r]),
+            ("J", "transfer", [px, py, safe_z, r]),
+            ("L", "place", [px, py, place_z, r]),
+            ("L", "retract", [px, py, safe_z, r]),
+        ]
+        total = self.io_time(io_dwell)
+        pose = list(start_pose)
+        for kind, phase, end in legs:
+            speed, acc = self.phase_ratios(profiles, phase, kind)
+            total += self.segment_time(pose, end, kind, speed, acc)
+            pose = end
+        return total, pose
+
+    def batch_time(self, targets, start_pose, drop_location, **kwargs):
+        """
+        Estimated duration of picking targets in the given order
+
+        Returns:
+            float: seconds
+        """
+        total = 0.0
+        pose = list(start_pose)
+        for target in targets:
+            t, pose = self.pick_and_place_time(pose, target, drop_location, **kwargs)
+            total += t
+        return total
+
+    def fit_limits(self, segments, kind="J", speed=None, acc=None):
+        """
+        Fit V_MAX/A_MAX for one move kind from recorded segments
+
+        Args:
+            segments: list of (start_pose, end_pose, measured_seconds), e.g. from segments_from_samples()
+            kind: "J" or "L", the move type the segments were recorded with
+            speed, acc: ratios in effect while recording (None: global ratios)
+
+        Returns:
+            tuple: (v_max, a_max, rms error in seconds) at 100 %, also stored on the model
+        """
+        distances = np.array([segment_distance(s, e) for s, e, _ in segments])
+        measured = np.array([t for _, _, t in segments]) - self.command_overhead
+        v_scale, a_scale = (np.array(self.limits(kind, speed, acc)) /
+                            np.array(self.limits(kind, 100, 100)))
+
+        # Coarse log-spaced grid search, then one refinement around the best point
+        v_grid = np.geomspace(50, 5000, 60)
+        a_grid = np.geomspace(100, 50000, 60)
+        for _ in range(2):
+            V, A = np.meshgrid(v_grid, a_grid, indexing="ij")
+            pred = trapezoid_durations(distances[None, None, :], (V * v_scale)[..., None], (A * a_scale)[..., None])
+            rms = np.sqrt(np.mean((pred - measured[None, None, :]) ** 2, axis=2))
+            i, j = np.unravel_index(np.argmin(rms), rms.shape)
+            best_v, best_a, best_rms = V[i, j], A[i, j], rms[i, j]
+            v_grid = np.linspace(best_v * 0.85, best_v * 1.15, 30)
+            a_grid = np.linspace(best_a * 0.85, best_a * 1.15, 30)
+
+        if kind == "L":
+            self.V_MAX_L, self.A_MAX_L = float(best_v), float(best_a)
+        else:
+            self.V_MAX_J, self.A_MAX_J = float(best_v), float(best_a)
+        return float(best_v), float(best_a), float(best_rms)
+
+
+def segments_from_samples(samples, speed_threshold=2.0, min_duration=0.05):
+    """
+    Cut recorded telemetry samples into motion segments
+
+    A segment starts when the TCP speed rises above speed_threshold (mm/s) and
+    ends when it drops below it again.
+
+    Args:
+        samples: list of dicts with "time", "pose" and "tcp_speed" (TelemetryHub history)
+
+    Returns:
+        list: (start_pose, end_pose, seconds) tuples
+    """
+    segments = []
+    start = None
+    previous = None
+    for sample in samples:
+        moving = sample["tcp_speed"] > speed_threshold
+        if moving and start is None:
+            start = previous or sample
+        elif not moving and start is not None:
+            duration = sample["time"] - start["time"]
+            if duration >= min_duration:
+                segments.append((start["pose"], sample["pose"], duration))
+            start = None
+        previous = sample
+    return segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score speed presets with the cycle-time model")
+    parser.add_argument("--parts", type=int, default=10, help="Parts per random batch")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the part positions")
+    parser.add_argument("--queued-io", action="store_true", help="Model queued gripper I/O instead of the legacy DO sequence")
+    parser.add_argument("--pipelined", action="store_true", help="Model pipelined moves (no settle after each move)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    angles = rng.uniform(-0.6, 0.6, args.parts)
+    radii = rng.uniform(220, 360, args.parts)
+    targets = list(zip(radii * np.cos(angles), radii * np.sin(angles)))
+    start_pose = [300.0, 0.0, -75.0, 0.0]
+    drop_location = [400.0, -125.0, -75.0]
+
+    model = MotionModel(queued_io=args.queued_io, pipelined=args.pipelined)
+    print(f"I/O and settle time per pick: {model.io_time():.2f} s (motion limits untuned, simulator values)")
+    for name, profiles in PRESETS.items():
+        t0 = time.perf_counter()
+        total = model.batch_time(targets, start_pose, drop_location, profiles=profiles)
+        per_pick_us = (time.perf_counter() - t0) / max(args.parts, 1) * 1e6
+        print(f"{name:>9}: {total:6.2f} s for {args.parts} parts "
+              f"({total / max(args.parts, 1):.2f} s/part, estimated in {per_pick_us:.1f} us/part)")
+
+    # Reference cycle of the table in robot/speed_profiles.py
+    print("Reference cycle, part at (300, 0) starting from the drop point:")
+    for name, profiles in PRESETS.items():
+        cycle, _ = model.pick_and_place_time(drop_location + [0.0], (300.0, 0.0), drop_location, profiles=profiles)
+        print(f"{name:>9}: {cycle:5.2f} s")
+
+
+if __name__ == "__main__":
+    main()
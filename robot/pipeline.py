@@ -0,0 +1,153 @@
+"""
+Pipelined motion command client
+
+DobotApi.sendRecvMsg sends one command and blocks on its reply before the
+next one can go out, so every MovJ/MovL costs a full network round trip
+before the controller even sees the next instruction. PipelinedMove writes
+queued motion instructions back-to-back and matches the replies in order on
+a reader thread, returning a Future per command. The controller replies to a
+queued instruction as soon as it is accepted into its queue, so the queue
+stays full and there is no idle gap between segments.
+
+While a PipelinedMove is attached, do not call sendRecvMsg on the same
+DobotApiMove object: both would read from the same socket.
+"""
+
+import socket
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from robot.dobot_api import ReplyFramer
+
+
+class PipelinedMove:
+    """
+    Pipelined client on top of a connected DobotApiMove
+
+    Args:
+        move: connected DobotApiMove object (its socket is taken over)
+        max_in_flight: maximum number of commands sent but not yet answered
+    """
+
+    def __init__(self, move, max_in_flight=16):
+        self.move = move
+        self.sock = move.socket_dobot
+        self._pending = deque()
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._stop = threading.Event()
+        self._framer = ReplyFramer()
+
+        self.sock.settimeout(0.5)
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def submit(self, string):
+        """
+        Send one command without waiting for its reply
+
+        Args:
+            string: full command string, e.g. "MovJ(300,0,0,0)"
+
+        Returns:
+            Future: resolves to the reply string
+        """
+        if self._stop.is_set():
+            raise RuntimeError("Pipelined client is closed")
+        self._slots.acquire()
+        future = Future()
+        # Register and send under one lock so replies are matched in send order
+        with self._send_lock:
+            with self._pending_lock:
+                self._pending.append((string, future))
+            try:
+                self.move.log(f"Send to {self.move.ip}:{self.move.port}: {string}")
+                self.sock.sendall(string.encode("utf-8"))
+            except Exception as e:
+                with self._pending_lock:
+                    self._pending.remove((string, future))
+                self._slots.release()
+                future.set_exception(e)
+        return future
+
+    def _format(self, name, values, dynParams):
+        string = name + "(" + ",".join("{:f}".format(v) for v in values)
+        for params in dynParams:
+            string = string + "," + str(params)
+        return string + ")"
+
+    def MovJ(self, x, y, z, r, *dynParams):
+        return self.submit(self._format("MovJ", (x, y, z, r), dynParams))
+
+    def MovL(self, x, y, z, r, *dynParams):
+        return self.submit(self._format("MovL", (x, y, z, r), dynParams))
+
+    def MovJIO(self, x, y, z, r, *dynParams):
+        return self.submit(self._format("MovJIO", (x, y, z, r), dynParams))
+
+    def MovLIO(self, x, y, z, r, *dynParams):
+        return self.submit(self._format("MovLIO", (x, y, z, r), dynParams))
+
+    def RelMovJ(self, x, y, z, r, *dynParams):
+        return self.submit(self._format("RelMovJ", (x, y, z, r), dynParams))
+
+    def RelMovL(self, x, y, z, r, *dynParams):
+        return self.submit(self._format("RelMovL", (x, y, z, r), dynParams))
+
+    def Sync(self):
+        """Future that resolves once every queued instruction has been executed"""
+        return self.submit("Sync()")
+
+    def drain(self, timeout=None):
+        """Wait until every command sent so far has been answered"""
+        with self._pending_lock:
+            futures = [f for _, f in self._pending]
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def in_flight(self):
+        with self._pending_lock:
+            return len(self._pending)
+
+    def close(self):
+        """Stop the reader thread and fail any unanswered commands"""
+        self._stop.set()
+        self._reader.join(timeout=2.0)
+        self._fail_pending(ConnectionError("Pipelined client closed"))
+
+    def _fail_pending(self, error):
+        with self._pending_lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+            self._slots.release()
+
+    def _read_loop(self):
+        while not self._stop.is_set():
+            try:
+                data = self.sock.recv(1024)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if not self._stop.is_set():
+                    print(f"Pipelined reader error: {e}")
+                    self._fail_pending(e)
+                break
+            if not data:
+                self._fail_pending(ConnectionError("Move socket closed by controller"))
+                break
+
+            # Replies are terminated by ';', recv() may return several or a partial one
+            for reply in self._framer.feed(data):
+                self.move.log(f"Receive from {self.move.ip}:{self.move.port}: {reply}")
+                with self._pending_lock:
+                    if not self._pending:
+                        print(f"Unexpected reply: {reply}")
+                        continue
+                    _, future = self._pending.popleft()
+                self._slots.release()
+                future.set_result(reply)
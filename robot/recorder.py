@@ -0,0 +1,273 @@
+"""
+Feed recorder and replay
+
+FeedRecorder appends every raw 1440-byte feedback frame, with its stamp on
+the shared clock, to a preallocated memory-mapped ring file. A write is two
+slice copies into the mapping and a header update, cheap enough to leave on
+at 125 Hz; the OS flushes the pages in the background. When the file is
+full the oldest frames are overwritten.
+
+FeedRecording maps a file back as a NumPy structured array (stamp + MyType
+frame) without copying, and ReplayFeed plays recorded frames through
+GetFeed, so telemetry, pose history and status flags behave as they did on
+the real robot (for offline debugging and tests).
+
+File layout: 64-byte header, then capacity records of RECORD_DTYPE.
+
+Run from the project root:
+    python -m robot.recorder info outputs/feed.ring
+    python -m robot.recorder replay outputs/feed.ring --speed 2
+"""
+
+import argparse
+import mmap
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from robot.dobot_api import MyType
+
+MAGIC = b"MG4FEED1"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQd")  # magic, version, record size, capacity, frames written, created (unix time)
+HEADER_SIZE = 64
+FRAME_SIZE = MyType.itemsize
+RECORD_DTYPE = np.dtype([("stamp", "<f8"), ("frame", MyType)])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+
+# 10 minutes at 125 Hz, about 109 MB
+DEFAULT_CAPACITY = 125 * 600
+
+
+class FeedRecorder:
+    """
+    Appends raw feed frames to a memory-mapped ring file
+
+    Args:
+        path: ring file, created (and preallocated) if missing or a different size
+        capacity: number of frames the ring holds
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity * RECORD_SIZE
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        existing = os.path.exists(path) and os.path.getsize(path) == size
+        self._file = open(path, "r+b" if existing else "w+b")
+        if not existing:
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+
+        self.written = 0
+        if existing:
+            magic, version, record_size, file_capacity, written, _ = HEADER.unpack_from(self._mm, 0)
+            if magic == MAGIC and record_size == RECORD_SIZE and file_capacity == capacity:
+                self.written = written  # continue the existing recording
+        self._created = time.time()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._write_header()
+
+    def _write_header(self):
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, RECORD_SIZE, self.capacity, self.written, self._created)
+
+    def write(self, frame, stamp):
+        """
+        Append one raw frame
+
+        Args:
+            frame: 1440 bytes as received from port 30004
+            stamp: frame time on the shared clock
+        """
+        if len(frame) != FRAME_SIZE:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            offset = HEADER_SIZE + (self.written % self.capacity) * RECORD_SIZE
+            struct.pack_into("<d", self._mm, offset, stamp)
+            self._mm[offset + 8:offset + RECORD_SIZE] = frame
+            self.written += 1
+            # Only the counter changes, the rest of the header stays valid
+            struct.pack_into("<Q", self._mm, 24, self.written)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+
+
+class FeedRecording:
+    """
+    A ring file mapped read-only
+
+    records is a zero-copy RECORD_DTYPE view in storage order; chunks() gives
+    the same data as one or two views in chronological order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, capacity, written, created = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a feed recording")
+        if record_size != RECORD_SIZE:
+            raise ValueError(f"{path} has {record_size}-byte records, expected {RECORD_SIZE}")
+        self.capacity = capacity
+        self.written = written
+        self.created = created
+        self.records = np.frombuffer(self._mm, dtype=RECORD_DTYPE, count=capacity, offset=HEADER_SIZE)
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def chunks(self):
+        """Chronological views (no copy): one before the ring wrapped, two after"""
+        if self.written <= self.capacity:
+            return [self.records[:self.written]]
+        start = self.written % self.capacity
+        return [self.records[start:], self.records[:start]]
+
+    def ordered(self):
+        """All records in chronological order (a copy once the ring has wrapped)"""
+        chunks = self.chunks()
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    def frames(self):
+        """MyType frames in chronological order"""
+        return self.ordered()["frame"]
+
+    def stamps(self):
+        return self.ordered()["stamp"]
+
+    def close(self):
+        """Unmap the file; views still referenced elsewhere keep the mapping alive until they are freed"""
+        self.records = None
+        try:
+            self._mm.close()
+        except BufferError:
+            # frombuffer views (records, chunks(), an unwrapped ordered()) still exist, leave the unmap to GC
+            pass
+        self._file.close()
+
+
+class _ReplaySocket:
+    """The part of a socket GetFeed uses, serving recorded frames with their original timing"""
+
+    def __init__(self, records, speed, loop):
+        self._records = records
+        self._speed = speed
+        self._loop = loop
+        self._timeout = None
+        self._index = 0
+        self._pending = b""
+        self._start = None
+        self.closed = False
+
+    def settimeout(self, timeout):
+        self._timeout = timeout
+
+    def recv(self, n):
+        if self.closed:
+            raise OSError("Replay closed")
+        if not self._pending:
+            if self._index >= len(self._records):
+                if not self._loop or not len(self._records):
+                    # Same as a silent robot: let GetFeed time out and check its stop flag
+                    time.sleep(self._timeout or 0.1)
+                    raise socket.timeout()
+                self._index = 0
+                self._start = None
+            record = self._records[self._index]
+            if self._start is None:
+                self._start = (time.monotonic(), float(record["stamp"]))
+            due = self._start[0] + (float(record["stamp"]) - self._start[1]) / self._speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._pending = record["frame"].tobytes()
+            self._index += 1
+        data, self._pending = self._pending[:n], self._pending[n:]
+        return data
+
+    def close(self):
+        self.closed = True
+
+
+class ReplayFeed:
+    """
+    Stand-in for the feed DobotApi that replays a recording
+
+    Use it wherever the feed connection goes:
+        feed_thread = StartFeedbackThread(ReplayFeed("outputs/feed.ring"))
+
+    Args:
+        path: ring file written by FeedRecorder
+        speed: playback speed factor (2.0 = twice as fast)
+        loop: start again from the first frame at the end
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.recording = FeedRecording(path)
+        self.socket_dobot = _ReplaySocket(self.recording.ordered(), speed, loop)
+
+    def close(self):
+        self.socket_dobot.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a feed recording")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Show what a recording contains")
+    info.add_argument("path")
+    replay = sub.add_parser("replay", help="Play a recording through GetFeed and print telemetry")
+    replay.add_argument("path")
+    replay.add_argument("--speed", type=float, default=1.0, help="Playback speed factor")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        recording = FeedRecording(args.path)
+        stamps = recording.stamps()
+        count = len(stamps)
+        print(f"{args.path}: {len(recording)} frames (capacity {recording.capacity}, {recording.written} written)")
+        if count > 1:
+            duration = float(stamps[-1] - stamps[0])
+            print(f"Duration {duration:.1f}s, {(count - 1) / max(duration, 1e-9):.1f} frames/s")
+            poses = recording.frames()["tool_vector_actual"]
+            print(f"First pose {poses[0][:4]}, last pose {poses[-1][:4]}")
+            del poses
+        # the views point into the mapping, drop them before unmapping
+        del stamps
+        recording.close()
+        return
+
+    from robot.dobot_controller import StartFeedbackThread, StopFeedbackThread, telemetry
+
+    feed = ReplayFeed(args.path, speed=args.speed)
+    telemetry.subscribe(lambda sample: print(f"{sample['time']:.3f} pose {sample['pose']} speed {sample['tcp_speed']:.1f}"))
+    feed_thread = StartFeedbackThread(feed)
+    try:
+        while feed.socket_dobot._index < len(feed.recording):
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        StopFeedbackThread(feed_thread)
+        feed.close()
+
+
+if __name__ == "__main__":
+    main()
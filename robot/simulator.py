@@ -0,0 +1,556 @@
+"""
+Local MG400 protocol simulator
+
+Stand-in for a physical Dobot MG400 so robot/dobot_api.py and
+robot/dobot_controller.py can run end to end without an arm. It listens on
+the dashboard (29999), move (30003) and feedback (30004) ports, answers
+commands in the controller's "ErrorID,{values},Command();" format and streams
+1440-byte MyType frames at 125 Hz.
+
+Motion is a simple timed model: queued MovJ/MovL targets are executed one
+after another with a trapezoidal velocity profile scaled by the configured
+speed/acceleration ratios, and tool_vector_actual is interpolated along the
+way. isRunQueuedCmd/RunningStatus are set while the queue is busy.
+
+Run from the project root, then connect with DobotController(ip="127.0.0.1"):
+    python -m robot.simulator
+"""
+
+import argparse
+import math
+import re
+import socket
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from robot.dobot_api import MyType
+from robot.kinematics import MAX_REACH, MIN_REACH, Z_MAX, Z_MIN, joint_angles
+from robot.motion_model import MotionModel, trapezoid_duration, trapezoid_fraction
+
+DASHBOARD_PORT = 29999
+MOVE_PORT = 30003
+FEED_PORT = 30004
+FEED_PERIOD = 0.008  # 125 Hz
+TEST_VALUE = 0x123456789abcdef
+
+# Robot modes as reported by RobotMode()
+MODE_DISABLED = 4
+MODE_ENABLED = 5
+MODE_RUNNING = 7
+MODE_ERROR = 9
+MODE_PAUSED = 10
+
+ALARM_OUT_OF_RANGE = 22
+
+_KEYWORD = re.compile(r"^\s*(\w+)\s*=\s*(.+?)\s*$")
+
+
+def split_commands(buffer):
+    """
+    Split a byte/str buffer into complete "Name(args)" commands
+
+    Returns:
+        tuple: (list of (name, args_string, raw_command), remaining buffer)
+    """
+    commands = []
+    i = 0
+    n = len(buffer)
+    while i < n:
+        start = buffer.find("(", i)
+        if start < 0:
+            break
+        depth = 0
+        end = -1
+        for j in range(start, n):
+            if buffer[j] == "(":
+                depth += 1
+            elif buffer[j] == ")":
+                depth -= 1
+                if depth == 0:
+                    end = j
+                    break
+        if end < 0:
+            break
+        name = buffer[i:start].strip().strip(";").strip()
+        commands.append((name, buffer[start + 1:end], buffer[i:end + 1].strip().strip(";").strip()))
+        i = end + 1
+    return commands, buffer[i:]
+
+
+def split_args(args):
+    """Split a comma separated argument string at top level (ignores commas inside brackets)"""
+    parts, depth, current = [], 0, ""
+    for ch in args:
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+class _Segment:
+    """One queued motion, evaluated in closed form so the feed never waits for the motion thread"""
+
+    def __init__(self, start, end, v_max, a_max):
+        self.start = np.array(start, dtype=np.float64)
+        self.end = np.array(end, dtype=np.float64)
+        self.distance = float(np.linalg.norm(self.end[:3] - self.start[:3]))
+        # Pure rotations still take time
+        self.distance = max(self.distance, abs(self.end[3] - self.start[3]))
+        self.v_max = v_max
+        self.a_max = a_max
+        self.duration = trapezoid_duration(self.distance, v_max, a_max)
+        self.t0 = None
+
+    def pose_at(self, now):
+        if self.t0 is None:
+            return self.start.copy()
+        f = trapezoid_fraction(now - self.t0, self.distance, self.v_max, self.a_max)
+        return self.start + (self.end - self.start) * f
+
+
+class MG400Simulator:
+    """
+    Simulated MG400 controller
+
+    Args:
+        host: address to listen on (use 127.0.0.1, or another loopback address to run several)
+        start_pose: initial [x, y, z, r]
+        time_scale: >1 runs motions faster than real time (for quick tests)
+        reply_delay: artificial processing delay added to every reply, in seconds
+    """
+
+    # Linear (MovL) and joint (MovJ, approximated in Cartesian space) limits at 100 %
+    V_MAX_L = MotionModel.V_MAX_L
+    A_MAX_L = MotionModel.A_MAX_L
+    V_MAX_J = MotionModel.V_MAX_J
+    A_MAX_J = MotionModel.A_MAX_J
+
+    def __init__(self, host="127.0.0.1", start_pose=(300.0, 0.0, 0.0, 0.0), time_scale=1.0, reply_delay=0.0):
+        self.host = host
+        self.time_scale = time_scale
+        self.reply_delay = reply_delay
+
+        self._lock = threading.Lock()
+        self._queue_cond = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._threads = []
+        self._servers = []
+
+        self.pose = np.array(start_pose, dtype=np.float64)
+        self.enabled = False
+        self.error_ids = []
+        self.paused = False
+        self.speed_factor = 100
+        self.speed_j = 50
+        self.speed_l = 50
+        self.acc_j = 50
+        self.acc_l = 50
+        self.digital_outputs = 0
+        self.digital_inputs = 0
+        self.tool_outputs = 0
+        self.queue = deque()
+        self.active = None
+        self.started_at = time.monotonic()
+        self.command_log = deque(maxlen=1000)
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self):
+        for port, handler in ((DASHBOARD_PORT, self._serve_dashboard),
+                              (MOVE_PORT, self._serve_move),
+                              (FEED_PORT, self._serve_feed)):
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((self.host, port))
+            server.listen(8)
+            server.settimeout(0.2)
+            self._servers.append(server)
+            self._spawn(self._accept_loop, server, handler)
+        self._spawn(self._motion_loop)
+        print(f"MG400 simulator listening on {self.host} (29999/30003/30004)")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._queue_cond:
+            self._queue_cond.notify_all()
+        for server in self._servers:
+            server.close()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _accept_loop(self, server, handler):
+        while not self._stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._spawn(handler, conn)
+
+    # ------------------------------------------------------------------ state helpers
+
+    def set_digital_input(self, index, value):
+        """Drive a simulated DI (1 based) for tests, e.g. a vacuum sensor"""
+        with self._lock:
+            if value:
+                self.digital_inputs |= 1 << (index - 1)
+            else:
+                self.digital_inputs &= ~(1 << (index - 1))
+
+    def raise_alarm(self, alarm_id):
+        """Put the controller in error state, as a collision or limit alarm would"""
+        with self._queue_cond:
+            self.error_ids.append(alarm_id)
+            self._abort_motion_locked()
+
+    def current_pose(self):
+        with self._lock:
+            return self._pose_locked(time.monotonic())
+
+    def robot_mode(self):
+        with self._lock:
+            return self._mode_locked()
+
+    def _pose_locked(self, now):
+        if self.active is not None:
+            return self.active.pose_at(now)
+        return self.pose.copy()
+
+    def _mode_locked(self):
+        if self.error_ids:
+            return MODE_ERROR
+        if not self.enabled:
+            return MODE_DISABLED
+        if self.paused:
+            return MODE_PAUSED
+        if self.active is not None or self.queue:
+            return MODE_RUNNING
+        return MODE_ENABLED
+
+    def _abort_motion_locked(self):
+        if self.active is not None:
+            self.pose = self.active.pose_at(time.monotonic())
+            self.active = None
+        self.queue.clear()
+        self._queue_cond.notify_all()
+
+    def _joint_angles(self, pose):
+        return list(joint_angles(pose[:4])) + [0.0, 0.0]
+
+    # ------------------------------------------------------------------ motion
+
+    def _limits(self, kind, speed=None, acc=None):
+        factor = self.speed_factor / 100.0 * self.time_scale
+        if kind == "L":
+            v = self.V_MAX_L * (speed or self.speed_l) / 100.0 * factor
+            a = self.A_MAX_L * (acc or self.acc_l) / 100.0 * factor * self.time_scale
+        else:
+            v = self.V_MAX_J * (speed or self.speed_j) / 100.0 * factor
+            a = self.A_MAX_J * (acc or self.acc_j) / 100.0 * factor * self.time_scale
+        return max(v, 1e-3), max(a, 1e-3)
+
+    def _out_of_range(self, target):
+        radius = math.hypot(target[0], target[1])
+        return not (MIN_REACH <= radius <= MAX_REACH and Z_MIN <= target[2] <= Z_MAX)
+
+    def _motion_loop(self):
+        while not self._stop.is_set():
+            with self._queue_cond:
+                while not self._stop.is_set() and (not self.queue or self.paused or self.error_ids):
+                    self._queue_cond.wait(0.05)
+                if self._stop.is_set():
+                    break
+                item = self.queue.popleft()
+
+                if item[0] == "move":
+                    _, target, kind, speed, acc = item
+                    v, a = self._limits(kind, speed, acc)
+                    segment = _Segment(self.pose, target, v, a)
+                    segment.t0 = time.monotonic()
+                    self.active = segment
+                elif item[0] == "do":
+                    _, index, status, tool = item
+                    self._set_output_locked(index, status, tool)
+                    self._queue_cond.notify_all()
+                    continue
+                elif item[0] == "wait":
+                    segment = _Segment(self.pose, self.pose, 1.0, 1.0)
+                    segment.duration = item[1] / 1000.0 / self.time_scale
+                    segment.t0 = time.monotonic()
+                    self.active = segment
+
+            while not self._stop.is_set():
+                with self._queue_cond:
+                    if self.active is not segment:
+                        break  # aborted by stop/alarm
+                    if time.monotonic() - segment.t0 >= segment.duration:
+                        self.pose = segment.end.copy()
+                        self.active = None
+                        self._queue_cond.notify_all()
+                        break
+                time.sleep(0.001)
+
+    def _set_output_locked(self, index, status, tool=False):
+        bit = 1 << (index - 1)
+        if tool:
+            self.tool_outputs = (self.tool_outputs | bit) if status else (self.tool_outputs & ~bit)
+        else:
+            self.digital_outputs = (self.digital_outputs | bit) if status else (self.digital_outputs & ~bit)
+
+    def _queue_locked(self, item):
+        self.queue.append(item)
+        self._queue_cond.notify_all()
+
+    def _wait_idle(self):
+        with self._queue_cond:
+            while not self._stop.is_set() and (self.queue or self.active is not None) and not self.error_ids:
+                self._queue_cond.wait(0.05)
+
+    # ------------------------------------------------------------------ command handling
+
+    def _reply(self, error_id, values, raw):
+        return f"{error_id},{{{values}}},{raw};"
+
+    def handle_command(self, name, args, raw):
+        """Execute one command and return the reply string"""
+        self.command_log.append((time.monotonic(), raw))
+        params = split_args(args)
+        positional = [p for p in params if not _KEYWORD.match(p)]
+        keywords = {m.group(1): m.group(2) for m in (_KEYWORD.match(p) for p in params) if m}
+
+        if name == "Sync" or name == "SyncAll":
+            self._wait_idle()
+            return self._reply(0, "", raw)
+
+        with self._queue_cond:
+            blocked = bool(self.error_ids) or not self.enabled
+
+            if name == "EnableRobot":
+                if self.error_ids:
+                    return self._reply(-1, "", raw)
+                self.enabled = True
+                return self._reply(0, "", raw)
+            if name == "DisableRobot":
+                self.enabled = False
+                self._abort_motion_locked()
+                return self._reply(0, "", raw)
+            if name == "ClearError":
+                self.error_ids = []
+                return self._reply(0, "", raw)
+            if name in ("ResetRobot", "StopScript"):
+                self._abort_motion_locked()
+                return self._reply(0, "", raw)
+            if name == "EmergencyStop":
+                self._abort_motion_locked()
+                self.enabled = False
+                self.error_ids.append(-1)
+                return self._reply(0, "", raw)
+            if name in ("pause", "PauseScript"):
+                self.paused = True
+                return self._reply(0, "", raw)
+            if name in ("continue", "ContinueScript"):
+                self.paused = False
+                self._queue_cond.notify_all()
+                return self._reply(0, "", raw)
+
+            if name in ("SpeedFactor", "SpeedJ", "SpeedL", "AccJ", "AccL"):
+                value = int(float(positional[0]))
+                attr = {"SpeedFactor": "speed_factor", "SpeedJ": "speed_j", "SpeedL": "speed_l",
+                        "AccJ": "acc_j", "AccL": "acc_l"}[name]
+                setattr(self, attr, max(1, min(100, value)))
+                return self._reply(0, "", raw)
+
+            if name == "RobotMode":
+                return self._reply(0, self._mode_locked(), raw)
+            if name == "GetErrorID":
+                return self._reply(0, "[[" + ",".join(str(e) for e in self.error_ids) + "],[],[],[],[],[]]", raw)
+            if name == "GetPose":
+                pose = self._pose_locked(time.monotonic())
+                return self._reply(0, ",".join(f"{v:f}" for v in list(pose) + [0.0, 0.0]), raw)
+            if name == "GetAngle":
+                angles = self._joint_angles(self._pose_locked(time.monotonic()))
+                return self._reply(0, ",".join(f"{v:f}" for v in angles), raw)
+            if name in ("DI", "ToolDI"):
+                index = int(positional[0])
+                return self._reply(0, (self.digital_inputs >> (index - 1)) & 1, raw)
+            if name in ("DOExecute", "ToolDOExecute"):
+                self._set_output_locked(int(positional[0]), int(positional[1]), tool=name == "ToolDOExecute")
+                return self._reply(0, "", raw)
+            if name in ("DO", "ToolDO"):
+                if blocked:
+                    return self._reply(-1, "", raw)
+                self._queue_locked(("do", int(positional[0]), int(positional[1]), name == "ToolDO"))
+                return self._reply(0, "", raw)
+            if name == "DOGroup":
+                values = [int(float(p)) for p in positional]
+                for index, status in zip(values[0::2], values[1::2]):
+                    self._set_output_locked(index, status)
+                return self._reply(0, "", raw)
+            if name == "wait":
+                self._queue_locked(("wait", float(positional[0])))
+                return self._reply(0, "", raw)
+
+            if name in ("MovJ", "MovL", "MovJIO", "MovLIO", "RelMovJ", "RelMovL", "JointMovJ"):
+                if blocked:
+                    return self._reply(-1, "", raw)
+                values = [float(p) for p in positional[:4]]
+                if name.startswith("Rel"):
+                    last = self.queue[-1][1] if self.queue and self.queue[-1][0] == "move" else self._pose_locked(time.monotonic())
+                    target = np.array(last[:4]) + np.array(values)
+                elif name == "JointMovJ":
+                    # Joint targets are not modelled, treat J1 as the base angle at the current radius
+                    pose = self._pose_locked(time.monotonic())
+                    radius = math.hypot(pose[0], pose[1])
+                    j1 = math.radians(values[0])
+                    target = np.array([radius * math.cos(j1), radius * math.sin(j1), pose[2], values[3] + values[0]])
+                else:
+                    target = np.array(values)
+                if self._out_of_range(target):
+                    self.error_ids.append(ALARM_OUT_OF_RANGE)
+                    self._abort_motion_locked()
+                    return self._reply(0, "", raw)
+                kind = "L" if "MovL" in name else "J"
+                speed = keywords.get("SpeedJ") or keywords.get("SpeedL")
+                acc = keywords.get("AccJ") or keywords.get("AccL")
+                self._queue_locked(("move", target, kind,
+                                    int(float(speed)) if speed else None,
+                                    int(float(acc)) if acc else None))
+                # IO triggers of MovJIO/MovLIO: (Mode,Distance,Index,Status), simplified to fire at the end of the motion
+                for p in positional[4:]:
+                    io = [int(float(v)) for v in p.strip("()").split(",") if v.strip()]
+                    if len(io) == 4:
+                        self._queue_locked(("do", io[2], io[3], False))
+                return self._reply(0, "", raw)
+
+        # Everything else (PayLoad, User, Tool, CP, Arch, LimZ, ...) is accepted without effect
+        return self._reply(0, "", raw)
+
+    def _serve_commands(self, conn):
+        buffer = ""
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn.settimeout(0.2)
+                    data = conn.recv(4096)
+                except socket.timeout:
+                    continue
+                if not data:
+                    break
+                buffer += data.decode("utf-8", errors="replace")
+                commands, buffer = split_commands(buffer)
+                for name, args, raw in commands:
+                    try:
+                        reply = self.handle_command(name, args, raw)
+                    except Exception as e:
+                        print(f"Simulator failed to handle {raw}: {e}")
+                        reply = self._reply(-10000, "", raw)
+                    if self.reply_delay:
+                        time.sleep(self.reply_delay)
+                    conn.sendall(reply.encode("utf-8"))
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    _serve_dashboard = _serve_commands
+    _serve_move = _serve_commands
+
+    # ------------------------------------------------------------------ feedback
+
+    def build_frame(self):
+        """Return one MyType frame (length-1 structured array) describing the current state"""
+        frame = np.zeros(1, dtype=MyType)
+        now = time.monotonic()
+        with self._lock:
+            pose = self._pose_locked(now)
+            moving = self.active is not None or bool(self.queue)
+            mode = self._mode_locked()
+            speed = 0.0
+            if self.active is not None and self.active.distance > 0:
+                dt = 0.004
+                speed = float(np.linalg.norm((self.active.pose_at(now) - self.active.pose_at(now - dt))[:3]) / dt)
+            frame["len"] = MyType.itemsize
+            frame["digital_input_bits"] = self.digital_inputs
+            frame["digital_outputs"] = self.digital_outputs
+            frame["robot_mode"] = mode
+            frame["controller_timer"] = int((now - self.started_at) * 1000)
+            frame["test_value"] = TEST_VALUE
+            frame["speed_scaling"] = self.speed_factor
+            frame["EnableStatus"] = 1 if self.enabled else 0
+            frame["ErrorStatus"] = 1 if self.error_ids else 0
+            frame["isRunQueuedCmd"] = 1 if moving else 0
+            frame["isPauseCmdFlag"] = 1 if self.paused else 0
+            frame["RunningStatus"] = 1 if moving and not self.paused else 0
+            frame["velocityRatio"] = self.speed_factor
+
+        tool_vector = np.zeros(6)
+        tool_vector[:4] = pose[:4]
+        frame["tool_vector_actual"] = tool_vector
+        frame["Tool_vector_target"] = tool_vector
+        frame["q_actual"] = self._joint_angles(pose)
+        frame["TCP_speed_actual"] = [speed, 0, 0, 0, 0, 0]
+        frame["motor_temperatures"] = [35.0, 36.0, 36.0, 34.0, 0.0, 0.0]
+        frame["i_actual"] = [0.4 + speed / 1000.0] * 4 + [0.0, 0.0]
+        return frame
+
+    def _serve_feed(self, conn):
+        next_time = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                conn.sendall(self.build_frame().tobytes())
+                next_time += FEED_PERIOD
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.monotonic()
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Dobot MG400 protocol simulator")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Run motions this many times faster than real time")
+    parser.add_argument("--reply-delay", type=float, default=0.0, help="Extra delay before each reply, in seconds")
+    args = parser.parse_args()
+
+    sim = MG400Simulator(host=args.host, time_scale=args.time_scale, reply_delay=args.reply_delay).start()
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Multi-bin sorting
+
+Bins are configured per color and shape class from the Detector output and
+can be duplicated across the table. plan_sort() decides the pick order and
+the bin for every part together, so the total XY travel (pick -> bin -> next
+pick -> ...) is as short as possible; each part goes to the matching bin that
+best fits between its pick and the next one.
+
+Bin file (JSON):
+    {"bins": [
+        {"name": "red-left", "location": [400, -125, -75], "color": "red", "shape": "any"},
+        {"name": "red-right", "location": [400, 125, -75], "color": "red", "shape": "any"},
+        {"name": "rest", "location": [250, -250, -75]}
+    ]}
+"color"/"shape" default to "any"; a part goes to the most specific matching
+bins (color and shape, then one of them, then catch-all bins).
+"""
+
+import json
+
+import numpy as np
+
+
+class Bin:
+    """
+    Args:
+        name: label shown in logs
+        location: [x, y, z] drop point
+        color: Detector color name or "any"
+        shape: Detector shape name or "any"
+    """
+
+    def __init__(self, name, location, color="any", shape="any"):
+        self.name = name
+        self.location = [float(v) for v in location]
+        self.color = color
+        self.shape = shape
+
+    def specificity(self, color, shape):
+        """Match score for a part: 3 exact, 2 color only, 1 shape only, 0 catch-all, None no match"""
+        if self.color not in ("any", color) or self.shape not in ("any", shape):
+            return None
+        return 2 * (self.color != "any") + (self.shape != "any")
+
+    def __repr__(self):
+        return f"Bin({self.name!r}, {self.location}, color={self.color!r}, shape={self.shape!r})"
+
+
+def load_bins(path):
+    """
+    Load bins from a JSON file
+
+    Returns:
+        list: Bin objects
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    bins = [Bin(b.get("name", f"bin {i}"), b["location"], b.get("color", "any"), b.get("shape", "any"))
+            for i, b in enumerate(data["bins"])]
+    if not bins:
+        raise ValueError(f"No bins configured in {path}")
+    return bins
+
+
+def matching_bins(bins, color, shape):
+    """Indices of the most specific bins accepting a part (empty if none accepts it)"""
+    scores = [b.specificity(color, shape) for b in bins]
+    valid = [s for s in scores if s is not None]
+    if not valid:
+        return []
+    best = max(valid)
+    return [i for i, s in enumerate(scores) if s == best]
+
+
+class SortPlan:
+    """Ordered picks with their bins; travel_mm is the planned XY travel"""
+
+    def __init__(self, picks, unsorted, travel_mm):
+        # picks: list of (x, y, kind, Bin); unsorted: list of (x, y, kind) no bin accepts
+        self.picks = picks
+        self.unsorted = unsorted
+        self.travel_mm = travel_mm
+
+    @property
+    def targets(self):
+        return [(x, y) for x, y, _, _ in self.picks]
+
+    @property
+    def kinds(self):
+        return [kind for _, _, kind, _ in self.picks]
+
+    @property
+    def drop_locations(self):
+        return [list(b.location) for _, _, _, b in self.picks]
+
+
+def _route_cost(order, start, targets, bin_xy, candidates):
+    """Travel for a pick order with the best bin per leg; returns (cost, chosen bin per pick)"""
+    cost = 0.0
+    position = start
+    chosen = []
+    for k, i in enumerate(order):
+        cost += np.hypot(*(targets[i] - position))
+        cands = candidates[i]
+        drop = np.hypot(*(bin_xy[cands] - targets[i]).T)
+        # The bin also decides where the approach to the next part starts
+        leg = drop + np.hypot(*(targets[order[k + 1]] - bin_xy[cands]).T) if k + 1 < len(order) else drop
+        best = int(np.argmin(leg))
+        chosen.append(int(cands[best]))
+        cost += drop[best]
+        position = bin_xy[cands[best]]
+    return cost, chosen
+
+
+def plan_sort(parts, bins, start=(300.0, 0.0), improve=True):
+    """
+    Plan the pick order and bin per part
+
+    Greedy nearest-pick construction followed by 2-opt on the pick order;
+    for a given order the bin of each part only affects its own drop leg
+    and the approach to the next part, so it is chosen exactly per leg.
+
+    Args:
+        parts: list of (x, y, color, shape)
+        bins: list of Bin
+        start: current XY of the tool
+        improve: run 2-opt after the greedy construction
+
+    Returns:
+        SortPlan
+    """
+    sortable = []
+    unsorted = []
+    for x, y, color, shape in parts:
+        cands = matching_bins(bins, color, shape)
+        if cands:
+            sortable.append((x, y, f"{color} {shape}", cands))
+        else:
+            print(f"No bin for {color} {shape} at ({x:.1f}, {y:.1f}), leaving it")
+            unsorted.append((x, y, f"{color} {shape}"))
+    if not sortable:
+        return SortPlan([], unsorted, 0.0)
+
+    targets = np.array([(x, y) for x, y, _, _ in sortable], dtype=np.float64)
+    bin_xy = np.array([b.location[:2] for b in bins], dtype=np.float64)
+    candidates = [np.array(c) for _, _, _, c in sortable]
+    start = np.asarray(start, dtype=np.float64)
+
+    # Greedy: next pick is the one closest to where the tool is (start or last bin)
+    remaining = list(range(len(sortable)))
+    order = []
+    position = start
+    while remaining:
+        d = np.hypot(*(targets[remaining] - position).T)
+        i = remaining.pop(int(np.argmin(d)))
+        order.append(i)
+        cands = candidates[i]
+        position = bin_xy[cands[int(np.argmin(np.hypot(*(bin_xy[cands] - targets[i]).T)))]]
+
+    cost, chosen = _route_cost(order, start, targets, bin_xy, candidates)
+    if improve and len(order) > 2:
+        improved = True
+        while improved:
+            improved = False
+            for a in range(len(order) - 1):
+                for b in range(a + 1, len(order)):
+                    trial = order[:a] + order[a:b + 1][::-1] + order[b + 1:]
+                    trial_cost, trial_chosen = _route_cost(trial, start, targets, bin_xy, candidates)
+                    if trial_cost < cost - 1e-6:
+                        order, cost, chosen, improved = trial, trial_cost, trial_chosen, True
+
+    picks = [(float(targets[i][0]), float(targets[i][1]), sortable[i][2], bins[b]) for i, b in zip(order, chosen)]
+    return SortPlan(picks, unsorted, float(cost))
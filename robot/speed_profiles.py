@@ -0,0 +1,94 @@
+"""
+Per-phase speed and acceleration profiles
+
+SetupRobot sets one global SpeedJ/SpeedL/AccJ/AccL for the whole session, so
+the long free-space transfer runs as slowly as the careful descent to the
+part. A profile maps each motion phase of pick_and_place to its own speed and
+acceleration ratio (1-100), sent as MovJ/MovL dynamic parameters.
+
+Phases:
+    transfer - free-space MovJ at safe height (to hover and to the drop point)
+    approach - MovL descent to the part
+    retract  - MovL back to safe height (after picking and after placing)
+    place    - MovL descent into the drop box
+"""
+
+PHASES = ("transfer", "approach", "retract", "place")
+
+# Derived with the cycle-time model (robot/motion_model.py, untuned simulator limits):
+# - transfer/retract: the acceleration ratio is the preset's knob (how hard a held part is
+#   pulled); the speed ratio is the lowest that does not cap the longest move of the phase
+#   (450 mm transfer, 90 mm retract), higher speeds gain nothing there because these moves are
+#   acceleration limited.
+# - approach/place: the speed ratio sets the contact speed, which the model cannot judge;
+#   these are hand-set and still need tuning on the arm for a new gripper or part.
+# "balanced" was no faster than "uniform" with a 50 % retract acceleration, hence 70.
+#
+# Reference cycle (python -m robot.motion_model [--pipelined] [--queued-io]): from the drop
+# point [400, -125, -75], pick at (300, 0), drop at [400, -125], one pick in seconds
+# ("motion" leaves out all I/O and settle time):
+#
+#   preset     motion   legacy DO   legacy DO + pipelined   queued I/O
+#   uniform     2.41      9.40            5.40                 2.55
+#   cautious    3.23     10.23            6.23                 3.38
+#   balanced    2.33      9.33            5.33                 2.48
+#   fast        1.95      8.95            4.95                 2.10
+PRESETS = {
+    # Same as the old global setting of 50 %
+    "uniform": {
+        "transfer": (50, 50),
+        "approach": (50, 50),
+        "retract": (50, 50),
+        "place": (50, 50),
+    },
+    "cautious": {
+        "transfer": (70, 40),
+        "approach": (15, 20),
+        "retract": (35, 30),
+        "place": (20, 25),
+    },
+    "balanced": {
+        "transfer": (95, 70),
+        "approach": (25, 30),
+        "retract": (55, 70),
+        "place": (35, 40),
+    },
+    "fast": {
+        "transfer": (100, 100),
+        "approach": (40, 50),
+        "retract": (55, 80),
+        "place": (50, 60),
+    },
+}
+
+
+def get_preset(name):
+    """
+    Return a copy of a named preset
+
+    Args:
+        name: one of PRESETS
+
+    Returns:
+        dict: phase -> (speed_ratio, acc_ratio)
+    """
+    if name not in PRESETS:
+        raise ValueError(f"Unknown speed preset {name!r}, choose from {', '.join(PRESETS)}")
+    return dict(PRESETS[name])
+
+
+def motion_params(profiles, phase, linear):
+    """
+    Dynamic parameters for a MovJ (linear=False) or MovL (linear=True) in a phase
+
+    Returns:
+        list: e.g. ["SpeedL=25", "AccL=30"], empty if the phase has no profile
+    """
+    if not profiles or phase not in profiles:
+        return []
+    speed, acc = profiles[phase]
+    speed = max(1, min(100, int(speed)))
+    acc = max(1, min(100, int(acc)))
+    if linear:
+        return [f"SpeedL={speed}", f"AccL={acc}"]
+    return [f"SpeedJ={speed}", f"AccJ={acc}"]
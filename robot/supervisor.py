@@ -0,0 +1,236 @@
+"""
+Fault supervisor for DobotController
+
+Watches ErrorStatus/EnableStatus and the age of the last feed frame. On an
+alarm the IDs are read with GetErrorID and decoded through the alarm files
+(loaded once, indexed by ID); recoverable alarms are cleared and the robot is
+re-enabled automatically. A silent feed or dropped socket triggers a
+reconnect with exponential backoff. The arm is only re-enabled after a
+disable the supervisor caused itself (clearing an alarm); a disable from
+anywhere else (operator, emergency stop) is a fault that waits for
+DobotController.reset(). pick_and_place waits on wait_ready()
+before each segment and retries the failed segment once the robot is back,
+so a job resumes from its last completed segment instead of stalling.
+"""
+
+import json
+import threading
+import time
+from functools import lru_cache
+
+from robot.dobot_api import alarmAlarmJsonFile, parse_reply
+from robot.dobot_controller import GetRobotState
+
+# Alarms that need an operator (e.g. emergency stop pressed, collision) are never cleared automatically
+NON_RECOVERABLE_ALARMS = {-1}
+
+
+class RobotFault(Exception):
+    """Raised when a command fails or the robot is in an error state"""
+
+
+@lru_cache(maxsize=1)
+def alarm_index():
+    """
+    Load the controller and servo alarm files once
+
+    Returns:
+        tuple: (controller alarms by id, servo alarms by id); empty dicts if the files are missing
+    """
+    try:
+        controller, servo = alarmAlarmJsonFile()
+    except (OSError, ValueError) as e:
+        print(f"Alarm files unavailable, alarms will be reported by ID only: {e}")
+        return {}, {}
+    return ({int(a["id"]): a for a in controller}, {int(a["id"]): a for a in servo})
+
+
+def describe_alarm(alarm_id, servo=False):
+    controller, servo_alarms = alarm_index()
+    entry = (servo_alarms if servo else controller).get(int(alarm_id))
+    if entry is None:
+        return f"alarm {alarm_id}"
+    text = entry.get("en", {}).get("description") or entry.get("description") or ""
+    return f"alarm {alarm_id}: {text}".strip()
+
+
+def parse_error_ids(reply):
+    """
+    Parse a GetErrorID reply
+
+    Returns:
+        tuple: (controller alarm ids, servo alarm ids as list of (joint, id))
+    """
+    parsed = parse_reply(reply)
+    if parsed.error_id is None or not parsed.values:
+        return [], []
+    try:
+        groups = json.loads(parsed.values) if isinstance(parsed.values, str) else [list(parsed.values)]
+    except ValueError:
+        return [], []
+    controller = [int(a) for a in groups[0]] if groups else []
+    servo = [(joint, int(a)) for joint, ids in enumerate(groups[1:], start=1) for a in ids]
+    return controller, servo
+
+
+class RobotSupervisor:
+    """
+    Background health monitor and recovery for one DobotController
+
+    Args:
+        robot: DobotController to supervise
+        period: check interval in seconds
+        feed_timeout: feed silence (s) that counts as a lost connection
+        max_recoveries: automatic recoveries allowed per recovery_window before giving up
+        recovery_window: seconds
+    """
+
+    def __init__(self, robot, period=0.1, feed_timeout=2.0, max_recoveries=3, recovery_window=60.0):
+        self.robot = robot
+        self.period = period
+        self.feed_timeout = feed_timeout
+        self.max_recoveries = max_recoveries
+        self.recovery_window = recovery_window
+
+        self.fault = None
+        self.events = []
+        self._recoveries = []
+        # Set while our own ClearError/EnableRobot is taking effect, the only time a disabled arm is re-enabled
+        self._reenable_pending = False
+        self._ready = threading.Event()
+        self._ready.set()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, message):
+        print(f"[supervisor] {message}")
+        self.events.append((time.time(), message))
+        del self.events[:-200]
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None):
+        """Block until the robot is healthy; raises RobotFault if it needs an operator"""
+        if not self._ready.wait(timeout):
+            raise RobotFault(self.fault or "Robot not ready")
+        if self.fault:
+            raise RobotFault(self.fault)
+
+    def acknowledge(self):
+        """
+        Operator confirmation after a non-recoverable fault was handled
+
+        Only clears the supervisor state, DobotController.reset() also clears the
+        alarm and re-enables the arm before calling this.
+        """
+        self.fault = None
+        self._recoveries.clear()
+        self._reenable_pending = False
+        # The next check sets ready once the feed reports a healthy, enabled arm
+        self._ready.clear()
+
+    def report_failure(self, reason):
+        """Called by the controller when a command failed; the next check decides how to recover"""
+        self.log(f"Command failure: {reason}")
+        self._ready.clear()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+
+    def _allow_recovery(self):
+        now = time.monotonic()
+        self._recoveries = [t for t in self._recoveries if now - t < self.recovery_window]
+        if len(self._recoveries) >= self.max_recoveries:
+            return False
+        self._recoveries.append(now)
+        return True
+
+    def _give_up(self, reason):
+        self.fault = reason
+        self.log(f"Operator needed: {reason}")
+        # Release waiters so they see the fault instead of hanging
+        self._ready.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                self.log(f"Check failed: {e}")
+                self._ready.clear()
+            self._stop.wait(self.period)
+
+    def check(self):
+        if self.fault:
+            return
+
+        enabled, error, age = GetRobotState()
+
+        if age is None:
+            return  # no feed frame yet
+        if age > self.feed_timeout:
+            self._ready.clear()
+            self._reconnect()
+            return
+
+        if error:
+            self._ready.clear()
+            self._clear_alarm()
+            return
+
+        if enabled == 0:
+            self._ready.clear()
+            if not self._reenable_pending:
+                # Not our doing: an operator disable or emergency stop is never undone automatically
+                self._give_up("Robot disabled outside the supervisor")
+                return
+            self.log("Robot still disabled after clearing the alarm, re-enabling")
+            self.robot.dashboard.EnableRobot()
+            time.sleep(1.0)
+            return
+
+        self._reenable_pending = False
+        if not self._ready.is_set():
+            self.log("Robot ready")
+            self._ready.set()
+
+    def _clear_alarm(self):
+        controller, servo = parse_error_ids(self.robot.dashboard.GetErrorID())
+        descriptions = [describe_alarm(a) for a in controller] + [f"J{j} " + describe_alarm(a, servo=True) for j, a in servo]
+        self.log("Alarm: " + ("; ".join(descriptions) or "unknown"))
+
+        if servo or any(a in NON_RECOVERABLE_ALARMS for a in controller):
+            self._give_up("; ".join(descriptions) or "servo alarm")
+            return
+        if not self._allow_recovery():
+            self._give_up(f"Too many alarms in {self.recovery_window:.0f}s: " + "; ".join(descriptions))
+            return
+
+        self.log("Clearing recoverable alarm and re-enabling")
+        self._reenable_pending = True
+        self.robot.dashboard.ClearError()
+        time.sleep(0.5)
+        self.robot.dashboard.EnableRobot()
+        time.sleep(1.0)
+
+    def _reconnect(self, max_attempts=8):
+        delay = 0.5
+        for attempt in range(1, max_attempts + 1):
+            if self._stop.is_set():
+                return
+            self.log(f"Feed lost, reconnecting (attempt {attempt}/{max_attempts})...")
+            try:
+                self.robot.reconnect()
+                # reconnect() enables the arm itself; give it time before a disable counts as a fault
+                self._reenable_pending = True
+                self.log("Reconnected")
+                return
+            except Exception as e:
+                self.log(f"Reconnect failed: {e}, retrying in {delay:.1f}s")
+                self._stop.wait(delay)
+                delay = min(delay * 2, 10.0)
+        self._give_up("Connection lost and reconnect attempts exhausted")
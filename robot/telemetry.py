@@ -0,0 +1,182 @@
+"""
+Robot telemetry publish/subscribe
+
+The feedback thread (GetFeed) decodes a full state frame roughly every 8 ms.
+TelemetryHub decimates those frames to a UI friendly rate and hands the
+resulting samples to subscribers and to a short history buffer, so UIs can
+plot pose, joints, speed, temperatures and currents without sending
+GetPose/GetAngle over the dashboard socket.
+
+PoseHistory keeps every frame's pose (not decimated) stamped on the shared
+clock (utilites/clock.py), so the pose at a camera frame's capture time can
+be interpolated.
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# MG400 is a 4 axis arm, the feed reports 6 slots per joint array
+N_AXES = 4
+
+
+def telemetry_sample(feedInfo, stamp=None):
+    """
+    Build a telemetry sample from one decoded MyType frame
+
+    Args:
+        feedInfo: numpy structured array (length 1) of MyType
+        stamp: frame time on the shared clock (from ControllerClock), None for the receive time
+
+    Returns:
+        dict: plain python values for the published fields
+    """
+    tcp_speed = feedInfo["TCP_speed_actual"][0]
+    return {
+        "time": stamp if stamp is not None else time.monotonic(),
+        "controller_timer": int(feedInfo["controller_timer"][0]),
+        "pose": [float(v) for v in feedInfo["tool_vector_actual"][0][:N_AXES]],
+        "q_actual": [float(v) for v in feedInfo["q_actual"][0][:N_AXES]],
+        "tcp_speed": float(np.linalg.norm(tcp_speed[:3])),
+        "motor_temperatures": [float(v) for v in feedInfo["motor_temperatures"][0][:N_AXES]],
+        "i_actual": [float(v) for v in feedInfo["i_actual"][0][:N_AXES]],
+        "running_queue": int(feedInfo["isRunQueuedCmd"][0][0]),
+        "enable_status": int(feedInfo["EnableStatus"][0][0]),
+        "error_status": int(feedInfo["ErrorStatus"][0][0]),
+    }
+
+
+class TelemetryHub:
+    """
+    Decimating publish/subscribe hub for telemetry samples
+
+    Args:
+        rate_hz: maximum rate at which samples are delivered
+        history: number of delivered samples kept for plotting
+    """
+
+    def __init__(self, rate_hz=10.0, history=600):
+        self.rate_hz = rate_hz
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._history = deque(maxlen=history)
+        self._latest = None
+        self._last_publish = 0.0
+
+    def due(self):
+        """True if the next publish would be delivered (lets the producer skip building samples)"""
+        return time.monotonic() - self._last_publish >= 1.0 / self.rate_hz
+
+    def publish(self, sample):
+        """Deliver a sample to the history and all subscribers if the rate allows it"""
+        now = time.monotonic()
+        if now - self._last_publish < 1.0 / self.rate_hz:
+            return False
+        self._last_publish = now
+
+        with self._lock:
+            self._latest = sample
+            self._history.append(sample)
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(sample)
+            except Exception as e:
+                print(f"Telemetry subscriber error: {e}")
+        return True
+
+    def subscribe(self, callback):
+        """Register callback(sample), called on the feedback thread"""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def history(self):
+        with self._lock:
+            return list(self._history)
+
+
+class PoseHistory:
+    """
+    Ring buffer of stamped poses with interpolation
+
+    Args:
+        capacity: frames kept (1250 = 10 s at 125 Hz)
+        max_extrapolation_s: how far past the newest frame pose_at() still answers (with the newest pose)
+        reset_jump_s: a stamp this far behind the newest one means the clock restarted and clears the
+            history; smaller regressions (stamp jitter) drop the frame
+    """
+
+    def __init__(self, capacity=1250, max_extrapolation_s=0.02, reset_jump_s=0.5):
+        self.capacity = capacity
+        self.max_extrapolation_s = max_extrapolation_s
+        self.reset_jump_s = reset_jump_s
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._poses = np.zeros((capacity, N_AXES), dtype=np.float64)
+        self._next = 0
+        self._size = 0
+
+    def append(self, stamp, pose):
+        with self._lock:
+            if self._size:
+                newest = self._times[(self._next - 1) % self.capacity]
+                if stamp < newest - self.reset_jump_s:
+                    # Clock restarted (reconnect); older entries no longer compare
+                    self._size = 0
+                elif stamp < newest:
+                    # Jitter: keep the stamps sorted for pose_at() and the history we have
+                    self.dropped += 1
+                    return
+            self._times[self._next] = stamp
+            self._poses[self._next] = pose[:N_AXES]
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+
+    def span(self):
+        """(oldest, newest) stamp, None if empty"""
+        with self._lock:
+            if not self._size:
+                return None
+            return float(self._times[(self._next - self._size) % self.capacity]), float(self._times[(self._next - 1) % self.capacity])
+
+    def pose_at(self, t):
+        """
+        Pose interpolated at time t on the shared clock
+
+        Returns:
+            list or None: [x, y, z, r], None if t is outside the recorded span
+        """
+        with self._lock:
+            if not self._size:
+                return None
+            order = (np.arange(self._size) + self._next - self._size) % self.capacity
+            times = self._times[order]
+            poses = self._poses[order]
+        if t < times[0] or t > times[-1] + self.max_extrapolation_s:
+            return None
+        if t >= times[-1]:
+            return poses[-1].tolist()
+        i = int(np.searchsorted(times, t, side="right"))
+        if i == 0:
+            return poses[0].tolist()
+        t0, t1 = times[i - 1], times[i]
+        w = 0.0 if t1 <= t0 else (t - t0) / (t1 - t0)
+        return (poses[i - 1] + w * (poses[i] - poses[i - 1])).tolist()
@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def simulator():
+    """MG400Simulator on 127.0.0.1 (ports 29999/30003/30004), motion 20x faster than real time"""
+    pytest.importorskip("numpy")
+    from robot.simulator import MG400Simulator
+
+    sim = MG400Simulator(start_pose=(300.0, 0.0, -75.0, 0.0), time_scale=20.0).start()
+    yield sim
+    sim.stop()
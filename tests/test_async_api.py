@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot.async_api import AsyncDashboard, AsyncFeed, AsyncMove
+from robot.dobot_api import parse_reply
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10.0))
+
+
+def test_dashboard_replies_match_concurrent_commands(simulator):
+    async def scenario():
+        async with await AsyncDashboard.connect("127.0.0.1") as dashboard:
+            await dashboard.EnableRobot()
+            # gathered commands share one socket; each awaits its own reply
+            return await asyncio.gather(dashboard.RobotMode(), dashboard.GetPose(), dashboard.SpeedFactor(80))
+
+    mode, pose, speed = run(scenario())
+    assert parse_reply(mode).command == "RobotMode()"
+    assert parse_reply(mode).values == (5.0,)
+    assert parse_reply(pose).values[:3] == pytest.approx((300.0, 0.0, -75.0))
+    assert parse_reply(speed).error_id == 0
+    assert simulator.speed_factor == 80
+
+
+def test_move_then_feed_reports_the_target(simulator):
+    async def scenario():
+        dashboard = await AsyncDashboard.connect("127.0.0.1")
+        move = await AsyncMove.connect("127.0.0.1")
+        try:
+            await dashboard.EnableRobot()
+            replies = [await move.MovJ(250, 50, -75, 0), await move.MovL(250, 50, -120, 0), await move.Sync()]
+            async with await AsyncFeed.connect("127.0.0.1") as feed:
+                frame = await feed.read_frame()
+        finally:
+            await asyncio.gather(dashboard.aclose(), move.aclose())
+        return replies, frame
+
+    replies, frame = run(scenario())
+    assert [parse_reply(r).error_id for r in replies] == [0, 0, 0]
+    assert list(frame["tool_vector_actual"][0][:3]) == pytest.approx([250.0, 50.0, -120.0], abs=0.5)
+
+
+def test_feed_iteration_ends_when_the_controller_closes(simulator):
+    async def scenario():
+        frames = 0
+        async with await AsyncFeed.connect("127.0.0.1") as feed:
+            async for _ in feed:
+                frames += 1
+                if frames == 3:
+                    simulator.stop()
+        return frames
+
+    assert run(scenario()) >= 3
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("cv2")
+
+from utilites.camera import LiveCamera
+from utilites.clock import now
+
+
+class FakeFrame:
+    def copy(self):
+        return self
+
+
+class FakeCapture:
+    """Returns one frame, then stops the grab loop it belongs to"""
+
+    def __init__(self, camera, frame):
+        self.camera = camera
+        self.frame = frame
+        self.reads = 0
+
+    def read(self):
+        self.reads += 1
+        self.camera._running.clear()
+        return True, self.frame
+
+
+def test_grab_loop_stamps_and_encodes_one_frame():
+    camera = LiveCamera(capture_offset_s=0.01)
+    frame = FakeFrame()
+    camera.cam = FakeCapture(camera, frame)
+    camera._encode_preview = lambda f, rows: b"jpeg"
+    camera._running.set()
+
+    before = now()
+    camera._grab_loop()
+
+    latest, frame_id, frame_time = camera.latest_stamped_frame()
+    assert camera.cam.reads == 1
+    assert latest is frame
+    assert frame_id == 1
+    assert before - 0.01 <= frame_time <= now()
+    assert camera.latest_jpeg() == (b"jpeg", 1)
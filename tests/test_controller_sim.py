@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot.dobot_controller import GetPoseAt
+from robot.main import DobotController
+from robot.supervisor import RobotFault
+from utilites.clock import now
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def robot(simulator):
+    # queued I/O: no fixed sleeps in the pick sequence
+    robot = DobotController(ip="127.0.0.1", supervised=True, queued_io=True)
+    yield robot
+    robot.disconnect()
+
+
+def test_emergency_stop_needs_reset(robot, simulator):
+    assert robot.pick_and_place(300, 50) is True
+
+    robot.emergency_stop()
+    assert wait_for(lambda: robot.supervisor.fault is not None)
+    # the supervisor must not clear an operator stop on its own
+    time.sleep(0.3)
+    assert simulator.error_ids == [-1]
+    with pytest.raises(RobotFault):
+        robot.pick_and_place(300, -50)
+
+    robot.reset()
+    assert robot.supervisor.fault is None
+    assert robot.pick_and_place(300, -50) is True
+
+
+def test_recoverable_alarm_is_cleared(robot, simulator):
+    simulator.raise_alarm(22)
+    assert wait_for(lambda: not simulator.error_ids and simulator.enabled)
+    assert robot.supervisor.fault is None
+    assert robot.pick_and_place(280, 0) is True
+
+
+def test_external_disable_is_not_undone(robot, simulator):
+    robot.dashboard.DisableRobot()
+    assert wait_for(lambda: robot.supervisor.fault is not None)
+    time.sleep(0.3)
+    assert not simulator.enabled
+
+
+def test_pose_history_covers_the_motion(robot, simulator):
+    robot.move.MovL(300, 0, -75, 0)
+    robot.move.Sync()
+    # real time, so the move (about 0.55 s) spans many feed frames
+    simulator.time_scale = 1.0
+    started = now()
+    robot.move.MovL(300, 150, -75, 0)
+    robot.move.Sync()
+    finished = now()
+    time.sleep(0.05)
+
+    assert GetPoseAt(started)[1] == pytest.approx(0.0, abs=1.0)
+    assert GetPoseAt(finished)[1] == pytest.approx(150.0, abs=1.0)
+    middle = GetPoseAt((started + finished) / 2.0)
+    assert middle[0] == pytest.approx(300.0, abs=1.0)
+    assert 0.0 < middle[1] < 150.0
+
+
+def test_disconnect_stops_the_feed_thread(simulator):
+    robot = DobotController(ip="127.0.0.1")
+    thread = robot.feed_thread
+    robot.disconnect()
+    assert not thread.is_alive()
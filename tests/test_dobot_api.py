@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot.dobot_api import ReplyFramer, parse_reply
+
+
+def test_framer_joins_split_replies():
+    framer = ReplyFramer()
+    assert framer.feed(b"0,{},Enable") == []
+    assert framer.pending() == "0,{},Enable"
+    assert framer.feed(b"Robot();") == ["0,{},EnableRobot();"]
+    assert framer.pending() == ""
+
+
+def test_framer_splits_multi_reply_chunks():
+    framer = ReplyFramer()
+    replies = framer.feed(b"0,{},MovJ(1,2,3,4);0,{},MovL(5,6,7,8);-1,{},Sy")
+    assert replies == ["0,{},MovJ(1,2,3,4);", "0,{},MovL(5,6,7,8);"]
+    assert framer.feed("nc();") == ["-1,{},Sync();"]
+
+
+def test_parse_reply_values():
+    reply = parse_reply("0,{300.0,10.5,-75,0},GetPose();", latency=0.002)
+    assert reply.error_id == 0
+    assert reply.values == (300.0, 10.5, -75.0, 0.0)
+    assert reply.command == "GetPose()"
+    assert reply.latency == 0.002
+
+
+def test_parse_reply_nested_and_empty_payloads():
+    nested = parse_reply("0,{[[22],[],[],[],[],[]]},GetErrorID();")
+    assert nested.error_id == 0
+    assert nested.values == "[[22],[],[],[],[],[]]"
+
+    empty = parse_reply("-2,{},MovJ(900,0,0,0);")
+    assert empty.error_id == -2
+    assert empty.values == ()
+
+
+def test_parse_reply_garbage():
+    reply = parse_reply("not a reply")
+    assert reply.error_id is None
+    assert reply.raw == "not a reply"
@@ -0,0 +1,51 @@
+import socket
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot import estop as estop_module
+from robot.estop import EmergencyStopChannel
+
+
+@pytest.fixture
+def channel():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    channel = EmergencyStopChannel("127.0.0.1", port=server.getsockname()[1])
+    conn, _ = server.accept()
+    yield channel
+    channel.close()
+    conn.close()
+    server.close()
+
+
+def feed(monkeypatch, frames):
+    """GetRunningStatus returns the frames in order, then keeps repeating the last one"""
+    frames = list(frames)
+    monkeypatch.setattr(estop_module, "GetRunningStatus", lambda: frames.pop(0) if len(frames) > 1 else frames[0])
+
+
+def test_halt_latency_from_running_to_stopped(channel, monkeypatch):
+    feed(monkeypatch, [(1, 0.0), (1, 1e9), (0, 1e9 + 0.05)])
+    # the stopped frame is stamped far in the future, so it is newer than the command
+    latency = channel.stop(timeout=0.5)
+
+    assert latency is not None and latency > 0
+    assert not channel.last_was_idle
+
+
+def test_already_idle_reports_no_latency(channel, monkeypatch):
+    feed(monkeypatch, [(0, 0.0), (0, 1e9)])
+
+    assert channel.stop(timeout=0.1) is None
+    assert channel.last_was_idle
+
+
+def test_wait_halted_needs_a_running_frame(channel, monkeypatch):
+    feed(monkeypatch, [(0, 1e9), (0, 1e9 + 0.008)])
+    assert channel.wait_halted(sent_at=0.0, timeout=0.05, was_running=False) is None
+
+    feed(monkeypatch, [(0, 1e9), (1, 1e9 + 0.008), (0, 1e9 + 0.016)])
+    assert channel.wait_halted(sent_at=0.0, timeout=0.5, was_running=False) == pytest.approx(1e9 + 0.016)
@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot.gripper import VacuumGripper
+
+
+class FakeDashboard:
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    def DI(self, index):
+        self.calls.append(("DI", index))
+        return self.reply
+
+    def ToolDI(self, index):
+        self.calls.append(("ToolDI", index))
+        return self.reply
+
+
+class FakeRobot:
+    def __init__(self, reply):
+        self.dashboard = FakeDashboard(reply)
+        self.synced = 0
+
+    def _wait_queue(self):
+        self.synced += 1
+
+
+@pytest.mark.parametrize("source", ["DI", "ToolDI"])
+@pytest.mark.parametrize("reply, held", [
+    ("0,{1},DI(3);", True),
+    ("0,{0},DI(3);", False),
+    ("-1,{},DI(3);", False),
+    ("0,{[1]},DI(3);", False),
+    (None, False),
+])
+def test_grasp_ok_from_dashboard(source, reply, held):
+    robot = FakeRobot(reply)
+    gripper = VacuumGripper(robot, sensor_di=3, sensor_source=source)
+
+    assert gripper.grasp_ok() is held
+    assert robot.synced == 1
+    assert robot.dashboard.calls == [(source, 3)]
+
+
+def test_grasp_ok_without_sensor():
+    robot = FakeRobot("0,{0},DI(1);")
+    gripper = VacuumGripper(robot)
+
+    assert gripper.grasp_ok() is True
+    assert robot.dashboard.calls == []
@@ -0,0 +1,36 @@
+import os
+
+from utilites.history import FrameStore, HistoryWriter, failure_rates
+
+
+def test_frame_names_are_unique_within_a_millisecond(tmp_path):
+    store = FrameStore(str(tmp_path), max_frames=10)
+    paths = [store.new_path(t=1700000000.123) for _ in range(3)]
+
+    assert len(set(paths)) == 3
+    assert paths == sorted(paths)
+
+
+def test_oldest_frames_are_deleted(tmp_path):
+    store = FrameStore(str(tmp_path), max_frames=2)
+    paths = []
+    for i in range(3):
+        path = store.new_path(t=1700000000.0 + i)
+        open(path, "wb").close()
+        paths.append(path)
+
+    assert not os.path.exists(paths[0])
+    assert all(os.path.exists(p) for p in paths[1:])
+    # a new store picks up the files on disk in name order
+    assert list(FrameStore(str(tmp_path), max_frames=2)._frames) == paths[1:]
+
+
+def test_picks_are_written(tmp_path):
+    path = str(tmp_path / "history.db")
+    history = HistoryWriter(path, flush_interval_s=0.01)
+    history.record_pick("red circle", (300.0, 10.0), outcome="placed", attempts=1, duration_s=6.0)
+    history.record_pick("red circle", (310.0, 10.0), outcome="missed", attempts=2, duration_s=7.0)
+    history.close()
+
+    assert history.written == 2
+    assert failure_rates(path) == [("red", "circle", 2, 1, 0, 0.5)]
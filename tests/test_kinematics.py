@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot.kinematics import REASON_J1, REASON_TOO_FAR, REASON_Z_LOW, check_drop_locations
+
+DROP_HEIGHTS = (-125.0, -75.0)
+
+
+def test_reachable_drop_locations_pass():
+    assert check_drop_locations([[400, -125, -75], [250, -250, -75]], DROP_HEIGHTS) == []
+    assert check_drop_locations([], DROP_HEIGHTS) == []
+
+
+def test_unreachable_drop_locations_are_reported():
+    unreachable = check_drop_locations([[400, -125, -75], [500, 0, -75], [-300, 10, -75]], DROP_HEIGHTS)
+
+    assert [index for index, _, _ in unreachable] == [1, 2]
+    assert unreachable[0][1] == (500.0, 0.0)
+    assert REASON_TOO_FAR in unreachable[0][2]
+    assert REASON_J1 in unreachable[1][2]
+
+
+def test_drop_heights_are_checked():
+    unreachable = check_drop_locations([[400, -125, -75]], (-200.0, -75.0))
+    assert unreachable[0][2] == [REASON_Z_LOW]
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot.motion_model import MotionModel
+
+
+class FakeRobot:
+    def __init__(self, gripper=None, pipeline=None):
+        self.gripper = gripper
+        self.pipeline = pipeline
+
+
+def test_legacy_io_adds_the_fixed_sleeps():
+    legacy = MotionModel()
+    pipelined = MotionModel(pipelined=True)
+    queued = MotionModel(queued_io=True)
+
+    assert legacy.io_time() == pytest.approx(7.0)
+    assert pipelined.io_time() == pytest.approx(3.0)
+    assert queued.io_time(io_dwell=0.15) == pytest.approx(0.15)
+
+    args = ([300.0, 0.0, -75.0, 0.0], (250.0, 50.0), [400.0, -125.0, -75.0])
+    t_legacy, pose = legacy.pick_and_place_time(*args)
+    t_queued, _ = queued.pick_and_place_time(*args)
+    assert t_legacy - t_queued == pytest.approx(7.0 - 0.15)
+    assert pose == [400.0, -125.0, -75.0, 0.0]
+
+
+def test_for_robot_follows_the_controller():
+    assert MotionModel.for_robot(FakeRobot()).io_time() == pytest.approx(7.0)
+    assert MotionModel.for_robot(FakeRobot(gripper=object())).queued_io
+    assert MotionModel.for_robot(FakeRobot(pipeline=object())).settle_time() == 0.0
+
+
+def test_presets_rank_by_reference_cycle():
+    from robot.speed_profiles import PRESETS
+
+    model = MotionModel(queued_io=True)
+    drop = [400.0, -125.0, -75.0]
+    times = {name: model.pick_and_place_time(drop + [0.0], (300.0, 0.0), drop, profiles=profiles)[0]
+             for name, profiles in PRESETS.items()}
+    assert times["fast"] < times["balanced"] < times["uniform"] < times["cautious"]
+    assert times["balanced"] == pytest.approx(2.48, abs=0.01)
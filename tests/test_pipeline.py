@@ -0,0 +1,94 @@
+import socket
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot.pipeline import PipelinedMove
+
+
+class FakeMove:
+    """DobotApiMove stand-in: the pipeline only needs the socket, ip/port and log()"""
+
+    def __init__(self, sock):
+        self.socket_dobot = sock
+        self.ip = "127.0.0.1"
+        self.port = 30003
+
+    def log(self, text):
+        pass
+
+
+@pytest.fixture
+def pipe():
+    client, controller = socket.socketpair()
+    controller.settimeout(2.0)
+    yield client, controller
+    client.close()
+    controller.close()
+
+
+def read_commands(controller, count):
+    data = b""
+    while data.count(b")") < count:
+        data += controller.recv(1024)
+    return data.decode().split(")")[:count]
+
+
+def test_replies_resolve_in_send_order(pipe):
+    client, controller = pipe
+    pipeline = PipelinedMove(FakeMove(client))
+    try:
+        first = pipeline.MovJ(300, 0, -75, 0)
+        second = pipeline.MovL(300, 0, -165, 0, "SpeedL=25")
+        sync = pipeline.Sync()
+        commands = read_commands(controller, 3)
+        assert commands[0].startswith("MovJ(300.000000")
+        assert commands[1].endswith("SpeedL=25")
+        assert commands[2] == "Sync("
+
+        # two replies in one chunk and one split across chunks
+        controller.sendall(b"0,{},MovJ();0,{},MovL();0,{")
+        assert first.result(timeout=2.0) == "0,{},MovJ();"
+        assert second.result(timeout=2.0) == "0,{},MovL();"
+        assert not sync.done()
+        controller.sendall(b"},Sync();")
+        assert sync.result(timeout=2.0) == "0,{},Sync();"
+        assert pipeline.in_flight() == 0
+    finally:
+        pipeline.close()
+
+
+def test_max_in_flight_applies_backpressure(pipe):
+    client, controller = pipe
+    pipeline = PipelinedMove(FakeMove(client), max_in_flight=2)
+    try:
+        pipeline.MovJ(300, 0, -75, 0)
+        pipeline.MovJ(310, 0, -75, 0)
+        third = []
+        sender = threading.Thread(target=lambda: third.append(pipeline.MovJ(320, 0, -75, 0)))
+        sender.start()
+        sender.join(timeout=0.2)
+        # both slots are taken until the controller answers
+        assert sender.is_alive()
+        assert pipeline.in_flight() == 2
+
+        controller.sendall(b"0,{},MovJ();")
+        sender.join(timeout=2.0)
+        assert not sender.is_alive()
+        assert len(read_commands(controller, 3)) == 3
+    finally:
+        pipeline.close()
+
+
+def test_close_fails_unanswered_commands(pipe):
+    client, controller = pipe
+    pipeline = PipelinedMove(FakeMove(client))
+    future = pipeline.MovJ(300, 0, -75, 0)
+    pipeline.close()
+
+    with pytest.raises(ConnectionError):
+        future.result(timeout=1.0)
+    with pytest.raises(RuntimeError):
+        pipeline.MovJ(300, 0, -75, 0)
@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from robot.dobot_api import MyType
+from robot.recorder import FeedRecorder, FeedRecording
+
+
+def make_frame(i):
+    frame = np.zeros(1, dtype=MyType)
+    frame["controller_timer"] = 8 * i
+    frame["tool_vector_actual"][0][:4] = [300.0 + i, 10.0, -75.0, 0.0]
+    return frame.tobytes()
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "feed.ring")
+    recorder = FeedRecorder(path, capacity=10)
+    for i in range(4):
+        recorder.write(make_frame(i), 100.0 + i * 0.008)
+    recorder.close()
+
+    recording = FeedRecording(path)
+    assert len(recording) == 4
+    # not wrapped: ordered() is a view into the mapping, not a copy
+    assert np.shares_memory(recording.ordered(), recording.records)
+    stamps = recording.stamps()
+    frames = recording.frames()
+    np.testing.assert_allclose(stamps, 100.0 + np.arange(4) * 0.008)
+    assert list(frames["controller_timer"]) == [0, 8, 16, 24]
+    assert frames["tool_vector_actual"][3][0] == 303.0
+    # views are still alive, close must not raise
+    recording.close()
+    assert frames["controller_timer"][1] == 8
+
+
+def test_ring_wraps_in_order(tmp_path):
+    path = str(tmp_path / "feed.ring")
+    recorder = FeedRecorder(path, capacity=3)
+    for i in range(5):
+        recorder.write(make_frame(i), float(i))
+    recorder.close()
+
+    recording = FeedRecording(path)
+    assert recording.written == 5
+    assert list(recording.stamps()) == [2.0, 3.0, 4.0]
+    assert list(recording.frames()["controller_timer"]) == [16, 24, 32]
+    recording.close()
+
+
+def test_reopen_continues_recording(tmp_path):
+    path = str(tmp_path / "feed.ring")
+    recorder = FeedRecorder(path, capacity=10)
+    recorder.write(make_frame(0), 1.0)
+    recorder.close()
+    recorder = FeedRecorder(path, capacity=10)
+    recorder.write(make_frame(1), 2.0)
+    recorder.close()
+
+    recording = FeedRecording(path)
+    assert list(recording.stamps()) == [1.0, 2.0]
+    recording.close()
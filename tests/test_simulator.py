@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot.dobot_api import parse_reply
+from robot.simulator import ALARM_OUT_OF_RANGE, MG400Simulator, split_args, split_commands
+
+
+def test_split_commands_keeps_partial_and_nested():
+    commands, rest = split_commands("MovLIO(300,0,-165,0,(1,10,1,1));EnableRobot();MovJ(1,")
+    assert [name for name, _, _ in commands] == ["MovLIO", "EnableRobot"]
+    assert split_args(commands[0][1]) == ["300", "0", "-165", "0", "(1,10,1,1)"]
+    assert rest == ";MovJ(1,"
+
+
+def test_motion_needs_enable_and_checks_reach():
+    sim = MG400Simulator()
+    assert parse_reply(sim.handle_command("MovJ", "300,0,-75,0", "MovJ(300,0,-75,0)")).error_id == -1
+
+    sim.handle_command("EnableRobot", "", "EnableRobot()")
+    assert parse_reply(sim.handle_command("MovJ", "300,0,-75,0", "MovJ(300,0,-75,0)")).error_id == 0
+    sim.handle_command("MovJ", "900,0,-75,0", "MovJ(900,0,-75,0)")
+    assert sim.error_ids == [ALARM_OUT_OF_RANGE]
+    assert parse_reply(sim.handle_command("RobotMode", "", "RobotMode()")).values == (9.0,)
+    # an alarm blocks motion until it is cleared
+    assert parse_reply(sim.handle_command("EnableRobot", "", "EnableRobot()")).error_id == -1
+    sim.handle_command("ClearError", "", "ClearError()")
+    assert parse_reply(sim.handle_command("EnableRobot", "", "EnableRobot()")).error_id == 0
@@ -0,0 +1,102 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot import supervisor as supervisor_module
+from robot.supervisor import RobotFault, RobotSupervisor
+
+
+class FakeDashboard:
+    def __init__(self, error_ids="0,{[[],[],[],[],[],[]]},GetErrorID();"):
+        self.error_ids = error_ids
+        self.calls = []
+
+    def GetErrorID(self):
+        self.calls.append("GetErrorID")
+        return self.error_ids
+
+    def ClearError(self):
+        self.calls.append("ClearError")
+
+    def EnableRobot(self):
+        self.calls.append("EnableRobot")
+
+
+class FakeRobot:
+    def __init__(self, dashboard):
+        self.dashboard = dashboard
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """Feed state returned by GetRobotState: (enabled, error, age)"""
+    current = {"value": (1, 0, 0.01)}
+    monkeypatch.setattr(supervisor_module, "GetRobotState", lambda: current["value"])
+    monkeypatch.setattr(supervisor_module.time, "sleep", lambda s: None)
+    return current
+
+
+def make_supervisor(dashboard):
+    supervisor = RobotSupervisor(FakeRobot(dashboard), period=10.0)
+    # drive check() by hand instead of from the background thread
+    supervisor.stop()
+    return supervisor
+
+
+def test_external_disable_is_a_fault(state):
+    dashboard = FakeDashboard()
+    supervisor = make_supervisor(dashboard)
+
+    state["value"] = (0, 0, 0.01)
+    supervisor.check()
+
+    assert supervisor.fault
+    assert "EnableRobot" not in dashboard.calls
+    with pytest.raises(RobotFault):
+        supervisor.wait_ready(timeout=0.1)
+
+
+def test_recoverable_alarm_is_cleared_and_reenabled(state):
+    dashboard = FakeDashboard("0,{[[22],[],[],[],[],[]]},GetErrorID();")
+    supervisor = make_supervisor(dashboard)
+
+    state["value"] = (0, 1, 0.01)
+    supervisor.check()
+    assert dashboard.calls == ["GetErrorID", "ClearError", "EnableRobot"]
+
+    # alarm cleared but the arm is still coming up: our own disable, so enable again
+    state["value"] = (0, 0, 0.01)
+    supervisor.check()
+    assert dashboard.calls[-1] == "EnableRobot"
+    assert supervisor.fault is None
+
+    state["value"] = (1, 0, 0.01)
+    supervisor.check()
+    assert supervisor.ready
+    supervisor.wait_ready(timeout=0.1)
+
+    # once healthy, a later disable is somebody else's
+    state["value"] = (0, 0, 0.01)
+    supervisor.check()
+    assert supervisor.fault
+
+
+def test_emergency_stop_needs_acknowledge(state):
+    dashboard = FakeDashboard("0,{[[-1],[],[],[],[],[]]},GetErrorID();")
+    supervisor = make_supervisor(dashboard)
+
+    state["value"] = (0, 1, 0.01)
+    supervisor.check()
+    assert supervisor.fault
+    assert "ClearError" not in dashboard.calls
+
+    # the fault sticks until the operator resets
+    state["value"] = (1, 0, 0.01)
+    supervisor.check()
+    assert supervisor.fault
+
+    supervisor.acknowledge()
+    assert not supervisor.ready
+    supervisor.check()
+    assert supervisor.fault is None
+    supervisor.wait_ready(timeout=0.1)
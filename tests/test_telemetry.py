@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from robot.telemetry import PoseHistory
+
+
+def test_small_regression_is_dropped():
+    history = PoseHistory(capacity=10)
+    history.append(1.000, [300.0, 0.0, 0.0, 0.0])
+    history.append(1.008, [301.0, 0.0, 0.0, 0.0])
+    # a jittery stamp slightly behind the newest one must not wipe the history
+    history.append(1.007, [999.0, 0.0, 0.0, 0.0])
+    history.append(1.016, [302.0, 0.0, 0.0, 0.0])
+
+    assert history.dropped == 1
+    assert history.span() == (1.000, 1.016)
+    assert history.pose_at(1.004) == pytest.approx([300.5, 0.0, 0.0, 0.0])
+
+
+def test_clock_restart_resets():
+    history = PoseHistory(capacity=10, reset_jump_s=0.5)
+    history.append(100.0, [300.0, 0.0, 0.0, 0.0])
+    history.append(100.008, [301.0, 0.0, 0.0, 0.0])
+    history.append(5.0, [310.0, 0.0, 0.0, 0.0])
+
+    assert history.span() == (5.0, 5.0)
+    assert history.pose_at(100.0) is None
+    assert history.pose_at(5.0) == [310.0, 0.0, 0.0, 0.0]
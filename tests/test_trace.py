@@ -0,0 +1,44 @@
+import json
+import threading
+
+from utilites.trace import Tracer
+
+
+def test_save_while_other_threads_record(tmp_path):
+    tracer = Tracer(max_events=1000)
+    tracer.enabled = True
+    stop = threading.Event()
+
+    def record(i):
+        while not stop.is_set():
+            with tracer.span(f"worker{i}"):
+                pass
+
+    workers = [threading.Thread(target=record, args=(i,), name=f"worker{i}") for i in range(4)]
+    for worker in workers:
+        worker.start()
+    try:
+        for n in range(20):
+            assert tracer.save(str(tmp_path / f"trace{n}.json")) is not None
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+    with open(tmp_path / "trace19.json") as f:
+        events = json.load(f)["traceEvents"]
+    assert any(event["ph"] == "X" for event in events)
+    assert {event["args"]["name"] for event in events if event["ph"] == "M"} <= {f"worker{i}" for i in range(4)}
+
+
+def test_buffer_is_bounded(tmp_path):
+    tracer = Tracer(max_events=10)
+    tracer.enabled = True
+    for _ in range(25):
+        tracer.instant("tick")
+    tracer.save(str(tmp_path / "trace.json"))
+
+    with open(tmp_path / "trace.json") as f:
+        events = json.load(f)["traceEvents"]
+    assert sum(event["ph"] == "i" for event in events) == 10
+    assert tracer.recorded == 25
@@ -1,21 +1,44 @@
+import threading
+import time
+
 import cv2
 
+from utilites.clock import now
+from utilites.trace import span
+
 
 class Camera:
-    def __init__(self, index=1):
+    def __init__(self, index=1, capture_offset_s=0.0, persistent=False):
         self.cam = cv2.VideoCapture(index)
         self.cam.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
         self.cam.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
+        # time from exposure to read() returning, subtracted from the capture stamp
+        self.capture_offset_s = capture_offset_s
+        self.last_capture_time = None
+        # persistent: keep the device open between captures (main.py --mode run), call close() when done
+        self.persistent = persistent
+        if persistent:
+            self.cam.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
     def capture_image(self):
-        ret, frame = self.cam.read()
-        # release immediately to free camera resource
-        self.cam.release()
+        with span("camera.grab"):
+            if self.persistent:
+                # drop the frame that sat in the driver buffer while the arm was moving
+                self.cam.grab()
+            ret, frame = self.cam.read()
+        self.last_capture_time = now() - self.capture_offset_s
+        if not self.persistent:
+            # release immediately to free camera resource
+            self.cam.release()
 
         if not ret or frame is None:
             print("failed to grab frame from camera")
             return None
 
+        if self.persistent:
+            # the run loop saves the frames it needs itself
+            return frame
+
         # ensure outputs directory exists and save a copy
         try:
             import os
@@ -23,9 +46,153 @@ class Camera:
             out_dir = os.path.join(base_dir, "outputs")
             os.makedirs(out_dir, exist_ok=True)
             img_name = os.path.join(out_dir, "camera_detection.png")
-            cv2.imwrite(img_name, frame)
+            with span("image.write"):
+                cv2.imwrite(img_name, frame)
         except Exception:
             # ignore save errors but continue returning the frame
             pass
 
-        return frame
\ No newline at end of file
+        return frame
+
+    def close(self):
+        self.cam.release()
+
+
+class LiveCamera:
+    """
+    Persistent camera grab loop for live preview
+
+    A background thread keeps reading frames so the newest one is always
+    available; older frames are simply overwritten (dropped). At most
+    preview_fps times per second the newest frame is downscaled, overlaid
+    with the latest detection rows and encoded to JPEG, so consumers only
+    ever pull one small, already-encoded image.
+
+    Frames are stamped on the shared clock (utilites/clock.py) with the time
+    read() returned minus capture_offset_s (exposure and USB transfer), so
+    robot.dobot_controller.GetPoseAt(frame_time) gives the arm pose at capture.
+    """
+
+    def __init__(self, index=1, width=1920, height=1080, preview_fps=5.0, preview_width=640, jpeg_quality=70,
+                 capture_offset_s=0.0):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.preview_fps = preview_fps
+        self.preview_width = preview_width
+        self.jpeg_quality = jpeg_quality
+        self.capture_offset_s = capture_offset_s
+
+        self.cam = None
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._thread = None
+
+        self._frame = None
+        self._frame_id = 0
+        self._frame_time = None
+        self._jpeg = None
+        self._jpeg_frame_id = 0
+        self._last_encode = 0.0
+        self._overlay_rows = []
+
+    def start(self):
+        if self._running.is_set():
+            return
+        self.cam = cv2.VideoCapture(self.index)
+        self.cam.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cam.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        # Keep the driver queue short so read() returns a fresh frame
+        self.cam.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if not self.cam.isOpened():
+            self.cam.release()
+            self.cam = None
+            raise RuntimeError(f"Unable to open camera {self.index}")
+        self._running.set()
+        self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self.cam is not None:
+            self.cam.release()
+            self.cam = None
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def set_overlay(self, rows):
+        """Set detection rows (full resolution pixel_u/pixel_v) drawn on the preview"""
+        with self._lock:
+            self._overlay_rows = list(rows or [])
+
+    def latest_frame(self):
+        """Return (frame, frame_id) of the newest full resolution frame"""
+        with self._lock:
+            if self._frame is None:
+                return None, 0
+            return self._frame.copy(), self._frame_id
+
+    def latest_stamped_frame(self):
+        """Return (frame, frame_id, capture time on the shared clock) of the newest frame"""
+        with self._lock:
+            if self._frame is None:
+                return None, 0, None
+            return self._frame.copy(), self._frame_id, self._frame_time
+
+    def latest_jpeg(self):
+        """Return (jpeg_bytes, frame_id) of the newest encoded preview"""
+        with self._lock:
+            return self._jpeg, self._jpeg_frame_id
+
+    def _grab_loop(self):
+        while self._running.is_set():
+            with span("camera.grab"):
+                ret, frame = self.cam.read()
+            grabbed_at = now() - self.capture_offset_s
+            if not ret or frame is None:
+                time.sleep(0.05)
+                continue
+
+            with self._lock:
+                self._frame = frame
+                self._frame_time = grabbed_at
+                self._frame_id += 1
+                frame_id = self._frame_id
+                rows = self._overlay_rows
+
+            # not named "now": that would shadow utilites.clock.now used above for the whole function
+            t = time.monotonic()
+            if t - self._last_encode < 1.0 / max(self.preview_fps, 0.1):
+                continue
+            self._last_encode = t
+
+            with span("camera.preview"):
+                jpeg = self._encode_preview(frame, rows)
+            if jpeg is not None:
+                with self._lock:
+                    self._jpeg = jpeg
+                    self._jpeg_frame_id = frame_id
+
+    def _encode_preview(self, frame, rows):
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.preview_width / float(w))
+        if scale < 1.0:
+            preview = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        else:
+            preview = frame.copy()
+
+        for row in rows:
+            u = int(row["pixel_u"] * scale)
+            v = int(row["pixel_v"] * scale)
+            cv2.circle(preview, (u, v), 5, (0, 0, 255), 2)
+            cv2.putText(preview, f"#{row['id']}", (u + 6, v - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 0), 1, cv2.LINE_AA)
+
+        ok, buf = cv2.imencode(".jpg", preview, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            return None
+        return buf.tobytes()
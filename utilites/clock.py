@@ -0,0 +1,75 @@
+"""
+Shared clock for camera frames and robot feed samples
+
+Everything is stamped on the host's time.monotonic() clock, so a frame's
+capture time can be compared directly with robot state. Feed frames carry
+the controller's own millisecond timer; ControllerClock maps it onto the
+host clock so feed samples are stamped with when the controller produced
+them, not when the (jittery) network delivered them.
+"""
+
+import time
+from collections import deque
+
+
+def now():
+    """Current time on the shared clock (monotonic seconds)"""
+    return time.monotonic()
+
+
+class ControllerClock:
+    """
+    Maps the feed's controller_timer (ms) onto the host monotonic clock
+
+    The offset host - controller is estimated as the minimum over a sliding
+    window of frames: network and scheduling delays only ever add to the
+    receive time, so the smallest difference is the closest to the true
+    offset. The window lets the estimate follow slow drift between the two
+    clocks; a timer that jumps backwards (controller restart) resets it.
+
+    Args:
+        window: number of frames in the sliding minimum (1000 frames = 8 s at 125 Hz)
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._count = 0
+        self._last_controller_ms = None
+        # (frame index, offset) pairs with increasing offsets, front is the window minimum
+        self._candidates = deque()
+
+    @property
+    def offset(self):
+        """host_seconds - controller_seconds, None before the first frame"""
+        return self._candidates[0][1] if self._candidates else None
+
+    def reset(self):
+        self._count = 0
+        self._last_controller_ms = None
+        self._candidates.clear()
+
+    def observe(self, controller_ms, received_at=None):
+        """
+        Feed one frame's timer and receive time
+
+        Returns:
+            float: the frame's stamp on the shared clock
+        """
+        received_at = received_at if received_at is not None else now()
+        controller_ms = int(controller_ms)
+        if self._last_controller_ms is not None and controller_ms < self._last_controller_ms:
+            self.reset()
+        self._last_controller_ms = controller_ms
+
+        offset = received_at - controller_ms / 1000.0
+        while self._candidates and self._candidates[-1][1] >= offset:
+            self._candidates.pop()
+        self._candidates.append((self._count, offset))
+        while self._candidates[0][0] <= self._count - self.window:
+            self._candidates.popleft()
+        self._count += 1
+        return self.to_host(controller_ms)
+
+    def to_host(self, controller_ms):
+        """Controller timer (ms) to shared clock seconds"""
+        return controller_ms / 1000.0 + self.offset
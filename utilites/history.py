@@ -0,0 +1,309 @@
+"""
+Detection and pick history in SQLite
+
+Every detection (with its robot coordinates and whether it became a pick
+target) and every pick cycle (attempts, outcome, duration) is written to a
+local SQLite database together with the path of the frame it came from.
+Callers only put a tuple on a queue; a writer thread inserts the rows in
+batches, one transaction per batch, so the vision and robot loops never wait
+on the disk. Times are Unix seconds so rows from different runs line up.
+
+    history = HistoryWriter("outputs/history.db")
+    history.record_detection(color="red", shape="circle", pixel=(u, v), position=(x, y), target=True, frame=path)
+    history.record_pick("red circle", (x, y), outcome="placed", attempts=1, duration_s=6.2, frame=path)
+    history.close()
+
+The tables are indexed on time, color, shape and outcome for throughput and
+failure-rate queries over long periods (see throughput() and failure_rates()).
+FrameStore names the saved frames and keeps only the newest max_frames of
+them, so old rows may point at a frame that has been rotated out.
+
+Run from the project root:
+    python -m utilites.history outputs/history.db --days 30
+"""
+
+import argparse
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "outputs", "history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    frame TEXT,
+    color TEXT,
+    shape TEXT,
+    u INTEGER,
+    v INTEGER,
+    x REAL,
+    y REAL,
+    target INTEGER NOT NULL DEFAULT 0,
+    reason TEXT
+);
+CREATE TABLE IF NOT EXISTS picks (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    frame TEXT,
+    color TEXT,
+    shape TEXT,
+    x REAL,
+    y REAL,
+    drop_x REAL,
+    drop_y REAL,
+    attempts INTEGER,
+    outcome TEXT NOT NULL,
+    duration_s REAL
+);
+CREATE INDEX IF NOT EXISTS idx_detections_time ON detections (time);
+CREATE INDEX IF NOT EXISTS idx_detections_color ON detections (color);
+CREATE INDEX IF NOT EXISTS idx_detections_shape ON detections (shape);
+CREATE INDEX IF NOT EXISTS idx_picks_time ON picks (time);
+CREATE INDEX IF NOT EXISTS idx_picks_color ON picks (color);
+CREATE INDEX IF NOT EXISTS idx_picks_shape ON picks (shape);
+CREATE INDEX IF NOT EXISTS idx_picks_outcome ON picks (outcome);
+"""
+
+_INSERT = {
+    "detections": "INSERT INTO detections (time, frame, color, shape, u, v, x, y, target, reason) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "picks": "INSERT INTO picks (time, frame, color, shape, x, y, drop_x, drop_y, attempts, outcome, duration_s) "
+             "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+}
+
+
+def split_kind(kind):
+    """'red circle' -> ('red', 'circle'); a single word is taken as the color"""
+    if not kind:
+        return None, None
+    parts = str(kind).split(None, 1)
+    return parts[0], parts[1] if len(parts) > 1 else None
+
+
+def connect(path):
+    """Open the database (creating tables and indexes) with WAL so readers never block the writer"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class HistoryWriter:
+    """
+    Queues history rows and inserts them in batches on a writer thread
+
+    Args:
+        path: SQLite database file
+        batch_size: rows per transaction at most
+        flush_interval_s: longest time a row waits in the queue
+        max_queue: rows buffered before new ones are dropped (the robot never blocks on the disk)
+    """
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=200, flush_interval_s=1.0, max_queue=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        # Create the schema up front so a bad path fails here, not on the writer thread
+        connect(path).close()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def record_detection(self, color=None, shape=None, pixel=None, position=None, target=False, reason=None,
+                         frame=None, t=None):
+        """
+        Queue one detection
+
+        Args:
+            pixel: (u, v) image coordinates
+            position: (x, y) robot coordinates
+            target: True if the part was sent for picking
+            reason: why it was not a target (e.g. outside the envelope)
+            frame: path of the saved frame
+        """
+        u, v = pixel if pixel is not None else (None, None)
+        x, y = position if position is not None else (None, None)
+        self._put(("detections", (t if t is not None else time.time(), frame, color, shape,
+                                  None if u is None else int(u), None if v is None else int(v),
+                                  None if x is None else float(x), None if y is None else float(y),
+                                  int(bool(target)), reason)))
+
+    def record_pick(self, kind, position, outcome, attempts=None, duration_s=None, drop_location=None,
+                    frame=None, t=None):
+        """
+        Queue one pick cycle
+
+        Args:
+            kind: "color shape" label (as used for the grasp statistics)
+            position: (x, y) target in robot coordinates
+            outcome: "placed", "missed" or "failed"
+            attempts: grasp attempts made
+            duration_s: cycle time
+            drop_location: [x, y, z] the part was taken to
+        """
+        color, shape = split_kind(kind)
+        drop_x, drop_y = (drop_location[0], drop_location[1]) if drop_location is not None else (None, None)
+        self._put(("picks", (t if t is not None else time.time(), frame, color, shape,
+                             float(position[0]), float(position[1]), drop_x, drop_y,
+                             attempts, outcome, duration_s)))
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued so far is committed"""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Commit the remaining rows and stop the writer"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self):
+        conn = connect(self.path)
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval_s
+            # Collect what else arrives before the deadline, up to one batch
+            while len(batch) < self.batch_size and batch[-1] is not None and batch[-1][0] != "flush":
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            rows = {"detections": [], "picks": []}
+            events = []
+            for entry in batch:
+                if entry is None:
+                    running = False
+                elif entry[0] == "flush":
+                    events.append(entry[1])
+                else:
+                    rows[entry[0]].append(entry[1])
+            try:
+                with conn:
+                    for table, values in rows.items():
+                        if values:
+                            conn.executemany(_INSERT[table], values)
+                self.written += len(rows["detections"]) + len(rows["picks"])
+            except sqlite3.Error as e:
+                print(f"History write failed, {len(rows['detections']) + len(rows['picks'])} row(s) lost: {e}")
+            for event in events:
+                event.set()
+        conn.close()
+
+
+class FrameStore:
+    """
+    Paths for saved frames, deleting the oldest beyond max_frames
+
+    Args:
+        directory: folder the frames are written to
+        max_frames: frames kept on disk (about 300 kB each at 1080p JPEG)
+    """
+
+    def __init__(self, directory, max_frames=2000):
+        self.directory = directory
+        self.max_frames = max_frames
+        os.makedirs(directory, exist_ok=True)
+        # Names sort by time, so the existing files give the rotation order
+        self._frames = deque(sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                                    if name.endswith(".jpg")))
+        # Appended to every name: several frames can share a millisecond
+        self._ids = itertools.count(1)
+
+    def new_path(self, t=None):
+        """Path for the next frame; the caller writes it"""
+        t = t if t is not None else time.time()
+        name = time.strftime("%Y%m%d-%H%M%S", time.localtime(t)) + f"-{int(t * 1000) % 1000:03d}-{next(self._ids):06d}.jpg"
+        path = os.path.join(self.directory, name)
+        self._frames.append(path)
+        while len(self._frames) > self.max_frames:
+            old = self._frames.popleft()
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        return path
+
+
+def _since_clause(since, column="time"):
+    return (f" WHERE {column} >= ?", [since]) if since is not None else ("", [])
+
+
+def throughput(path, since=None, bucket_s=3600):
+    """
+    Picks per time bucket
+
+    Returns:
+        list: (bucket start in Unix seconds, picks, placed) tuples
+    """
+    where, params = _since_clause(since)
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute(
+            f"SELECT CAST(time / ? AS INTEGER) * ? AS bucket, COUNT(*), SUM(outcome = 'placed') "
+            f"FROM picks{where} GROUP BY bucket ORDER BY bucket",
+            [bucket_s, bucket_s] + params).fetchall()
+
+
+def failure_rates(path, since=None):
+    """
+    Pick outcomes per part type
+
+    Returns:
+        list: (color, shape, picks, missed, failed, failure rate) tuples
+    """
+    where, params = _since_clause(since)
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute(
+            f"SELECT color, shape, COUNT(*), SUM(outcome = 'missed'), SUM(outcome = 'failed'), "
+            f"AVG(outcome != 'placed') FROM picks{where} GROUP BY color, shape ORDER BY color, shape",
+            params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise the detection and pick history")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH, help="History database")
+    parser.add_argument("--days", type=float, default=7.0, help="Period to summarise")
+    parser.add_argument("--bucket-hours", type=float, default=24.0, help="Throughput bucket size")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No history at {args.path}")
+        return
+    since = time.time() - args.days * 86400.0
+    print(f"Throughput ({args.bucket_hours:g} h buckets):")
+    for bucket, picks, placed in throughput(args.path, since, args.bucket_hours * 3600.0):
+        print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(bucket))}  {picks} picks, {placed} placed")
+    print("Failure rate by part:")
+    for color, shape, picks, missed, failed, rate in failure_rates(args.path, since):
+        print(f"  {color or '?'} {shape or '?'}: {picks} picks, {missed} missed, {failed} failed ({rate:.1%})")
+
+
+if __name__ == "__main__":
+    main()
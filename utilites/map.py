@@ -8,6 +8,26 @@ def load_calibration(filename="calibration.json"):
     return np.array(data["homography"])
 
 
+def load_table(filename="calibration.json"):
+    """
+    Table area stored next to the homography
+
+    The calibration file may hold "table": [x_min, x_max, y_min, y_max] in
+    robot coordinates (mm); detections outside it are not picked.
+
+    Returns:
+        tuple or None: (x_min, x_max, y_min, y_max), None if the file has no table
+    """
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    table = data.get("table")
+    if table is None:
+        return None
+    if len(table) != 4:
+        raise ValueError(f"table must be [x_min, x_max, y_min, y_max], got {table}")
+    return tuple(float(v) for v in table)
+
+
 def pixel_to_robot(u, v, H):
     """Transform pixel (u, v) to Robot (X, Y) using homography matrix H"""
     p = np.array([u, v, 1.0], dtype=np.float32).reshape(3, 1)
@@ -15,4 +35,13 @@ def pixel_to_robot(u, v, H):
     # Homogeneous divide to get real-world coordinates
     X = pr[0, 0] / pr[2, 0]
     Y = pr[1, 0] / pr[2, 0]
-    return X, Y
\ No newline at end of file
+    return X, Y
+
+
+def pixels_to_robot(points, H):
+    """Transform an (N, 2) array of pixel points to (N, 2) robot (X, Y) points in one pass"""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    H = np.asarray(H, dtype=np.float64)
+    pr = pts @ H[:, :2].T + H[:, 2]
+    # Homogeneous divide to get real-world coordinates
+    return pr[:, :2] / pr[:, 2:3]
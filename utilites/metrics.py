@@ -0,0 +1,296 @@
+"""
+Production metrics in Prometheus text format
+
+Counters, gauges and fixed-bucket histograms kept in process memory. The
+robot and vision code record into the module level metrics below (a lock
+and a few additions per observation); the values are exposed either over
+HTTP for Prometheus to scrape:
+
+    from utilites.metrics import start_http_server
+    start_http_server(9400)             # http://127.0.0.1:9400/metrics
+    start_http_server(9400, "0.0.0.0")  # reachable from other machines
+
+or as a file for the node_exporter textfile collector (write_file()).
+"""
+
+import bisect
+import http.server
+import os
+import threading
+import time
+from collections import deque
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, **labels):
+        """Child metric for one label combination"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        # Metrics without labels record into a single child
+        return self.labels()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(list(self._children.items())):
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labelnames, key):
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _new_child = _CounterChild
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    def __init__(self):
+        super().__init__()
+        self._function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Compute the value when the metrics are rendered instead of storing it"""
+        self._function = function
+
+    def render(self, name, labelnames, key):
+        if self._function is not None:
+            self.value = self._function()
+        return super().render(name, labelnames, key)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    _new_child = _GaugeChild
+
+    def set(self, value):
+        self._default().set(value)
+
+    def set_function(self, function):
+        self._default().set_function(function)
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name, labelnames, key):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, n in zip(list(self.buckets) + [float("inf")], counts):
+            cumulative += n
+            labels = _format_labels(labelnames, key, [("le", _format_value(float(bound)))])
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _format_labels(labelnames, key)
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help_text, labelnames=()):
+    return REGISTRY.register(Counter(name, help_text, labelnames))
+
+
+def gauge(name, help_text, labelnames=()):
+    return REGISTRY.register(Gauge(name, help_text, labelnames))
+
+
+def histogram(name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, help_text, labelnames, buckets))
+
+
+# Robot
+PICKS = counter("dobot_picks_total", "Pick cycles by outcome (placed, missed, failed)", ["outcome"])
+PICK_CYCLE = histogram("dobot_pick_cycle_seconds", "Duration of one pick_and_place cycle", buckets=DURATION_BUCKETS)
+SEGMENT = histogram("dobot_segment_seconds", "Duration of blocking pick_and_place segments (hover, descend, lift, ...)",
+                    ["segment"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0))
+COMMAND_RTT = histogram("dobot_command_rtt_seconds", "Round trip time of dashboard/move commands", ["port", "command"])
+FEED_FRAMES = counter("dobot_feed_frames_total", "Valid feedback frames decoded from port 30004")
+PICKS_PER_MINUTE = gauge("dobot_picks_per_minute", "Pick cycles completed in the last 60 s")
+
+# Vision
+DETECTION = histogram("vision_detection_seconds", "Detector.find_objects processing time")
+DETECTION_LATENCY = histogram("vision_detection_latency_seconds", "Frame capture to detection result")
+OBJECTS_PER_FRAME = histogram("vision_objects_per_frame", "Objects detected per processed frame", buckets=COUNT_BUCKETS)
+
+
+class RateWindow:
+    """Events per minute over a sliding window, used for dobot_picks_per_minute"""
+
+    def __init__(self, window_s=60.0):
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        self._times = deque()
+
+    def add(self, t=None):
+        t = t if t is not None else time.monotonic()
+        with self._lock:
+            self._times.append(t)
+            self._expire(t)
+
+    def rate(self, t=None):
+        """Events per minute in the window ending at t (now), so an idle line reads 0"""
+        t = t if t is not None else time.monotonic()
+        with self._lock:
+            self._expire(t)
+            return len(self._times) * 60.0 / self.window_s
+
+    def _expire(self, t):
+        cutoff = t - self.window_s
+        while self._times and self._times[0] < cutoff:
+            self._times.popleft()
+
+
+pick_rate = RateWindow()
+# evaluated on every scrape, not only when a pick completes
+PICKS_PER_MINUTE.set_function(pick_rate.rate)
+
+
+def record_pick(outcome, seconds):
+    """Count one pick cycle for the counters and the per-minute gauge"""
+    PICKS.labels(outcome=outcome).inc()
+    PICK_CYCLE.observe(seconds)
+    pick_rate.add()
+
+
+def write_file(path, registry=REGISTRY):
+    """Write the metrics atomically (textfile collector picks up complete files only)"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+    return path
+
+
+def start_http_server(port, host="127.0.0.1", registry=REGISTRY):
+    """
+    Serve /metrics on a daemon thread; returns the server (call shutdown() to stop)
+
+    Args:
+        host: bind address, local only by default; "0.0.0.0" for a Prometheus on another machine
+    """
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics on http://{host}:{port}/metrics")
+    return server
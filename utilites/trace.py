@@ -0,0 +1,154 @@
+"""
+Pipeline tracing in Chrome trace format
+
+Wrap pipeline stages in span() to see where a cycle's time goes:
+
+    from utilites.trace import span
+
+    with span("detect.hsv"):
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+
+Tracing is off unless the DOBOT_TRACE environment variable names an output
+file (or enable() is called, e.g. from a --trace CLI flag). When off, span()
+returns one shared no-op context manager, so instrumented code pays only a
+function call and an attribute check. When on, spans are buffered in memory
+(the newest max_events, so long-running loops keep a bounded buffer) and
+written on exit as Chrome/Perfetto JSON; open the file in chrome://tracing
+or https://ui.perfetto.dev.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+ENV_VAR = "DOBOT_TRACE"
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        args = self.args
+        if exc_type is not None:
+            args = dict(args or {}, error=f"{exc_type.__name__}: {exc}")
+        self.tracer._add({
+            "name": self.name,
+            "cat": self.cat,
+            "ph": "X",
+            "ts": (self.start - self.tracer._t0) / 1000.0,
+            "dur": (end - self.start) / 1000.0,
+            "args": args or {},
+        })
+        return False
+
+
+class Tracer:
+    """
+    Collects trace events in memory and writes them as Chrome trace JSON
+
+    Args:
+        max_events: events kept, older ones are dropped (about 100 MB at the default)
+    """
+
+    def __init__(self, max_events=200000):
+        self.enabled = False
+        self.path = None
+        self.recorded = 0
+        self._events = deque(maxlen=max_events)
+        self._threads = {}
+        # Held for one append per event; save() takes it to copy a consistent snapshot
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._t0 = time.perf_counter_ns()
+        self._save_registered = False
+
+    def enable(self, path):
+        """Start recording; events are written to path on exit (or by save())"""
+        self.path = path
+        self.enabled = True
+        if not self._save_registered:
+            atexit.register(self.save)
+            self._save_registered = True
+        print(f"Tracing enabled, writing {path} on exit")
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, cat="pipeline", **args):
+        """Context manager timing one stage; a shared no-op when tracing is off"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def instant(self, name, cat="pipeline", **args):
+        """Mark a point in time (e.g. a fault)"""
+        if self.enabled:
+            self._add({"name": name, "cat": cat, "ph": "i", "s": "t",
+                       "ts": (time.perf_counter_ns() - self._t0) / 1000.0, "args": args})
+
+    def counter(self, name, **values):
+        """Record counter values (shown as a graph track)"""
+        if self.enabled:
+            self._add({"name": name, "ph": "C", "ts": (time.perf_counter_ns() - self._t0) / 1000.0, "args": values})
+
+    def _add(self, event):
+        thread = threading.current_thread()
+        event["pid"] = self._pid
+        event["tid"] = thread.ident
+        with self._lock:
+            self._threads[thread.ident] = thread.name
+            # a full deque drops the oldest event
+            self._events.append(event)
+            self.recorded += 1
+
+    def save(self, path=None):
+        """Write all events recorded so far; returns the path or None if nothing was written"""
+        path = path or self.path
+        # Copy under the lock: other threads may still be appending (e.g. save() from atexit or a CLI)
+        with self._lock:
+            events = list(self._events)
+            threads = list(self._threads.items())
+            recorded = self.recorded
+        if not path or not events:
+            return None
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in threads]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        dropped = recorded - len(events)
+        print(f"Trace with {len(events)} events written to {path}"
+              + (f" ({dropped} older events dropped)" if dropped > 0 else ""))
+        return path
+
+
+tracer = Tracer()
+if os.environ.get(ENV_VAR):
+    tracer.enable(os.environ[ENV_VAR])
+
+
+# Module level shortcut for tracer.span()
+span = tracer.span
+
+
+def enable(path):
+    tracer.enable(path)